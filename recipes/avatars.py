@@ -0,0 +1,89 @@
+"""
+User avatars, served by Gravatar or through a local proxy.
+
+Gravatar identifies an avatar by the MD5 hash of the user's email address.
+The hash is stored on the user when they are saved, so rendering an avatar
+only formats a URL.
+
+When the ``AVATAR_PROXY`` setting is on, avatar URLs point at the ``avatar``
+view instead. It fetches each avatar from Gravatar once, stores it resized to
+every size in ``AVATAR_SIZES`` under ``AVATAR_CACHE_DIR``, and serves the
+files from disk from then on with long-lived cache headers. A changed email
+gives a new hash and so a new URL, which is what makes the long cache safe.
+"""
+
+import os
+import re
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from urllib.request import urlopen
+from django.conf import settings
+from django.urls import reverse
+from libgravatar import md5_hash, sanitize_email
+from PIL import Image
+
+GRAVATAR_URL = 'https://www.gravatar.com/avatar/{hash}?size={size}&default=mp'
+GRAVATAR_HASH_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+DEFAULT_AVATAR_SIZES = (60, 120)
+AVATAR_FETCH_TIMEOUT = 5
+AVATAR_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def gravatar_hash(email):
+    """Return the Gravatar hash of an email address."""
+    return md5_hash(sanitize_email(email))
+
+
+def gravatar_url(email_hash, size):
+    """Return the URL of an avatar on Gravatar, falling back to the mystery person image."""
+    return GRAVATAR_URL.format(hash=email_hash, size=size)
+
+
+def is_proxy_enabled():
+    return getattr(settings, 'AVATAR_PROXY', False)
+
+
+def get_avatar_sizes():
+    return getattr(settings, 'AVATAR_SIZES', DEFAULT_AVATAR_SIZES)
+
+
+def avatar_url(email_hash, size):
+    """Return the URL to show an avatar at, served by the local proxy when it is enabled and has the size."""
+    if is_proxy_enabled() and size in get_avatar_sizes():
+        return reverse('avatar', args=[email_hash, size])
+    return gravatar_url(email_hash, size)
+
+
+def avatar_path(email_hash, size):
+    """Return where the local proxy stores an avatar at the given size."""
+    return Path(settings.AVATAR_CACHE_DIR) / email_hash[:2] / f'{email_hash}-{size}.png'
+
+
+def write_atomically(path, image):
+    """Save an image so that other processes only ever see a complete file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            image.save(file, format='PNG')
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def cache_avatar(email_hash):
+    """
+    Fetch an avatar from Gravatar once and store it at every proxied size.
+
+    Raises ``OSError`` if Gravatar cannot be reached or does not return an
+    image.
+    """
+    sizes = get_avatar_sizes()
+    with urlopen(gravatar_url(email_hash, max(sizes)), timeout=AVATAR_FETCH_TIMEOUT) as response:
+        data = response.read()
+    with Image.open(BytesIO(data)) as image:
+        image = image.convert('RGBA')
+        for size in sizes:
+            write_atomically(avatar_path(email_hash, size), image.resize((size, size), Image.LANCZOS))
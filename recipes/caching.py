@@ -0,0 +1,39 @@
+"""
+Helpers for caching expensive, rarely changing page fragments.
+
+Everything here goes through Django's configured cache, so it works the same
+with the local-memory cache used in development and the file-based cache
+used in production, without needing an external cache service.
+"""
+
+from hashlib import md5
+from django.core.cache import cache
+
+RATINGS_VERSION_KEY = 'recipes:ratings_version'
+TRENDING_CACHE_TIMEOUT = 300
+
+
+def get_ratings_version():
+    """Return the current global ratings version, initialising it if needed."""
+    cache.add(RATINGS_VERSION_KEY, 1, timeout=None)
+    return cache.get(RATINGS_VERSION_KEY, 1)
+
+
+def bump_ratings_version():
+    """
+    Invalidate every cached trending block.
+
+    Called whenever ratings, follows or recipe visibility change, since any
+    of these can change which recipes a user's dashboard shows.
+    """
+    try:
+        cache.incr(RATINGS_VERSION_KEY)
+    except ValueError:
+        cache.set(RATINGS_VERSION_KEY, 2, timeout=None)
+
+
+def trending_cache_key(user):
+    """Return the cache key of a user's trending block for their current following set."""
+    following_ids = sorted(user.following.values_list('id', flat=True))
+    following_hash = md5(','.join(map(str, following_ids)).encode()).hexdigest()
+    return f'recipes:trending:{user.pk}:{following_hash}:{get_ratings_version()}'
@@ -0,0 +1,143 @@
+"""
+Per-user cache of cupboard contents.
+
+A user's cupboard is read on every visit to the cupboard page, but only
+changes when they add or delete an ingredient. Each user's rows are cached
+under their own key, and the signal handlers in ``recipes.signals`` delete
+the key when that user's cupboard changes. Code that
+changes cupboards without sending signals calls ``invalidate_cupboard()``
+itself, or ``invalidate_all_cupboards()`` when it cannot tell whose.
+
+Units are attached from the unit vocabulary each time the cupboard is read,
+so renaming a unit shows up at once.
+
+``annotate_cupboard_coverage()`` scores recipes by how much of them a
+cupboard covers, for the "cook with what I have" ordering of the recipe list.
+"""
+
+from collections import defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (Case, Count, DecimalField, Exists, F, FloatField, IntegerField, OuterRef, Q, Value,
+                              When)
+from django.db.models.functions import Cast
+from .models import RecipeIngredient, UserIngredient
+from .units import get_conversion
+from .vocabulary import attach_vocabulary, unit_vocabulary
+
+CUPBOARD_VERSION_KEY = 'recipes:cupboard_version'
+CUPBOARD_CACHE_TIMEOUT = 60 * 60
+
+
+def get_cupboard_version():
+    cache.add(CUPBOARD_VERSION_KEY, 1, timeout=None)
+    return cache.get(CUPBOARD_VERSION_KEY, 1)
+
+
+def cupboard_cache_key(user_id):
+    return f'recipes:cupboard:{get_cupboard_version()}:{user_id}'
+
+
+def get_cupboard(user):
+    """Return the ingredients in a user's cupboard, in the order they were added, with their units attached."""
+    key = cupboard_cache_key(user.pk)
+    ingredients = cache.get(key)
+    if ingredients is None:
+        ingredients = list(UserIngredient.objects.filter(user=user).order_by('pk'))
+        # Rows read in a transaction that is later rolled back must not be cached,
+        # so they are only stored once the transaction commits.
+        transaction.on_commit(lambda: cache.set(key, ingredients, CUPBOARD_CACHE_TIMEOUT))
+    return attach_vocabulary(ingredients, 'unit', unit_vocabulary)
+
+
+def invalidate_cupboard(*user_ids):
+    """Drop the cached cupboards of the given users now, and again once the current transaction commits."""
+    delete = lambda: cache.delete_many([cupboard_cache_key(user_id) for user_id in user_ids])
+    delete()
+    # Another request may cache the old rows before this transaction commits.
+    transaction.on_commit(delete)
+
+
+def bump_cupboard_version():
+    try:
+        cache.incr(CUPBOARD_VERSION_KEY)
+    except ValueError:
+        cache.set(CUPBOARD_VERSION_KEY, 2, timeout=None)
+
+
+def invalidate_all_cupboards():
+    """Drop every user's cached cupboard now, and again once the current transaction commits."""
+    bump_cupboard_version()
+    transaction.on_commit(bump_cupboard_version)
+
+
+def unit_conversion_groups():
+    """Return the ids of the units sharing each base-unit factor, with the factor and a number for their family."""
+    units_by_conversion = defaultdict(list)
+    for unit in unit_vocabulary.all():
+        units_by_conversion[get_conversion(unit)].append(unit.pk)
+    families = {}
+    return [
+        (families.setdefault(family, len(families)), factor, unit_ids)
+        for (family, factor), unit_ids in units_by_conversion.items()
+    ]
+
+
+def annotate_base_quantity(queryset, groups):
+    """Annotate rows with a quantity and unit with the ``unit_family`` number and ``base_quantity`` of the quantity."""
+    family = Case(
+        *[When(unit_id__in=unit_ids, then=Value(family)) for family, _, unit_ids in groups],
+        output_field=IntegerField(),
+    )
+    factor = Case(
+        *[When(unit_id__in=unit_ids, then=Value(factor)) for _, factor, unit_ids in groups],
+        output_field=DecimalField(),
+    )
+    return queryset.annotate(unit_family=family, base_quantity=F('quantity') * factor)
+
+
+def cupboard_recipe_ingredients(user):
+    """Return the recipe ingredients whose normalised names match an ingredient in a user's cupboard."""
+    cupboard = UserIngredient.objects.filter(user=user, normalised_name=OuterRef('ingredient__normalised_name'))
+    return RecipeIngredient.objects.filter(Exists(cupboard))
+
+
+def stocked_recipe_ingredients(user):
+    """
+    Return a subquery of the ids of the recipe ingredients that a user's cupboard has enough of.
+
+    Quantities are compared in the base unit of their family, converted in
+    the database with one ``CASE`` per side. The size of the query depends on
+    the number of units rather than on the number of cupboard ingredients.
+    """
+    groups = unit_conversion_groups()
+    cupboard = annotate_base_quantity(
+        UserIngredient.objects.filter(user=user, normalised_name=OuterRef('ingredient__normalised_name')), groups
+    ).filter(unit_family=OuterRef('unit_family'), base_quantity__gte=OuterRef('base_quantity'))
+    return annotate_base_quantity(cupboard_recipe_ingredients(user), groups).filter(Exists(cupboard)).values('pk')
+
+
+def annotate_cupboard_coverage(recipes, user):
+    """
+    Keep the recipes that use something in a user's cupboard, annotated with how well the cupboard covers them.
+
+    Each recipe gets ``ingredient_total``, the number of ingredients it has,
+    ``ingredients_covered``, how many of them are in the cupboard,
+    ``ingredients_stocked``, how many the cupboard has enough of, and
+    ``coverage``, the fraction covered. Ingredients match on their normalised
+    names, like the shopping list, so another user's "Flour" counts too.
+    Everything is counted in one aggregate query over the recipe ingredients.
+    """
+    if not get_cupboard(user):
+        # Still annotated, so that the result can be ordered like any other.
+        recipes = recipes.none()
+
+    return recipes.annotate(
+        ingredient_total=Count('recipeingredient'),
+        ingredients_covered=Count(
+            'recipeingredient', filter=Q(recipeingredient__in=cupboard_recipe_ingredients(user).values('pk'))
+        ),
+        ingredients_stocked=Count('recipeingredient', filter=Q(recipeingredient__in=stocked_recipe_ingredients(user))),
+    ).filter(ingredients_covered__gt=0).annotate(
+        coverage=Cast('ingredients_covered', FloatField()) / F('ingredient_total'),
+    )
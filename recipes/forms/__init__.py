@@ -7,3 +7,4 @@ from .recipe_ingredient_form import *
 from .ingredient_form import *
 from .user_ingredient_form import *
 from .method_step_form import *
+from .vocabulary_field import *
@@ -1,10 +1,12 @@
 from django import forms
 from recipes.models import Recipe, Tag
+from recipes.vocabulary import tag_vocabulary
+from .vocabulary_field import VocabularyMultipleChoiceField
 from django_select2.forms import ModelSelect2MultipleWidget
 
 class RecipeForm(forms.ModelForm):
-    tags = forms.ModelMultipleChoiceField(
-        queryset=Tag.objects.all(),
+    tags = VocabularyMultipleChoiceField(
+        tag_vocabulary,
         required=False,
         widget=ModelSelect2MultipleWidget(
             model=Tag,
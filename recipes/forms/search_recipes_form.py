@@ -1,5 +1,7 @@
 from django import forms
 from recipes.models import Tag, Ingredient
+from recipes.vocabulary import tag_vocabulary, ingredient_vocabulary
+from .vocabulary_field import VocabularyMultipleChoiceField
 from django_select2.forms import ModelSelect2MultipleWidget
 
 class SearchRecipesForm(forms.Form):
@@ -9,8 +11,8 @@ class SearchRecipesForm(forms.Form):
         required=False, 
         widget=forms.TextInput(
             {'placeholder':'Enter recipe title here'}))
-    tags = forms.ModelMultipleChoiceField(
-        queryset=Tag.objects.all(), 
+    tags = VocabularyMultipleChoiceField(
+        tag_vocabulary,
         required=False, 
         widget=ModelSelect2MultipleWidget( 
             model=Tag, 
@@ -19,8 +21,8 @@ class SearchRecipesForm(forms.Form):
                 'data-placeholder': 'Search tags',
                 'style':'width: 100%',
                 'data-minimum-input-length':0}))
-    ingredients = forms.ModelMultipleChoiceField(
-        queryset=Ingredient.objects.all(),
+    ingredients = VocabularyMultipleChoiceField(
+        ingredient_vocabulary,
         required=False,
         widget=ModelSelect2MultipleWidget(
             model=Ingredient,
@@ -36,7 +38,8 @@ class SearchRecipesForm(forms.Form):
     		('rating', 'Highest rated'),
     		('-rating', 'Lowest rated'),
     		('favourites', 'Most favourited'),
-    		('-favourites', 'Least favourited')
+    		('-favourites', 'Least favourited'),
+    		('cupboard', 'Cook with what I have')
         ],
         initial='-created_at',
     	required=False
@@ -0,0 +1,32 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+
+class VocabularyMultipleChoiceField(forms.ModelMultipleChoiceField):
+    """
+    Multiple choice field over the rows of a vocabulary.
+
+    Works like ``ModelMultipleChoiceField``, but the chosen ids are checked
+    against the in-process vocabulary rather than the database, and the field
+    cleans to a list of the chosen rows.
+    """
+
+    def __init__(self, vocabulary, **kwargs):
+        self.vocabulary = vocabulary
+        super().__init__(queryset=vocabulary.model.objects.all(), **kwargs)
+
+    def _check_values(self, value):
+        chosen = {}
+        for pk in value:
+            try:
+                row = self.vocabulary.get(int(pk))
+            except (TypeError, ValueError):
+                raise ValidationError(
+                    self.error_messages['invalid_pk_value'], code='invalid_pk_value', params={'pk': pk}
+                )
+            if row is None:
+                raise ValidationError(
+                    self.error_messages['invalid_choice'], code='invalid_choice', params={'value': pk}
+                )
+            chosen[row.pk] = row
+        return list(chosen.values())
@@ -0,0 +1,106 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from recipes.models import Recipe, Comment, MethodStep
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def orphaned_method_steps():
+    """Return the method steps that no recipe uses."""
+    links = Recipe.method_steps.through.objects.filter(methodstep_id=OuterRef('pk'))
+    return MethodStep.objects.filter(~Exists(links))
+
+
+def orphaned_comments():
+    """Return the comments that are neither on a recipe nor a reply to another comment."""
+    recipe_links = Recipe.comments.through.objects.filter(comment_id=OuterRef('pk'))
+    reply_links = Comment.replies.through.objects.filter(to_comment_id=OuterRef('pk'))
+    return Comment.objects.filter(~Exists(recipe_links), ~Exists(reply_links))
+
+
+def iterate_batches(queryset, batch_size):
+    """
+    Yield lists of ids from the queryset in ascending order, batch_size at a time.
+
+    Each batch starts after the last id of the previous one rather than at an
+    offset, so later batches are as cheap to find as the first.
+    """
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def collect_method_steps(batch_size, dry_run=False):
+    """Delete orphaned method steps in batches of set-based DELETEs and return how many there were."""
+    collected = 0
+    for ids in iterate_batches(orphaned_method_steps(), batch_size):
+        if dry_run:
+            collected += len(ids)
+            continue
+        with transaction.atomic():
+            _, deleted = orphaned_method_steps().filter(pk__in=ids).delete()
+            collected += deleted.get(MethodStep._meta.label, 0)
+    return collected
+
+
+def collect_comments(batch_size, dry_run=False):
+    """Delete orphaned comments and their replies in batches and return how many of each there were."""
+    comments = replies = 0
+    for ids in iterate_batches(orphaned_comments(), batch_size):
+        if dry_run:
+            comments += len(ids)
+            replies += Comment.replies.through.objects.filter(from_comment_id__in=ids).count()
+            continue
+        deleted = orphaned_comments().filter(pk__in=ids).delete_with_replies()
+        comments += len(ids)
+        replies += max(deleted - len(ids), 0)
+    return comments, replies
+
+
+class Command(BaseCommand):
+    """
+    Management command to delete method steps, comments and replies that nothing refers to.
+
+    Comments and method steps hang off recipes through many-to-many relations,
+    so deleting recipes or users by any route other than
+    ``Recipe.objects.delete_with_related()`` leaves them behind. This command
+    finds and deletes those rows, along with the replies of orphaned comments.
+
+    Rows are deleted in batches of ``--batch-size``, each committed on its own,
+    so an interrupted run can simply be started again and carries on with the
+    rows that are left. ``--dry-run`` reports what would be deleted without
+    deleting anything. It is meant to be run once a day as a scheduled
+    task; the README gives the cron entry.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help collect_orphans`.
+    """
+
+    help = 'Deletes method steps, comments and replies that no recipe refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Number of rows to delete at a time (default {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be deleted without deleting anything')
+
+    def handle(self, *args, **options):
+        """Delete the orphaned rows and report how many of each kind were reclaimed."""
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        steps = collect_method_steps(batch_size, dry_run)
+        comments, replies = collect_comments(batch_size, dry_run)
+
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(
+            f"{verb} {steps} orphaned method steps, {comments} orphaned comments and {replies} replies."
+        )
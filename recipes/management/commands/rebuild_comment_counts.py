@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import Recipe, Comment
+
+
+def rebuild_comment_counts(recipes):
+    """
+    Recompute the stored comment counts of the given recipes in one UPDATE.
+
+    Args:
+        recipes (QuerySet): Recipes whose ``comment_count`` column should be
+            rebuilt from their comments and the replies to those comments.
+
+    Returns:
+        int: The number of recipes updated.
+    """
+    comments = Recipe.comments.through.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe')
+    replies = Comment.replies.through.objects.filter(
+        from_comment__recipe_comments=OuterRef('pk')
+    ).order_by().values('from_comment__recipe_comments')
+    return recipes.update(
+        comment_count=Coalesce(Subquery(comments.annotate(total=Count('id')).values('total')), 0)
+        + Coalesce(Subquery(replies.annotate(total=Count('id')).values('total')), 0)
+    )
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the denormalised comment counts on recipes.
+
+    The comment views keep ``Recipe.comment_count`` up to date as comments and
+    replies are added and deleted. Comments attached directly through the
+    ``comments`` and ``replies`` relations, for example by the seeder, bypass
+    those views, so this command recomputes every recipe's count in bulk.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help rebuild_comment_counts`.
+    """
+
+    help = 'Rebuilds the stored comment counts of every recipe'
+
+    def handle(self, *args, **options):
+        """Recompute the comment counts of all recipes and report how many were updated."""
+        updated = rebuild_comment_counts(Recipe.objects.all())
+        self.stdout.write(f"Rebuilt comment counts for {updated} recipes.")
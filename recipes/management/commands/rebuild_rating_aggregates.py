@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from recipes.models import Recipe, Rating
+
+
+def rebuild_rating_aggregates(recipes):
+    """
+    Recompute the stored rating aggregates of the given recipes in one UPDATE.
+
+    Args:
+        recipes (QuerySet): Recipes whose ``rating_sum``, ``rating_count`` and
+            ``average_rating`` columns should be rebuilt from their ratings.
+
+    Returns:
+        int: The number of recipes updated.
+    """
+    ratings = Rating.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe')
+    return recipes.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+        average_rating=Coalesce(
+            Subquery(ratings.annotate(average=Avg('rating')).values('average')),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+    )
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the denormalised rating aggregates on recipes.
+
+    Ratings keep ``Recipe.rating_sum``, ``Recipe.rating_count`` and
+    ``Recipe.average_rating`` up to date as they are saved and deleted, cascading
+    deletes included. Bulk creates, updates and raw SQL bypass those hooks, so
+    this command recomputes every recipe's aggregates from the ``Rating``
+    table in bulk.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help rebuild_rating_aggregates`.
+    """
+
+    help = 'Rebuilds the stored rating aggregates of every recipe'
+
+    def handle(self, *args, **options):
+        """Recompute the aggregates of all recipes and report how many were updated."""
+        updated = rebuild_rating_aggregates(Recipe.objects.all())
+        self.stdout.write(f"Rebuilt rating aggregates for {updated} recipes.")
@@ -5,14 +5,24 @@ This command creates a small set of named fixture users and then fills up
 to ``USER_COUNT`` total users using Faker-generated data. Existing records
 are left untouched—if a create fails (e.g., due to duplicates), the error
 is swallowed and generation continues.
+
+With ``--scale N`` it instead generates N synthetic users and, in
+proportion, recipes, comments, ratings and follows in bulk for load testing
+(see ``recipes.seeding``). ``--seed`` fixes the random data generated, and
+``--workers`` spreads the generation over several processes without
+changing it.
 """
 
 from faker import Faker
 from faker.providers import company
 from faker_food import FoodProvider
-from random import randint, random
-from django.core.management.base import BaseCommand
-from recipes.models import User, Tag, MethodStep, Recipe, RecipeIngredient, Ingredient, Unit, Comment
+from random import randint, random, seed as seed_random
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import (User, Tag, MethodStep, Recipe, RecipeIngredient, Ingredient, Unit, Comment,
+                            deferred_tag_updates)
+from recipes.management.commands.rebuild_comment_counts import rebuild_comment_counts
+from recipes.vocabulary import tag_vocabulary, unit_vocabulary, ingredient_vocabulary
+from recipes.seeding import DEFAULT_BATCH_SIZE, DEFAULT_SEED, create_units, create_ingredients, seed_at_scale
 from django.utils.timezone import make_aware
 
 user_fixtures = [
@@ -67,16 +77,57 @@ class Command(BaseCommand):
         Runs the full seeding workflow and stores ``self.users`` for any
         post-processing or debugging (not required for operation).
         """
+        # faker_food draws from the global random module rather than the Faker instance.
+        self.faker.seed_instance(options['seed'])
+        seed_random(options['seed'])
+        if options['scale'] is not None:
+            self.seed_at_scale(options['scale'], options['seed'], options['batch_size'], options['workers'])
+            return
+
         self.create_users()
         self.users = User.objects.all()
+        self.fixture_users = {user.username: user for user in User.objects.filter(
+            username__in=[data['username'] for data in user_fixtures]
+        )}
         self.create_tags()
-        self.create_recipes()
-        self.create_units()
-        self.create_ingredients()
-        self.create_recipeingredients()
+        # Each recipe's allergen tags are worked out once, after all its ingredients are added.
+        with deferred_tag_updates():
+            self.create_recipes()
+            rebuild_comment_counts(Recipe.objects.all())
+            self.create_units()
+            self.create_ingredients()
+            self.create_recipeingredients()
 
     def add_arguments(self, parser):
         parser.add_argument('flag', type=str, nargs='?', default='retain')
+        parser.add_argument('--scale', type=int,
+                            help='Generate this many synthetic users, with recipes, comments, ratings and follows in proportion')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                            help=f'Seed for the random data, so runs can be reproduced (default {DEFAULT_SEED})')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Number of rows to insert at a time with --scale (default {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes generating rows with --scale (default 1)')
+
+    def seed_at_scale(self, scale, seed, batch_size, workers):
+        """Create the fixture user and vocabularies, then bulk generate the synthetic dataset."""
+        if scale < 1:
+            raise CommandError("--scale must be at least 1.")
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        owner = User.objects.filter(username='@johndoe').first()
+        if owner is None:
+            owner = User.objects.create_superuser('@johndoe', 'john.doe@example.org', Command.DEFAULT_PASSWORD)
+        self.create_tags()
+        create_units(owner)
+        create_ingredients(owner)
+        written = seed_at_scale(
+            scale, Command.DEFAULT_PASSWORD, seed=seed, batch_size=batch_size, workers=workers, report=self.stdout.write
+        )
+        self.stdout.write(f"Seeded {sum(written.values())} rows for {scale} users.")
 
     def create_users(self):
         """
@@ -104,8 +155,8 @@ class Command(BaseCommand):
         user_count = User.objects.count()
         while  user_count < self.USER_COUNT:
             print(f"Seeding user {user_count}/{self.USER_COUNT}", end='\r')
-            self.generate_user()
-            user_count = User.objects.count()
+            if self.generate_user():
+                user_count += 1
         print("User seeding complete.      ")
 
     def generate_user(self):
@@ -118,7 +169,7 @@ class Command(BaseCommand):
         last_name = self.faker.last_name()
         email = create_email(first_name, last_name)
         username = create_username(first_name, last_name)
-        self.try_create_user({'username': username, 'email': email, 'first_name': first_name, 'last_name': last_name})
+        return self.try_create_user({'username': username, 'email': email, 'first_name': first_name, 'last_name': last_name})
        
     def try_create_user(self, data):
         """
@@ -127,11 +178,15 @@ class Command(BaseCommand):
         Args:
             data (dict): Mapping with keys ``username``, ``email``,
                 ``first_name``, and ``last_name``.
+
+        Returns:
+            bool: Whether the user was created.
         """
         try:
             self.create_user(data)
         except:
-            pass
+            return False
+        return True
 
     def create_user(self, data):
         """
@@ -161,13 +216,13 @@ class Command(BaseCommand):
             if not created:
                 tag_object.colour = tag["colour"]
                 tag_object.save()
-        print("Tag seeding complete")
+        self.stdout.write("Tag seeding complete")
         
     def create_recipes(self):
         for i in range(self.RECIPE_COUNT):
             for user in user_fixtures:
                 data={}
-                data["user"] = User.objects.get(username=user["username"])
+                data["user"] = self.fixture_users[user["username"]]
                 data["title"] = self.faker.dish()
                 data["description"] = self.faker.dish_description()
                 data["tags"] = self.create_tag_list()
@@ -179,7 +234,7 @@ class Command(BaseCommand):
         num_tags = self.faker.random_int(0,len(tag_fixtures))
         tags = []
         for i in range(num_tags):
-            tag = Tag.objects.get(name=tag_fixtures[i]["name"])
+            tag = tag_vocabulary.get_by_name(tag_fixtures[i]["name"])
             tags.append(tag)
         return tags
     
@@ -195,7 +250,7 @@ class Command(BaseCommand):
         num_comments = self.faker.random_int(1, 20)
         comments = []
         for i in range(1, num_comments):
-            username = User.objects.get(username=user_fixtures[self.faker.random_int(0, len(user_fixtures)-1)]["username"])
+            username = self.fixture_users[user_fixtures[self.faker.random_int(0, len(user_fixtures)-1)]["username"]]
             comment =  self.faker.sentence(nb_words=5)
             date_published = make_aware(self.faker.date_time_between_dates(datetime_start="-5y", datetime_end="now"))
             comment_object = Comment.objects.create(user=username, comment=comment, date_published=date_published)
@@ -208,7 +263,7 @@ class Command(BaseCommand):
         num_replies = self.faker.random_int(1, 10)
         replies = []
         for i in range(1, num_replies):
-            username = User.objects.get(username=user_fixtures[self.faker.random_int(0, len(user_fixtures)-1)]["username"])
+            username = self.fixture_users[user_fixtures[self.faker.random_int(0, len(user_fixtures)-1)]["username"]]
             comment =  self.faker.sentence(nb_words=5)
             date_published = make_aware(self.faker.date_time_between_dates(datetime_start=comment_object.date_published, datetime_end="now"))
             replies.append(Comment.objects.create(user=username, comment=comment, date_published=date_published))
@@ -216,95 +271,20 @@ class Command(BaseCommand):
 
     
     def create_units(self):
-        end_user = User.objects.get(username='@johndoe')
-        Unit.objects.create(name='kilograms', symbol='kgs', user=end_user)
-        Unit.objects.create(name='pounds', symbol='lbs', user=end_user)
-        Unit.objects.create(name='teaspoons', symbol='tsps', user=end_user)
-        Unit.objects.create(name='tablespoons', symbol='tbsps', user=end_user)
-        Unit.objects.create(name='litres', symbol='ltrs', user=end_user)
-        Unit.objects.create(name='millilitres', symbol='mls', user=end_user)
-        Unit.objects.create(name='grams', symbol='gs', user=end_user)
-        Unit.objects.create(name='units', symbol='units', user=end_user)
+        create_units(User.objects.get(username='@johndoe'))
 
     def create_ingredients(self):
-        end_user = User.objects.get(username='@johndoe')
-        # Ingredients
-        Ingredient.objects.create(name='beef', category=Ingredient.BUTCHERY, user=end_user)
-        Ingredient.objects.create(name='potato', category=Ingredient.VEGETABLE, user=end_user)
-        Ingredient.objects.create(name='rice', category=Ingredient.GRAINS, user=end_user)
-        Ingredient.objects.create(name='chicken', category=Ingredient.BUTCHERY, user=end_user)
-        Ingredient.objects.create(name='pork', category=Ingredient.BUTCHERY, user=end_user)
-        Ingredient.objects.create(name='lamb', category=Ingredient.BUTCHERY, user=end_user)
-        Ingredient.objects.create(name='onions', category=Ingredient.ALLUM, user=end_user)
-        Ingredient.objects.create(name='garlic', category=Ingredient.ALLUM, user=end_user)
-        Ingredient.objects.create(name='flour',category=Ingredient.MINERALS, user=end_user)
-        Ingredient.objects.create(name='salt', category=Ingredient.MINERALS, user=end_user)
-        Ingredient.objects.create(name='sugar', category=Ingredient.MINERALS, user=end_user)
-        Ingredient.objects.create(name='pepper', category=Ingredient.SPICE, user=end_user)
-        Ingredient.objects.create(name='cinnamon', category=Ingredient.SPICE, user=end_user)
-        Ingredient.objects.create(name='pistachio', category=Ingredient.NUT, user=end_user)
-        Ingredient.objects.create(name='almond', category=Ingredient.NUT, user=end_user)
-        Ingredient.objects.create(name='lentil', category=Ingredient.PULSES, user=end_user)
-        Ingredient.objects.create(name='water', category=Ingredient.WATER, user=end_user)
-        Ingredient.objects.create(name='milk', category=Ingredient.DAIRY, user=end_user)
-        Ingredient.objects.create(name='tomato', category=Ingredient.VEGETABLE, user=end_user)
-        Ingredient.objects.create(name='carrot', category=Ingredient.VEGETABLE, user=end_user)
-        Ingredient.objects.create(name='celery', category=Ingredient.VEGETABLE, user=end_user) 
-        Ingredient.objects.create(name='bell pepper', category=Ingredient.VEGETABLE, user=end_user) 
-        Ingredient.objects.create(name='mushroom', category=Ingredient.VEGETABLE, user=end_user)
-        Ingredient.objects.create(name='spinach', category=Ingredient.VEGETABLE, user=end_user) 
-        Ingredient.objects.create(name='courgette', category=Ingredient.VEGETABLE, user=end_user) 
-        Ingredient.objects.create(name='aubergine', category=Ingredient.VEGETABLE, user=end_user) 
-        Ingredient.objects.create(name='shallot', category=Ingredient.ALLUM, user=end_user)
-        Ingredient.objects.create(name='leek', category=Ingredient.ALLUM, user=end_user) 
-        Ingredient.objects.create(name='basil', category=Ingredient.HERBS, user=end_user) 
-        Ingredient.objects.create(name='parsley', category=Ingredient.HERBS, user=end_user)
-        Ingredient.objects.create(name='coriander', category=Ingredient.HERBS, user=end_user)
-        Ingredient.objects.create(name='thyme', category=Ingredient.HERBS, user=end_user)
-        Ingredient.objects.create(name='rosemary', category=Ingredient.HERBS, user=end_user)
-        Ingredient.objects.create(name='dill', category=Ingredient.HERBS, user=end_user) 
-        Ingredient.objects.create(name='cumin', category=Ingredient.SPICE, user=end_user) 
-        Ingredient.objects.create(name='turmeric', category=Ingredient.SPICE, user=end_user) 
-        Ingredient.objects.create(name='paprika', category=Ingredient.SPICE, user=end_user) 
-        Ingredient.objects.create(name='chili powder', category=Ingredient.SPICE, user=end_user) 
-        Ingredient.objects.create(name='nutmeg', category=Ingredient.SPICE, user=end_user) 
-        Ingredient.objects.create(name='cardamom', category=Ingredient.SPICE, user=end_user) 
-        Ingredient.objects.create(name='salmon', category=Ingredient.SEAFOOD, user=end_user) 
-        Ingredient.objects.create(name='shrimp', category=Ingredient.SEAFOOD, user=end_user) 
-        Ingredient.objects.create(name='tuna', category=Ingredient.SEAFOOD, user=end_user) 
-        Ingredient.objects.create(name='egg', category=Ingredient.EGG, user=end_user) 
-        Ingredient.objects.create(name='butter', category=Ingredient.DAIRY, user=end_user) 
-        Ingredient.objects.create(name='cream', category=Ingredient.DAIRY, user=end_user) 
-        Ingredient.objects.create(name='yogurt', category=Ingredient.DAIRY, user=end_user) 
-        Ingredient.objects.create(name='cheese', category=Ingredient.DAIRY, user=end_user) 
-        Ingredient.objects.create(name='pasta', category=Ingredient.GLUTEN, user=end_user) 
-        Ingredient.objects.create(name='bread', category=Ingredient.GLUTEN, user=end_user) 
-        Ingredient.objects.create(name='quinoa', category=Ingredient.GRAINS, user=end_user) 
-        Ingredient.objects.create(name='chickpeas', category=Ingredient.PULSES, user=end_user) 
-        Ingredient.objects.create(name='beans', category=Ingredient.PULSES, user=end_user) 
-        Ingredient.objects.create(name='baking powder', category=Ingredient.MINERALS, user=end_user) 
-        Ingredient.objects.create(name='baking soda', category=Ingredient.MINERALS, user=end_user) 
-        Ingredient.objects.create(name='strawberry', category=Ingredient.FRUIT, user=end_user) 
-        Ingredient.objects.create(name='banana', category=Ingredient.FRUIT, user=end_user) 
-        Ingredient.objects.create(name='lemon', category=Ingredient.FRUIT, user=end_user) 
-        Ingredient.objects.create(name='orange', category=Ingredient.FRUIT, user=end_user) 
-        Ingredient.objects.create(name='apple', category=Ingredient.FRUIT, user=end_user) 
-        Ingredient.objects.create(name='blueberry', category=Ingredient.FRUIT, user=end_user) 
-        Ingredient.objects.create(name='honey', category=Ingredient.MINERALS, user=end_user) 
-        Ingredient.objects.create(name='maple syrup', category=Ingredient.MINERALS, user=end_user) 
-        Ingredient.objects.create(name='chocolate', category=Ingredient.MINERALS, user=end_user) 
-        Ingredient.objects.create(name='cocoa powder', category=Ingredient.SPICE, user=end_user) 
-        Ingredient.objects.create(name='vanilla', category=Ingredient.SPICE, user=end_user) 
+        create_ingredients(User.objects.get(username='@johndoe'))
                 
     def create_recipeingredients(self):
+        end_user = User.objects.get(username='@johndoe')
         for recipe in Recipe.objects.all():
-            end_user = User.objects.get(username='@johndoe')
             data={}
             data["user"] = end_user
             data["recipe"] = recipe
             data["quantity"] = 3
-            data["unit"] = Unit.objects.get(name="kilograms")
-            data["ingredient"] = Ingredient.objects.get(name="potato")
+            data["unit"] = unit_vocabulary.get_by_name("kilograms")
+            data["ingredient"] = ingredient_vocabulary.get_by_name("potato")
             create_recipeingredient(data)
 
 def create_username(first_name, last_name):
@@ -0,0 +1,132 @@
+"""
+Shopping lists for meal plans of several recipes.
+
+A meal plan is a set of recipes, each with the multiplier it is to be cooked
+at, kept in the user's session. ``plan_shopping_list()`` loads the
+ingredients of every recipe in the plan in one query, adds up the quantities
+of each ingredient across recipes, takes away what the user's cupboard holds
+and returns what is left to buy.
+
+Ingredients are matched on their normalised names, and quantities are only
+added up or taken away within the same unit family; an ingredient needed in
+grams by one recipe and in cups by another appears twice.
+"""
+
+import csv
+from collections import namedtuple
+from decimal import Decimal
+from .cupboard import get_cupboard
+from .models import Recipe, RecipeIngredient
+from .units import get_conversion
+from .vocabulary import ingredient_vocabulary, unit_vocabulary
+
+MEAL_PLAN_SESSION_KEY = 'meal_plan'
+MAX_MEAL_PLAN_RECIPES = 50
+MAX_MULTIPLIER = 100
+QUANTITY_PLACES = Decimal('0.01')
+
+ShoppingListItem = namedtuple('ShoppingListItem', ['name', 'quantity', 'unit'])
+
+
+def get_meal_plan(session):
+    """Return the recipe ids in the session's meal plan, mapped to their multipliers, in the order they were added."""
+    return {int(recipe_id): multiplier for recipe_id, multiplier in session.get(MEAL_PLAN_SESSION_KEY, {}).items()}
+
+
+def save_meal_plan(session, plan):
+    session[MEAL_PLAN_SESSION_KEY] = {str(recipe_id): multiplier for recipe_id, multiplier in plan.items()}
+
+
+def add_to_meal_plan(session, recipe_id, multiplier):
+    """Add a recipe to the session's meal plan, or change its multiplier. Returns False if the plan is full."""
+    plan = get_meal_plan(session)
+    if recipe_id not in plan and len(plan) >= MAX_MEAL_PLAN_RECIPES:
+        return False
+    plan[recipe_id] = min(max(multiplier, 1), MAX_MULTIPLIER)
+    save_meal_plan(session, plan)
+    return True
+
+
+def remove_from_meal_plan(session, recipe_id):
+    plan = get_meal_plan(session)
+    plan.pop(recipe_id, None)
+    save_meal_plan(session, plan)
+
+
+def get_planned_recipes(user, plan):
+    """Return the recipes in a meal plan that the user can see, in plan order, each with its multiplier."""
+    recipes = {recipe.pk: recipe for recipe in Recipe.objects.visible_to(user).filter(pk__in=plan)}
+    planned = []
+    for recipe_id, multiplier in plan.items():
+        if recipe_id in recipes:
+            recipes[recipe_id].multiplier = multiplier
+            planned.append(recipes[recipe_id])
+    return planned
+
+
+def plan_shopping_list(user, plan):
+    """
+    Return what the user has to buy to cook every recipe in a meal plan, as ``ShoppingListItem`` tuples by name.
+
+    ``plan`` maps recipe ids to multipliers. Recipes the user cannot see are
+    skipped. Each item is given in the largest unit any of the recipes asks
+    for it in.
+    """
+    needed = {}
+    recipe_ingredients = list(RecipeIngredient.objects.filter(
+        recipe__in=Recipe.objects.visible_to(user).filter(pk__in=plan)
+    ).values_list('recipe_id', 'ingredient_id', 'unit_id', 'quantity'))
+    ingredients = ingredient_vocabulary.get_many({row[1] for row in recipe_ingredients})
+    for recipe_id, ingredient_id, unit_id, quantity in recipe_ingredients:
+        ingredient = ingredients.get(ingredient_id)
+        unit = unit_vocabulary.get(unit_id)
+        if ingredient is None or unit is None:
+            continue
+        family, factor = get_conversion(unit)
+        key = (ingredient.normalised_name, family)
+        total, display_name, display_unit = needed.get(key, (Decimal(0), ingredient.name, unit))
+        if factor > get_conversion(display_unit).factor:
+            display_unit = unit
+        needed[key] = (total + quantity * factor * plan[recipe_id], display_name, display_unit)
+
+    available = {}
+    for entry in get_cupboard(user):
+        if entry.unit is None:
+            continue
+        family, factor = get_conversion(entry.unit)
+        key = (entry.normalised_name, family)
+        available[key] = available.get(key, Decimal(0)) + entry.quantity * factor
+
+    shopping_list = []
+    for key, (total, name, unit) in needed.items():
+        missing = total - available.get(key, Decimal(0))
+        if missing > 0:
+            quantity = (missing / get_conversion(unit).factor).quantize(QUANTITY_PLACES)
+            shopping_list.append(ShoppingListItem(name, quantity, unit))
+    return sorted(shopping_list, key=lambda item: (item.name.lower(), item.unit.symbol))
+
+
+def format_quantity(quantity):
+    """Return a quantity without trailing zeros or an exponent."""
+    return f'{quantity.normalize():f}'
+
+
+class Echo:
+    """A file-like object that returns what is written to it, so csv.writer can feed a streaming response."""
+
+    def write(self, value):
+        return value
+
+
+def shopping_list_csv_rows(items):
+    """Yield the lines of a shopping list as CSV, header first."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(['Ingredient', 'Quantity', 'Unit'])
+    for item in items:
+        yield writer.writerow([item.name, format_quantity(item.quantity), item.unit.symbol])
+
+
+def shopping_list_text_lines(items):
+    """Yield the lines of a shopping list as plain text, one ingredient per line."""
+    for item in items:
+        yield f'{format_quantity(item.quantity)} {item.unit.symbol} of {item.name}\n'
@@ -0,0 +1,23 @@
+"""
+Middleware that puts off allergen tag updates until the end of each request.
+
+Recipes work out their allergen tags whenever one of their ingredients is
+saved or deleted. A request that saves many ingredients, such as an admin
+change form, a recipe form or an ingredient formset, would otherwise do it
+once per row. ``DeferredTagUpdatesMiddleware`` runs every request inside
+``deferred_tag_updates``, so each recipe that changed is updated once, after
+the view has returned.
+"""
+
+from .models import deferred_tag_updates
+
+
+class DeferredTagUpdatesMiddleware:
+    """Update the allergen tags of the recipes a request changed once, after its view has returned."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with deferred_tag_updates():
+            return self.get_response(request)
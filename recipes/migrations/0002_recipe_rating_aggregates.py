@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:31
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Rating = apps.get_model('recipes', 'Rating')
+    ratings = Rating.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe')
+    Recipe.objects.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+        average_rating=Coalesce(
+            Subquery(ratings.annotate(average=Avg('rating')).values('average')),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='average_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
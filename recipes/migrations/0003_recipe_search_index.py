@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# A frozen copy of the search index as it was when this migration was written,
+# so that later changes to recipes.search do not change what it does.
+SEARCH_TABLE = 'recipes_recipe_search'
+
+
+def create_search_table(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "title, description, ingredients, method, tokenize = 'unicode61')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "recipe_id bigint PRIMARY KEY REFERENCES recipes_recipe (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)")
+
+
+def index_recipe(schema_editor, recipe):
+    ingredients = recipe.recipeingredient_set.values_list('ingredient__name', flat=True)
+    method = recipe.method_steps.values_list('method_text', flat=True)
+    document = (recipe.title, recipe.description, ' '.join(ingredients), ' '.join(method))
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, ingredients, method) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [recipe.pk, *document]
+        )
+    else:
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (recipe_id, document) VALUES (%s, "
+            "setweight(to_tsvector('simple', %s), 'A') || "
+            "setweight(to_tsvector('simple', %s), 'B') || "
+            "setweight(to_tsvector('simple', %s), 'C') || "
+            "setweight(to_tsvector('simple', %s), 'D'))",
+            [recipe.pk, *document]
+        )
+
+
+def create_and_fill_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    create_search_table(schema_editor)
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for recipe in Recipe.objects.using(schema_editor.connection.alias).iterator():
+        index_recipe(schema_editor, recipe)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_and_fill_search_index, drop_search_index),
+    ]
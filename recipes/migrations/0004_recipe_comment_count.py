@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counts(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Comment = apps.get_model('recipes', 'Comment')
+    comments = Recipe.comments.through.objects.filter(recipe=OuterRef('pk')).order_by().values('recipe')
+    replies = Comment.replies.through.objects.filter(
+        from_comment__recipe_comments=OuterRef('pk')
+    ).order_by().values('from_comment__recipe_comments')
+    Recipe.objects.update(
+        comment_count=Coalesce(Subquery(comments.annotate(total=Count('id')).values('total')), 0)
+        + Coalesce(Subquery(replies.annotate(total=Count('id')).values('total')), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:39
+
+from django.db import migrations, models
+from recipes.avatars import gravatar_hash
+
+BATCH_SIZE = 1000
+
+
+def backfill_gravatar_hashes(apps, schema_editor):
+    User = apps.get_model('recipes', 'User')
+    batch = []
+    for user in User.objects.only('pk', 'email').iterator(chunk_size=BATCH_SIZE):
+        user.gravatar_hash = gravatar_hash(user.email)
+        batch.append(user)
+        if len(batch) == BATCH_SIZE:
+            User.objects.bulk_update(batch, ['gravatar_hash'])
+            batch = []
+    User.objects.bulk_update(batch, ['gravatar_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='gravatar_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_gravatar_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# A frozen copy of recipes.models.ingredient.normalise_ingredient_name as it was
+# when this migration was written, so that later changes to it do not change
+# what this migration does.
+PLURAL_ENDINGS = (('ies', 'y'), ('oes', 'o'), ('ches', 'ch'), ('shes', 'sh'), ('sses', 'ss'), ('xes', 'x'), ('s', ''))
+SINGULAR_ENDINGS = ('ss', 'us', 'is')
+IRREGULAR_SINGULARS = {
+    'pies': 'pie',
+    'cookies': 'cookie',
+    'brownies': 'brownie',
+    'smoothies': 'smoothie',
+    'veggies': 'veggie',
+    'molasses': 'molasses',
+    'leaves': 'leaf',
+    'loaves': 'loaf',
+    'halves': 'half',
+}
+
+
+def singularise(word):
+    if word in IRREGULAR_SINGULARS:
+        return IRREGULAR_SINGULARS[word]
+    if len(word) <= 3:
+        return word
+    for plural, singular in PLURAL_ENDINGS:
+        if word.endswith(plural):
+            if plural == 's' and word.endswith(SINGULAR_ENDINGS):
+                return word
+            return word[:-len(plural)] + singular
+    return word
+
+
+def normalise_ingredient_name(name):
+    return ' '.join(singularise(word) for word in name.lower().split())
+
+
+def update_in_batches(model, rows, fields):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            model.objects.bulk_update(batch, fields)
+            batch = []
+    model.objects.bulk_update(batch, fields)
+
+
+def backfill_normalised_names(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    UserIngredient = apps.get_model('recipes', 'UserIngredient')
+
+    canonical_ids = {}
+    ingredients = []
+    for ingredient in Ingredient.objects.only('pk', 'name').order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        ingredient.normalised_name = normalise_ingredient_name(ingredient.name)
+        canonical_ids.setdefault(ingredient.normalised_name, ingredient.pk)
+        ingredients.append(ingredient)
+    update_in_batches(Ingredient, ingredients, ['normalised_name'])
+
+    def link(user_ingredient):
+        user_ingredient.normalised_name = normalise_ingredient_name(user_ingredient.name)
+        user_ingredient.ingredient_id = canonical_ids.get(user_ingredient.normalised_name)
+        return user_ingredient
+
+    user_ingredients = UserIngredient.objects.only('pk', 'name').iterator(chunk_size=BATCH_SIZE)
+    update_in_batches(UserIngredient, map(link, user_ingredients), ['normalised_name', 'ingredient'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_user_gravatar_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='normalised_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='useringredient',
+            name='ingredient',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cupboard_entries', to='recipes.ingredient'),
+        ),
+        migrations.AddField(
+            model_name='useringredient',
+            name='normalised_name',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='useringredient',
+            index=models.Index(fields=['user', 'normalised_name'], name='recipes_use_user_id_57379d_idx'),
+        ),
+        migrations.RunPython(backfill_normalised_names, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,31 @@
-from django.db import models
+from django.db import models, transaction
 from .user import User
 
+class CommentQuerySet(models.QuerySet):
+    '''Query set used for comments'''
+
+    def delete_with_replies(self):
+        '''
+        Delete the comments and all of their replies, and return how many comments were deleted.
+
+        The replies are found with one query, and all the comments are then
+        deleted together, along with their links to recipes and to each other,
+        with a fixed number of set-based DELETEs in one transaction.
+        '''
+        with transaction.atomic():
+            comment_ids = list(self.values_list('pk', flat=True))
+            reply_ids = list(Comment.replies.through.objects.filter(
+                from_comment_id__in=comment_ids
+            ).values_list('to_comment_id', flat=True))
+            _, deleted = Comment.objects.filter(pk__in=set(comment_ids) | set(reply_ids)).delete()
+            return deleted.get(Comment._meta.label, 0)
+
+
 class Comment(models.Model):
     '''Model used for for creating comments'''
+
+    objects = CommentQuerySet.as_manager()
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     comment = models.CharField(blank=False, max_length=500)
     date_published = models.DateTimeField()
@@ -11,4 +34,4 @@ class Comment(models.Model):
    
     class Meta:
         '''Order comments based on date published, with older comments appearing before newer comments'''
-        ordering = ('date_published',)
\ No newline at end of file
+        ordering = ('date_published',)
@@ -1,9 +1,51 @@
 from django.db import models
 from .user import User
 
+# Plural endings and their singular, tried in order, and endings of words that are already singular.
+PLURAL_ENDINGS = (('ies', 'y'), ('oes', 'o'), ('ches', 'ch'), ('shes', 'sh'), ('sses', 'ss'), ('xes', 'x'), ('s', ''))
+SINGULAR_ENDINGS = ('ss', 'us', 'is')
+
+# Words the endings above get wrong, mapped to their singular.
+IRREGULAR_SINGULARS = {
+    'pies': 'pie',
+    'cookies': 'cookie',
+    'brownies': 'brownie',
+    'smoothies': 'smoothie',
+    'veggies': 'veggie',
+    'molasses': 'molasses',
+    'leaves': 'leaf',
+    'loaves': 'loaf',
+    'halves': 'half',
+}
+
+
+def singularise(word):
+    if word in IRREGULAR_SINGULARS:
+        return IRREGULAR_SINGULARS[word]
+    if len(word) <= 3:
+        return word
+    for plural, singular in PLURAL_ENDINGS:
+        if word.endswith(plural):
+            if plural == 's' and word.endswith(SINGULAR_ENDINGS):
+                return word
+            return word[:-len(plural)] + singular
+    return word
+
+
+def normalise_ingredient_name(name):
+    """
+    Return the form of an ingredient name used to match ingredients with each other.
+
+    The name is lower-cased, its whitespace collapsed and each word put in
+    the singular, so "Cherry Tomatoes" and "cherry tomato" match.
+    """
+    return ' '.join(singularise(word) for word in name.lower().split())
+
+
 class Ingredient(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    normalised_name = models.CharField(max_length=100, default='', editable=False, db_index=True)
     NONE = "NN"
     VEGETABLE = "VG"
     SPICE = "SP"
@@ -47,5 +89,11 @@ class Ingredient(models.Model):
         default=NONE
     )
 
+    def save(self, *args, **kwargs):
+        self.normalised_name = normalise_ingredient_name(self.name)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'normalised_name'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name 
\ No newline at end of file
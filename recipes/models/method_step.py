@@ -1,12 +1,46 @@
-from django.db import models
+from django.db import models, transaction
 from .user import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from ..search import index_recipe
+
+
+class MethodStepQuerySet(models.QuerySet):
+    '''Query set used for method steps'''
+
+    def delete(self):
+        '''
+        Delete the method steps and reindex the recipes that used them.
+
+        The recipes are looked up once for all of the steps, and the steps are
+        then deleted with set-based DELETEs, so the number of queries does not
+        grow with the number of steps.
+        '''
+        Recipe = self.model._meta.get_field('recipe_method_steps').related_model
+        with transaction.atomic():
+            recipes = list(Recipe.objects.filter(method_steps__in=self.values('pk')).distinct())
+            result = super().delete()
+            for recipe in recipes:
+                index_recipe(recipe)
+        return result
+
 
 class MethodStep(models.Model):
     '''Model used for creating method steps'''
+
+    objects = MethodStepQuerySet.as_manager()
+
     step_number = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(20)])
     method_text = models.TextField(blank=False, max_length=256)
     
     class Meta:
         '''Orders based on step number, in ascending order'''
         ordering = ('step_number',)
+
+    def delete(self, *args, **kwargs):
+        '''Delete the method step and reindex the recipes that used it.'''
+        with transaction.atomic():
+            recipes = list(self.recipe_method_steps.all())
+            result = super().delete(*args, **kwargs)
+            for recipe in recipes:
+                index_recipe(recipe)
+        return result
@@ -1,9 +1,37 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Sum
 from django.core.validators import MinValueValidator, MaxValueValidator
 from .user import User
 from .recipe import Recipe
+from ..caching import bump_ratings_version
+
+
+class RatingQuerySet(models.QuerySet):
+    """Query set used for ratings"""
+
+    def remove_from_aggregates(self):
+        """
+        Take the ratings in the query set out of their recipes' stored rating aggregates.
+
+        The ratings are summed per recipe in one query, and each recipe is then
+        updated once, however many of its ratings are removed.
+        """
+        changes = list(self.order_by().values('recipe_id').annotate(total=Sum('rating'), number=Count('pk')))
+        for change in changes:
+            Recipe.objects.filter(pk=change['recipe_id']).apply_rating_change(-change['total'], -change['number'])
+        if changes:
+            bump_ratings_version()
+
+    def delete(self):
+        """Delete the ratings and take them out of their recipes' rating aggregates."""
+        with transaction.atomic():
+            self.remove_from_aggregates()
+            return super().delete()
+
 
 class Rating(models.Model):
+    objects = RatingQuerySet.as_manager()
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ratings')
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
     rating = models.IntegerField(
@@ -12,3 +40,38 @@ class Rating(models.Model):
     
     class Meta:
         unique_together = ('user', 'recipe')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored rating so that saves only apply the difference to the recipe."""
+        instance = super().from_db(db, field_names, values)
+        instance._stored_rating = instance.__dict__.get('rating')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the rating and incrementally update the recipe's rating aggregates."""
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        current = int(self.rating)
+        previous = getattr(self, '_stored_rating', None)
+
+        if adding:
+            self.recipe.apply_rating_change(current, 1)
+            bump_ratings_version()
+        elif previous is not None and current != previous:
+            self.recipe.apply_rating_change(current - previous, 0)
+            bump_ratings_version()
+        self._stored_rating = current
+
+    def delete(self, *args, **kwargs):
+        """Delete the rating and take it out of the recipe's rating aggregates."""
+        previous = getattr(self, '_stored_rating', None)
+        rating = int(self.rating if previous is None else previous)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if Rating.recipe.is_cached(self):
+                self.recipe.apply_rating_change(-rating, -1)
+            else:
+                Recipe.objects.filter(pk=self.recipe_id).apply_rating_change(-rating, -1)
+        bump_ratings_version()
+        return result
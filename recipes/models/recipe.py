@@ -1,12 +1,135 @@
-from django.db import models
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import models, transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Greatest
 from .user import User
 from .tag import Tag
 from .comment import Comment
 from .method_step import MethodStep
+from ..caching import bump_ratings_version
+from ..vocabulary import tag_vocabulary
+
+# Tags given to every recipe with no ingredient of the matching category.
+ALLERGEN_TAGS = {
+    'NT': 'Nut-free',
+    'DR': 'Dairy-free',
+    'GL': 'Gluten-free',
+    'BT': 'Vegetarian',
+}
+
+_pending_tag_updates = ContextVar('recipes_pending_tag_updates', default=None)
+
+
+def get_allergen_tags():
+    """Return the allergen tags keyed by ingredient category, creating any that are missing."""
+    tags = {category: tag_vocabulary.get_by_name(name) for category, name in ALLERGEN_TAGS.items()}
+    for category, tag in tags.items():
+        if tag is None:
+            tags[category], _ = Tag.objects.get_or_create(name=ALLERGEN_TAGS[category])
+    return tags
+
+
+@contextmanager
+def deferred_tag_updates():
+    """
+    Put off allergen tag updates until the end of the block.
+
+    Recipes whose tags would have been updated inside the block are updated
+    once each when it ends, however many of their ingredients were saved or
+    deleted. Nothing is updated if the block raises. Nested blocks defer to
+    the outermost one. Recipes deleted before the block ends are skipped.
+    """
+    if _pending_tag_updates.get() is not None:
+        yield
+        return
+
+    pending = {}
+    token = _pending_tag_updates.set(pending)
+    try:
+        yield
+    finally:
+        _pending_tag_updates.reset(token)
+    if pending:
+        existing = set(Recipe.objects.filter(pk__in=pending).values_list('pk', flat=True))
+        for pk, recipe in pending.items():
+            if pk in existing:
+                recipe.update_tags()
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Query set used for recipes"""
+
+    def visible_to(self, user):
+        """
+        Return the recipes the given user is allowed to see.
+
+        A recipe is visible if it is public, created by the user, or created by
+        someone the user follows. The followed users are matched with a subquery
+        on the follow table rather than a join, so no DISTINCT is needed.
+        """
+        if not user.is_authenticated:
+            return self.filter(public=True)
+        followed_users = User.following.through.objects.filter(from_user=user).values('to_user')
+        return self.filter(Q(public=True) | Q(user=user) | Q(user__in=followed_users))
+
+    def adjust_comment_count(self, delta):
+        """
+        Add delta to the stored comment count of every recipe in the query set in one UPDATE.
+
+        The count never drops below zero, so a count that has drifted out of
+        step is corrected by the rebuild_comment_counts command rather than
+        breaking comment deletion.
+        """
+        return self.update(comment_count=Greatest(F('comment_count') + delta, 0))
+
+    def apply_rating_change(self, sum_delta, count_delta):
+        """Adjust the stored rating aggregates of every recipe in the query set in one UPDATE."""
+        new_sum = F('rating_sum') + sum_delta
+        new_count = F('rating_count') + count_delta
+        return self.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            average_rating=Case(
+                When(rating_count__gt=-count_delta, then=Cast(new_sum, FloatField()) / new_count),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        )
+
+    def delete_with_related(self):
+        """
+        Delete the recipes together with their comments, replies and method steps.
+
+        Comments and method steps belong to recipes through many-to-many
+        relations, so deleting the recipes on their own would leave them behind.
+        Everything is removed in one transaction with set-based DELETEs, so the
+        number of queries does not grow with the number of comments or method
+        steps.
+
+        Returns the number of recipes deleted.
+        """
+        with transaction.atomic():
+            recipe_ids = list(self.values_list('pk', flat=True))
+            Comment.objects.filter(recipe_comments__in=recipe_ids).delete_with_replies()
+
+            step_links = Recipe.method_steps.through.objects.filter(recipe_id__in=recipe_ids)
+            step_ids = list(step_links.values_list('methodstep_id', flat=True))
+            # With their links gone first, there are no recipes left to reindex
+            # for the steps; the search index entries go along with the recipes below.
+            step_links.delete()
+            MethodStep.objects.filter(pk__in=step_ids).delete()
+
+            _, deleted = Recipe.objects.filter(pk__in=recipe_ids).delete()
+        bump_ratings_version()
+        return deleted.get(Recipe._meta.label, 0)
+
 
 class Recipe(models.Model):
     """Model used for recipes"""
 
+    objects = RecipeQuerySet.as_manager()
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recipes_created')
     title = models.CharField(max_length=100)
     description = models.TextField()
@@ -17,55 +140,58 @@ class Recipe(models.Model):
     public = models.BooleanField(default=True)
     comments = models.ManyToManyField(Comment, blank=True, related_name='recipe_comments')
     method_steps = models.ManyToManyField(MethodStep, blank=True, related_name='recipe_method_steps')
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored visibility so that saves can tell when it flips."""
+        instance = super().from_db(db, field_names, values)
+        instance._stored_public = instance.__dict__.get('public')
+        return instance
 
     def save(self, *args, **kwargs):
         """Save recipe and then automatically update generated allergen tags."""
+        visibility_changed = getattr(self, '_stored_public', self.public) != self.public
         super().save(*args, **kwargs)
+        self._stored_public = self.public
         self.update_tags()
+        if visibility_changed:
+            bump_ratings_version()
+
+    def delete(self, *args, **kwargs):
+        """Delete recipe and invalidate cached listings that may still show it."""
+        result = super().delete(*args, **kwargs)
+        bump_ratings_version()
+        return result
+
+    def apply_rating_change(self, sum_delta, count_delta):
+        """Adjust the stored rating aggregates in a single UPDATE and refresh them on this instance."""
+        Recipe.objects.filter(pk=self.pk).apply_rating_change(sum_delta, count_delta)
+        self.refresh_from_db(fields=['rating_sum', 'rating_count', 'average_rating'])
 
-    @property
-    def average_rating(self):
-        """Return the average rating for this recipe."""
-        ratings = self.rating_set.all()
-        if ratings.exists():
-            return sum(r.rating for r in ratings) / ratings.count()
-        return 0
-
-    @property
-    def rating_count(self):
-        """Return the number of ratings for this recipe."""
-        return self.rating_set.count()
-    
     def update_tags(self):
-        allergens = [
-            {
-            "category": "NT",
-            "tag_name": "Nut-free"
-            },
-            {
-            "category": "DR",
-            "tag_name": "Dairy-free"
-            },
-            {
-            "category": "GL",
-            "tag_name": "Gluten-free"
-            },
-            {
-            "category": "BT",
-            "tag_name": "Vegetarian"
-            }
-        ]
-        ingredients = self.recipeingredient_set.all()
-
-        for allergen in allergens:
-            contains_ingredient = ingredients.filter(ingredient__category=allergen["category"]).exists()
-            tag, _ = Tag.objects.get_or_create(name=allergen["tag_name"])
-
-            if contains_ingredient:
-                self.tags.remove(tag)
-            else:
-                self.tags.add(tag)
+        """
+        Give the recipe each allergen tag whose category none of its ingredients belong to.
+
+        The categories present are found in one query, and the tags are then
+        removed and added in bulk. Inside ``deferred_tag_updates`` the update
+        is put off until the block ends.
+        """
+        pending = _pending_tag_updates.get()
+        if pending is not None:
+            pending[self.pk] = self
+            return
 
+        allergen_tags = get_allergen_tags()
+        present = set(
+            self.recipeingredient_set.filter(ingredient__category__in=ALLERGEN_TAGS)
+            .values_list('ingredient__category', flat=True).distinct()
+        )
+        self.tags.remove(*[tag for category, tag in allergen_tags.items() if category in present])
+        self.tags.add(*[tag for category, tag in allergen_tags.items() if category not in present])
 
     def __str__(self):
         """Return the recipe title."""
@@ -1,7 +1,7 @@
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from libgravatar import Gravatar
+from recipes.avatars import avatar_url, gravatar_hash
 
 class User(AbstractUser):
     """Model used for user authentication, and team member related information."""
@@ -32,6 +32,7 @@ class User(AbstractUser):
         ]
     )
     following = models.ManyToManyField('self', symmetrical=False, related_name="followers", blank=True)
+    gravatar_hash = models.CharField(max_length=32, blank=True, editable=False, db_index=True)
 
 
     class Meta:
@@ -39,17 +40,33 @@ class User(AbstractUser):
 
         ordering = ['last_name', 'first_name']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the email the stored gravatar hash was made from."""
+
+        user = super().from_db(db, field_names, values)
+        user._hashed_email = user.__dict__.get('email')
+        return user
+
+    def save(self, *args, **kwargs):
+        """Save the user, hashing their email for their gravatar if it is new or has changed."""
+
+        if not self.gravatar_hash or self.email != getattr(self, '_hashed_email', None):
+            self.gravatar_hash = gravatar_hash(self.email)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'gravatar_hash'}
+        super().save(*args, **kwargs)
+        self._hashed_email = self.email
+
     def full_name(self):
         """Return a string containing the user's full name."""
 
         return f'{self.first_name} {self.last_name}'
 
     def gravatar(self, size=120):
-        """Return a URL to the user's gravatar."""
+        """Return a URL to the user's gravatar, or to its local copy when the avatar proxy is enabled."""
 
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        return avatar_url(self.gravatar_hash or gravatar_hash(self.email), size)
 
     def mini_gravatar(self):
         """Return a URL to a miniature version of the user's gravatar."""
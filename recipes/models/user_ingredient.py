@@ -1,10 +1,17 @@
 from django.db import models
 from .user import User
 from .unit import Unit
+from .ingredient import Ingredient, normalise_ingredient_name
 
 class UserIngredient(models.Model):
+    """An ingredient in a user's cupboard, linked to the shared ingredient of the same name when there is one."""
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    normalised_name = models.CharField(max_length=100, default='', editable=False)
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='cupboard_entries'
+    )
     NONE = "NN"
     VEGETABLE = "VG"
     SPICE = "SP"
@@ -50,5 +57,21 @@ class UserIngredient(models.Model):
     quantity = models.DecimalField(decimal_places=2, max_digits= 10)
     unit = models.ForeignKey(Unit, on_delete=models.CASCADE)
 
+    class Meta:
+        """Model options."""
+
+        indexes = [models.Index(fields=['user', 'normalised_name'])]
+
+    def save(self, *args, **kwargs):
+        """Save the cupboard ingredient, linking it to the shared ingredient its name matches."""
+
+        normalised_name = normalise_ingredient_name(self.name)
+        if normalised_name != self.normalised_name or self.ingredient_id is None:
+            self.normalised_name = normalised_name
+            self.ingredient = Ingredient.objects.filter(normalised_name=normalised_name).order_by('pk').first()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'normalised_name', 'ingredient'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return str(self.quantity) +  " " + str(self.unit) + " of " + self.name
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Keyset (cursor) pagination for recipe listings.
+
+Offset pagination has to count every matching row and then skip over all the
+rows before the requested page, so deep pages get slower as the catalogue
+grows. Keyset pagination instead remembers the sort value and id of the last
+row shown and asks for the rows that come after it, which costs the same on
+every page. The total shown next to the results is an estimate that is
+cached for a short while rather than counted on every request.
+"""
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_PAGE_SIZE = 12
+CURSOR_SALT = 'recipes.pagination.cursor'
+COUNT_ESTIMATE_TIMEOUT = 60
+
+# Maps each supported order_by value to the field it sorts on and whether it sorts descending.
+CURSOR_ORDERINGS = {
+    '': ('id', False),
+    'id': ('id', False),
+    '-id': ('id', True),
+    'created_at': ('created_at', False),
+    '-created_at': ('created_at', True),
+    'rating': ('average_rating', True),
+    '-rating': ('average_rating', False),
+    'favourites': ('fav_count', True),
+    '-favourites': ('fav_count', False),
+}
+
+
+class CursorPage:
+    """A page of results along with the cursors of its neighbouring pages."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, estimated_count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.estimated_count = estimated_count
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def supports_cursor_pagination(order_by):
+    """Return True if results in the given order can be paginated by cursor."""
+    return order_by in CURSOR_ORDERINGS
+
+
+def encode_cursor(order_by, direction, recipe, field):
+    """Return an opaque, signed token pointing before or after the given recipe."""
+    value = getattr(recipe, field)
+    if field == 'created_at':
+        value = value.isoformat()
+    return signing.dumps({'o': order_by, 'd': direction, 'v': value, 'id': recipe.id}, salt=CURSOR_SALT)
+
+
+def decode_cursor(token, order_by):
+    """
+    Return the payload of a cursor token, or None if it is missing or invalid.
+
+    Tokens issued for a different ordering are treated as invalid, so that
+    changing the ordering starts again from the first page.
+    """
+    if not token:
+        return None
+    try:
+        cursor = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if cursor.get('o') != order_by or cursor.get('d') not in ('next', 'previous'):
+        return None
+    if CURSOR_ORDERINGS[order_by][0] == 'created_at':
+        cursor['v'] = parse_datetime(cursor['v'])
+    return cursor
+
+
+def seek_filter(field, descending, value, last_id, backwards=False):
+    """Return the condition selecting rows that come after (or before) (value, last_id) in the given order."""
+    if backwards:
+        descending = not descending
+    id_lookup = 'id__lt' if backwards else 'id__gt'
+    if field == 'id':
+        return Q(id__lt=last_id) if descending else Q(id__gt=last_id)
+    lookup = 'lt' if descending else 'gt'
+    return Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, id_lookup: last_id})
+
+
+def get_ordering(field, descending):
+    """Return the order_by arguments for the given sort field, tie-broken by id."""
+    if field == 'id':
+        return ['-id' if descending else 'id']
+    return [f'-{field}' if descending else field, 'id']
+
+
+def reverse_ordering(ordering):
+    return [term[1:] if term.startswith('-') else f'-{term}' for term in ordering]
+
+
+def paginate_by_cursor(qs, order_by, token, per_page=CURSOR_PAGE_SIZE):
+    """
+    Return the page of the queryset identified by a cursor token.
+
+    Fetches one row more than the page size to find out whether a further
+    page exists. Pages before a cursor are fetched in reverse order and then
+    flipped back.
+    """
+    field, descending = CURSOR_ORDERINGS[order_by]
+    ordering = get_ordering(field, descending)
+    cursor = decode_cursor(token, order_by)
+    backwards = cursor is not None and cursor['d'] == 'previous'
+
+    if cursor is None:
+        rows = list(qs.order_by(*ordering)[:per_page + 1])
+    elif backwards:
+        before = seek_filter(field, descending, cursor['v'], cursor['id'], backwards=True)
+        rows = list(qs.filter(before).order_by(*reverse_ordering(ordering))[:per_page + 1])
+    else:
+        rows = list(qs.filter(seek_filter(field, descending, cursor['v'], cursor['id'])).order_by(*ordering)[:per_page + 1])
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    has_next = (has_more or backwards) and bool(rows)
+    has_previous = (has_more if backwards else cursor is not None) and bool(rows)
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(order_by, 'next', rows[-1], field) if has_next else None,
+        previous_cursor=encode_cursor(order_by, 'previous', rows[0], field) if has_previous else None,
+    )
+
+
+def get_count_estimate(qs, key):
+    """
+    Return a cached estimate of the number of rows in the queryset.
+
+    The rows are counted with a single COUNT when nothing is cached under
+    the key, and the result is then reused for ``COUNT_ESTIMATE_TIMEOUT``
+    seconds, so most requests do not count at all and the estimate is never
+    more than that far behind.
+    """
+    count = cache.get(key)
+    if count is None:
+        count = qs.order_by().count()
+        cache.set(key, count, COUNT_ESTIMATE_TIMEOUT)
+    return count
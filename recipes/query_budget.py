@@ -0,0 +1,175 @@
+"""
+Per-request database and template instrumentation.
+
+``QueryBudgetMiddleware`` records, for every request, the number of SQL
+queries run, the time spent in the database, the queries that were run more
+than once with the same shape (usually an N+1 in a loop) and the time spent
+rendering templates. The numbers are written to the ``recipes.query_budget``
+logger, which the settings send to a rotating log file. With the
+``QUERY_BUDGET_SERVER_TIMING`` setting, which defaults to ``DEBUG``, they are
+also returned to the browser in a ``Server-Timing`` header.
+
+Views are given a maximum number of queries in the ``QUERY_BUDGETS`` setting,
+keyed by URL name. Going over budget is logged as a warning, or raises
+``QueryBudgetExceeded`` when ``QUERY_BUDGET_ENFORCE`` is set, which is how the
+test suite fails on views that have grown new queries. The queries run while
+a streaming response is iterated, such as a downloaded shopping list, count
+towards the view's budget too, and are checked once the last chunk is sent.
+
+Template render time is measured by ``DjangoTemplates``, a drop-in
+replacement for Django's own template backend.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connection
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger('recipes.query_budget')
+
+_current_metrics = ContextVar('recipes_request_metrics', default=None)
+
+IN_CLAUSE = re.compile(r'\bIN \((?:%s, )*%s\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view runs more queries than its budget allows and budgets are enforced."""
+
+
+class RequestMetrics:
+    """The queries and template rendering recorded while handling one request."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.fingerprints = Counter()
+        self._template_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper that times and fingerprints every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicate_queries(self):
+        """Return (fingerprint, count) pairs for queries run more than once, most repeated first."""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+    def server_timing(self, total_time):
+        """Return the value of the Server-Timing header for these metrics."""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ])
+
+
+def fingerprint(sql):
+    """Return the shape of a query, with literal numbers and IN lists of any length collapsed."""
+    return NUMBER.sub('N', IN_CLAUSE.sub('IN (...)', sql))
+
+
+def get_query_budget(url_name):
+    """Return the maximum number of queries allowed for a URL name, or None if it has no budget."""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+
+
+class QueryBudgetMiddleware:
+    """Record query and template metrics for each request and check them against the view's budget."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(metrics.record_query):
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+
+        if getattr(settings, 'QUERY_BUDGET_SERVER_TIMING', settings.DEBUG):
+            response['Server-Timing'] = metrics.server_timing(time.perf_counter() - start)
+        response.query_metrics = metrics
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.record_streaming(request, response, response.streaming_content, metrics, start)
+        else:
+            self.finish(request, response, metrics, start)
+        return response
+
+    def record_streaming(self, request, response, content, metrics, start):
+        """Yield the chunks of a streaming response, counting the queries run to produce them."""
+        with connection.execute_wrapper(metrics.record_query):
+            yield from content
+        self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        """Log the request's metrics and check them against the view's budget."""
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        log_metrics(request, response, url_name, metrics, time.perf_counter() - start)
+        check_query_budget(url_name, metrics)
+
+
+def log_metrics(request, response, url_name, metrics, total_time):
+    duplicates = metrics.duplicate_queries()
+    logger.info(
+        '%s %s view=%s status=%s queries=%d db=%.1fms templates=%.1fms total=%.1fms duplicates=%d',
+        request.method, request.path, url_name, response.status_code, metrics.query_count,
+        metrics.db_time * 1000, metrics.template_time * 1000, total_time * 1000, len(duplicates)
+    )
+    for sql, count in duplicates:
+        logger.debug('  %dx %s', count, sql)
+
+
+def check_query_budget(url_name, metrics):
+    budget = get_query_budget(url_name)
+    if budget is None or metrics.query_count <= budget:
+        return
+    message = f"View '{url_name}' ran {metrics.query_count} queries, over its budget of {budget}."
+    if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class Template(django_backend.Template):
+    """Django template that adds its render time to the current request's metrics."""
+
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+
+        # Only the outermost render is timed, so nested renders are not counted twice.
+        metrics._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics._template_depth -= 1
+            if metrics._template_depth == 0:
+                metrics.template_time += time.perf_counter() - start
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Django's template backend, with template render time recorded per request."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
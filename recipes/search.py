@@ -0,0 +1,176 @@
+"""
+Full-text search index for recipes.
+
+Each recipe has one document in the ``recipes_recipe_search`` table made up
+of its title, description, ingredient names and method text. On SQLite the
+table is an FTS5 virtual table ranked with ``bm25``; on PostgreSQL it holds a
+weighted ``tsvector`` behind a GIN index ranked with ``ts_rank``. Other
+database backends have no index, and callers fall back to a plain title
+search.
+
+The index is kept up to date by the signal handlers in ``recipes.signals``.
+"""
+
+import re
+from django.db import connection
+from django.db.models import F, FloatField, Func
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'recipes_recipe_search'
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+# Relative weight of the title, description, ingredients and method columns.
+SQLITE_COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+
+def is_search_available():
+    """Return True if the current database backend has a search index."""
+    return connection.vendor in SUPPORTED_VENDORS
+
+
+def build_document(recipe):
+    """Return the title, description, ingredient and method text indexed for a recipe."""
+    ingredients = recipe.recipeingredient_set.values_list('ingredient__name', flat=True)
+    method = recipe.method_steps.values_list('method_text', flat=True)
+    return (recipe.title, recipe.description, ' '.join(ingredients), ' '.join(method))
+
+
+def index_recipe(recipe):
+    """Insert or replace the search document of a recipe."""
+    if not is_search_available():
+        return
+    document = build_document(recipe)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [recipe.pk])
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, ingredients, method) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [recipe.pk, *document]
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (recipe_id, document) VALUES (%s, "
+                "setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'C') || "
+                "setweight(to_tsvector('simple', %s), 'D')) "
+                "ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document",
+                [recipe.pk, *document]
+            )
+
+
+def index_recipe_range(first_id, last_id):
+    """
+    Insert or replace the search documents of every recipe with an id in the given range, in one statement.
+
+    Used after recipes are loaded in bulk, which skips the signal handlers
+    that index recipes one at a time.
+    """
+    if not is_search_available():
+        return
+    ingredients = (
+        "SELECT {aggregate} FROM recipes_recipeingredient ri "
+        "JOIN recipes_ingredient i ON i.id = ri.ingredient_id WHERE ri.recipe_id = r.id"
+    )
+    method = (
+        "SELECT {aggregate} FROM recipes_recipe_method_steps rm "
+        "JOIN recipes_methodstep m ON m.id = rm.methodstep_id WHERE rm.recipe_id = r.id"
+    )
+    aggregate = 'group_concat' if connection.vendor == 'sqlite' else 'string_agg'
+    ingredient_names = ingredients.format(aggregate=f"{aggregate}(i.name, ' ')")
+    method_text = method.format(aggregate=f"{aggregate}(m.method_text, ' ')")
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid BETWEEN %s AND %s", [first_id, last_id])
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, ingredients, method) "
+                "SELECT r.id, r.title, r.description, "
+                f"COALESCE(({ingredient_names}), ''), "
+                f"COALESCE(({method_text}), '') "
+                "FROM recipes_recipe r WHERE r.id BETWEEN %s AND %s",
+                [first_id, last_id]
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (recipe_id, document) "
+                "SELECT r.id, "
+                "setweight(to_tsvector('simple', r.title), 'A') || "
+                "setweight(to_tsvector('simple', r.description), 'B') || "
+                f"setweight(to_tsvector('simple', COALESCE(({ingredient_names}), '')), 'C') || "
+                f"setweight(to_tsvector('simple', COALESCE(({method_text}), '')), 'D') "
+                "FROM recipes_recipe r WHERE r.id BETWEEN %s AND %s "
+                "ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document",
+                [first_id, last_id]
+            )
+
+
+def remove_recipe(recipe_id):
+    """Remove the search document of a recipe."""
+    if not is_search_available():
+        return
+    column = 'rowid' if connection.vendor == 'sqlite' else 'recipe_id'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {column} = %s", [recipe_id])
+
+
+def tokenize(search_val):
+    """Split free text into lower case word tokens that are safe to embed in a match expression."""
+    return re.findall(r'\w+', search_val.lower())
+
+
+class SearchRank(Func):
+    """
+    The rank of the search document of the recipe in each row, looked up in a subquery.
+
+    The subquery is keyed by the row's own ``pk`` column, which is resolved
+    like any other field, so the rank stays correct when the query set is
+    joined, aliased or used as a subquery itself.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, rank_sql, params):
+        super().__init__(F('pk'))
+        self.rank_sql = rank_sql
+        self.rank_params = params
+
+    def as_sql(self, compiler, connection, **extra_context):
+        pk_sql, pk_params = compiler.compile(self.source_expressions[0])
+        return f"({self.rank_sql.format(pk=pk_sql)})", [*self.rank_params, *pk_params]
+
+
+def search_recipes(recipes, search_val):
+    """
+    Return the recipes in a query set matching every word of the search, annotated with their ``search_rank``.
+
+    Each word also matches as a prefix, so "tom" finds "tomato", and a higher
+    rank is more relevant. The index is queried in subqueries of the query
+    set's own SQL, so whatever the query set already filters on, such as
+    visibility, applies to every match rather than to a shortlist. The rank
+    is only looked up for recipes that matched. Returns None when the backend
+    has no search index or the search contains no words, in which case
+    callers should fall back to a plain title search.
+    """
+    tokens = tokenize(search_val)
+    if not tokens or not is_search_available():
+        return None
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        weights = ', '.join(str(weight) for weight in SQLITE_COLUMN_WEIGHTS)
+        matching = RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match])
+        # bm25 scores better matches lower, so it is negated to sort like ts_rank.
+        rank = SearchRank(
+            f"SELECT -bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {{pk}}",
+            [match]
+        )
+    else:
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        matching = RawSQL(f"SELECT recipe_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)", [query])
+        rank = SearchRank(
+            f"SELECT ts_rank(document, to_tsquery('simple', %s)) FROM {SEARCH_TABLE} WHERE recipe_id = {{pk}}",
+            [query]
+        )
+    return recipes.filter(pk__in=matching).annotate(search_rank=rank)
@@ -0,0 +1,488 @@
+"""
+Bulk generation of large synthetic datasets for load testing.
+
+``seed_at_scale`` fills the database with ``scale`` users and, in proportion,
+recipes with their ingredients and allergen tags, comments, ratings and
+follows. Rows are built in memory and written with ``bulk_create`` in
+batches, every user gets the same precomputed password hash, and no row is
+read back: primary keys are handed out from the current maximum id of each
+table, so related rows can refer to them straight away.
+
+Rows are generated in blocks of ``SEED_BLOCK_SIZE``. Each block gets its own
+Faker and random number generator, seeded from the run's seed, the table and
+the block number, and every row's id follows from its position, so the same
+seed always produces the same data however the work is batched or split
+between processes.
+
+With several workers the blocks are generated in a process pool. On
+PostgreSQL, which takes concurrent writers, each worker writes its own
+blocks; on other backends the rows are streamed back to the main process,
+which writes them in order. Either way every block of one table is written
+before the next table starts, so foreign keys always point at rows that
+exist: users, then recipes with their ingredients, then comments, ratings
+and follows.
+
+Recipes are stamped with the time they are written, as ``created_at`` is
+set on insert; everything else is fixed by the seed.
+
+Bulk inserts skip ``save()`` and signals, so the rating aggregates, comment
+counts, allergen tags and search index that those would maintain are written
+directly or rebuilt in bulk once everything is loaded.
+"""
+
+import random
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+
+import django
+from django.apps import apps
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from faker import Faker
+from faker_food.dish_descriptions import dish_descriptions
+from faker_food.dishes import dishes
+
+from recipes.avatars import gravatar_hash
+from recipes.management.commands.rebuild_rating_aggregates import rebuild_rating_aggregates
+from recipes.models import (User, Recipe, RecipeIngredient, Ingredient, Unit, Comment, Rating, get_allergen_tags,
+                            normalise_ingredient_name)
+from recipes.search import index_recipe_range
+from recipes.vocabulary import ingredient_vocabulary, unit_vocabulary
+
+DEFAULT_SEED = 2025
+DEFAULT_BATCH_SIZE = 5000
+SEED_BLOCK_SIZE = 1000
+# Blocks handed to the worker pool ahead of the ones being written, per worker.
+BLOCKS_IN_FLIGHT_PER_WORKER = 4
+
+# Shape of the generated data, relative to the number of users.
+USERS_PER_RECIPE = 2
+INGREDIENTS_PER_RECIPE = 5
+COMMENTS_PER_RECIPE = 3
+RATINGS_PER_USER = 5
+FOLLOWS_PER_USER = 10
+PUBLIC_RECIPE_RATIO = 0.9
+
+# Generated dates fall in the five years before this, so they do not depend on when the seed runs.
+SEED_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SEED_DATE_RANGE = timedelta(days=5 * 365)
+
+unit_fixtures = [
+    {'name': 'kilograms', 'symbol': 'kgs'},
+    {'name': 'pounds', 'symbol': 'lbs'},
+    {'name': 'teaspoons', 'symbol': 'tsps'},
+    {'name': 'tablespoons', 'symbol': 'tbsps'},
+    {'name': 'litres', 'symbol': 'ltrs'},
+    {'name': 'millilitres', 'symbol': 'mls'},
+    {'name': 'grams', 'symbol': 'gs'},
+    {'name': 'units', 'symbol': 'units'},
+]
+
+ingredient_fixtures = [
+    ('beef', Ingredient.BUTCHERY), ('potato', Ingredient.VEGETABLE), ('rice', Ingredient.GRAINS),
+    ('chicken', Ingredient.BUTCHERY), ('pork', Ingredient.BUTCHERY), ('lamb', Ingredient.BUTCHERY),
+    ('onions', Ingredient.ALLUM), ('garlic', Ingredient.ALLUM), ('flour', Ingredient.MINERALS),
+    ('salt', Ingredient.MINERALS), ('sugar', Ingredient.MINERALS), ('pepper', Ingredient.SPICE),
+    ('cinnamon', Ingredient.SPICE), ('pistachio', Ingredient.NUT), ('almond', Ingredient.NUT),
+    ('lentil', Ingredient.PULSES), ('water', Ingredient.WATER), ('milk', Ingredient.DAIRY),
+    ('tomato', Ingredient.VEGETABLE), ('carrot', Ingredient.VEGETABLE), ('celery', Ingredient.VEGETABLE),
+    ('bell pepper', Ingredient.VEGETABLE), ('mushroom', Ingredient.VEGETABLE), ('spinach', Ingredient.VEGETABLE),
+    ('courgette', Ingredient.VEGETABLE), ('aubergine', Ingredient.VEGETABLE), ('shallot', Ingredient.ALLUM),
+    ('leek', Ingredient.ALLUM), ('basil', Ingredient.HERBS), ('parsley', Ingredient.HERBS),
+    ('coriander', Ingredient.HERBS), ('thyme', Ingredient.HERBS), ('rosemary', Ingredient.HERBS),
+    ('dill', Ingredient.HERBS), ('cumin', Ingredient.SPICE), ('turmeric', Ingredient.SPICE),
+    ('paprika', Ingredient.SPICE), ('chili powder', Ingredient.SPICE), ('nutmeg', Ingredient.SPICE),
+    ('cardamom', Ingredient.SPICE), ('salmon', Ingredient.SEAFOOD), ('shrimp', Ingredient.SEAFOOD),
+    ('tuna', Ingredient.SEAFOOD), ('egg', Ingredient.EGG), ('butter', Ingredient.DAIRY),
+    ('cream', Ingredient.DAIRY), ('yogurt', Ingredient.DAIRY), ('cheese', Ingredient.DAIRY),
+    ('pasta', Ingredient.GLUTEN), ('bread', Ingredient.GLUTEN), ('quinoa', Ingredient.GRAINS),
+    ('chickpeas', Ingredient.PULSES), ('beans', Ingredient.PULSES), ('baking powder', Ingredient.MINERALS),
+    ('baking soda', Ingredient.MINERALS), ('strawberry', Ingredient.FRUIT), ('banana', Ingredient.FRUIT),
+    ('lemon', Ingredient.FRUIT), ('orange', Ingredient.FRUIT), ('apple', Ingredient.FRUIT),
+    ('blueberry', Ingredient.FRUIT), ('honey', Ingredient.MINERALS), ('maple syrup', Ingredient.MINERALS),
+    ('chocolate', Ingredient.MINERALS), ('cocoa powder', Ingredient.SPICE), ('vanilla', Ingredient.SPICE),
+]
+
+
+def create_units(owner):
+    """Create the standard units that do not exist yet, owned by the given user."""
+    existing = {unit.name for unit in unit_vocabulary.all()}
+    Unit.objects.bulk_create([Unit(user=owner, **unit) for unit in unit_fixtures if unit['name'] not in existing])
+    unit_vocabulary.invalidate()
+
+
+def create_ingredients(owner):
+    """Create the standard ingredients that do not exist yet, owned by the given user."""
+    existing = {ingredient.name for ingredient in ingredient_vocabulary.all()}
+    Ingredient.objects.bulk_create([
+        Ingredient(user=owner, name=name, normalised_name=normalise_ingredient_name(name), category=category)
+        for name, category in ingredient_fixtures if name not in existing
+    ])
+    ingredient_vocabulary.invalidate()
+
+
+def next_id(model):
+    """Return the first primary key after every existing row of a model."""
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def seeded_models():
+    """Return every model that seeding at scale writes rows of."""
+    return [
+        User, Recipe, RecipeIngredient, Recipe.tags.through, Comment, Recipe.comments.through,
+        Rating, User.following.through,
+    ]
+
+
+class SeedPlan:
+    """
+    The sizes, seed and starting ids of one scaled seeding run.
+
+    Everything a block of rows is generated from lives here, so that any
+    block can be generated on its own.
+    """
+
+    def __init__(self, scale, password, seed=DEFAULT_SEED):
+        self.seed = seed
+        self.user_count = scale
+        self.recipe_count = max(scale // USERS_PER_RECIPE, 1)
+        self.comments_per_recipe = COMMENTS_PER_RECIPE
+        self.ratings_per_user = min(RATINGS_PER_USER, self.recipe_count)
+        self.follows_per_user = min(FOLLOWS_PER_USER, scale - 1)
+        # The salt comes from the seed too, so the hash is the same on every run with that seed.
+        self.password_hash = make_password(password, salt=sha256(f'seed:{seed}'.encode()).hexdigest()[:32])
+
+        self.unit_ids = [unit.pk for unit in unit_vocabulary.all()]
+        self.ingredients = [(ingredient.pk, ingredient.category) for ingredient in ingredient_vocabulary.all()]
+        self.ingredients_per_recipe = min(INGREDIENTS_PER_RECIPE, len(self.ingredients))
+        self.allergen_tag_ids = {category: tag.pk for category, tag in get_allergen_tags().items()}
+        self.first_ids = {model._meta.label: next_id(model) for model in seeded_models()}
+
+    def row_id(self, model, index, per_parent=1, position=0):
+        """
+        Return the id of a generated row from its position.
+
+        Rows that come in groups of up to per_parent per parent row, such as
+        the ratings of a user, are numbered by the parent's index and their
+        position within the group.
+        """
+        return self.first_ids[model._meta.label] + index * per_parent + position
+
+    def user_id(self, index):
+        return self.row_id(User, index)
+
+    def recipe_id(self, index):
+        return self.row_id(Recipe, index)
+
+    def block_count(self, row_count):
+        return (row_count + SEED_BLOCK_SIZE - 1) // SEED_BLOCK_SIZE
+
+    def block_range(self, block, row_count):
+        """Return the range of row indexes in a block of a table with row_count rows."""
+        return range(block * SEED_BLOCK_SIZE, min((block + 1) * SEED_BLOCK_SIZE, row_count))
+
+    def block_seed(self, table, block):
+        return f'{self.seed}:{table}:{block}'
+
+
+_faker = None
+
+
+def get_faker(seed):
+    """Return this process's Faker, reseeded with the given seed."""
+    global _faker
+    if _faker is None:
+        _faker = Faker('en_GB')
+    _faker.seed_instance(seed)
+    return _faker
+
+
+def random_date(rng):
+    return SEED_EPOCH - timedelta(seconds=rng.randrange(int(SEED_DATE_RANGE.total_seconds())))
+
+
+def generate_users(plan, block):
+    """Return the users in a block, each with the shared password hash."""
+    seed = plan.block_seed('users', block)
+    faker = get_faker(seed)
+    rng = random.Random(seed)
+    users = []
+    for index in plan.block_range(block, plan.user_count):
+        user_id = plan.user_id(index)
+        first_name = faker.first_name()
+        last_name = faker.last_name()
+        handle = re.sub(r'\W', '', f'{first_name}{last_name}'.lower())[:20]
+        email = f'{handle}.{user_id}@example.org'
+        users.append(User(
+            id=user_id,
+            username=f'@{handle}{user_id}',
+            email=email,
+            gravatar_hash=gravatar_hash(email),
+            first_name=first_name,
+            last_name=last_name,
+            password=plan.password_hash,
+            date_joined=random_date(rng),
+        ))
+    return [(User, users)]
+
+
+def generate_recipes(plan, block):
+    """Return the recipes in a block along with their ingredients and allergen tag links."""
+    # faker_food picks from the global random module, so dishes are picked from its lists here instead.
+    rng = random.Random(plan.block_seed('recipes', block))
+    recipes, recipe_ingredients, tag_links = [], [], []
+    for index in plan.block_range(block, plan.recipe_count):
+        recipe_id = plan.recipe_id(index)
+        user_id = plan.user_id(rng.randrange(plan.user_count))
+        recipes.append(Recipe(
+            id=recipe_id,
+            user_id=user_id,
+            title=rng.choice(dishes)[:100],
+            description=rng.choice(dish_descriptions),
+            public=rng.random() < PUBLIC_RECIPE_RATIO,
+            comment_count=plan.comments_per_recipe,
+        ))
+        ingredients = rng.sample(plan.ingredients, plan.ingredients_per_recipe)
+        recipe_ingredients.extend(
+            RecipeIngredient(
+                id=plan.row_id(RecipeIngredient, index, plan.ingredients_per_recipe, position),
+                user_id=user_id,
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                unit_id=rng.choice(plan.unit_ids),
+                quantity=rng.randint(1, 500),
+            )
+            for position, (ingredient_id, _) in enumerate(ingredients)
+        )
+        categories = {category for _, category in ingredients}
+        tag_links.extend(
+            Recipe.tags.through(
+                id=plan.row_id(Recipe.tags.through, index, len(plan.allergen_tag_ids), position),
+                recipe_id=recipe_id,
+                tag_id=tag_id,
+            )
+            for position, (category, tag_id) in enumerate(plan.allergen_tag_ids.items())
+            if category not in categories
+        )
+    return [(Recipe, recipes), (RecipeIngredient, recipe_ingredients), (Recipe.tags.through, tag_links)]
+
+
+def generate_comments(plan, block):
+    """Return the comments on the recipes in a block, and the links attaching them."""
+    seed = plan.block_seed('comments', block)
+    faker = get_faker(seed)
+    rng = random.Random(seed)
+    comments, links = [], []
+    for index in plan.block_range(block, plan.recipe_count):
+        for position in range(plan.comments_per_recipe):
+            comment_id = plan.row_id(Comment, index, plan.comments_per_recipe, position)
+            comments.append(Comment(
+                id=comment_id,
+                user_id=plan.user_id(rng.randrange(plan.user_count)),
+                comment=faker.sentence(nb_words=8)[:500],
+                date_published=random_date(rng),
+            ))
+            links.append(Recipe.comments.through(
+                id=plan.row_id(Recipe.comments.through, index, plan.comments_per_recipe, position),
+                recipe_id=plan.recipe_id(index),
+                comment_id=comment_id,
+            ))
+    return [(Comment, comments), (Recipe.comments.through, links)]
+
+
+def generate_ratings(plan, block):
+    """Return the ratings given by the users in a block, each to different recipes."""
+    rng = random.Random(plan.block_seed('ratings', block))
+    ratings = []
+    for index in plan.block_range(block, plan.user_count):
+        recipe_indexes = rng.sample(range(plan.recipe_count), plan.ratings_per_user)
+        for position, recipe_index in enumerate(recipe_indexes):
+            ratings.append(Rating(
+                id=plan.row_id(Rating, index, plan.ratings_per_user, position),
+                user_id=plan.user_id(index),
+                recipe_id=plan.recipe_id(recipe_index),
+                rating=rng.randint(1, 5),
+            ))
+    return [(Rating, ratings)]
+
+
+def generate_follows(plan, block):
+    """Return the follow links of the users in a block, each to different other users."""
+    rng = random.Random(plan.block_seed('follows', block))
+    follows = []
+    for index in plan.block_range(block, plan.user_count):
+        offsets = rng.sample(range(plan.user_count - 1), plan.follows_per_user)
+        for position, offset in enumerate(offsets):
+            followed = (index + 1 + offset) % plan.user_count
+            follows.append(User.following.through(
+                id=plan.row_id(User.following.through, index, plan.follows_per_user, position),
+                from_user_id=plan.user_id(index),
+                to_user_id=plan.user_id(followed),
+            ))
+    return [(User.following.through, follows)]
+
+
+# Tables in the order they must be written, so every foreign key points at rows that already exist.
+SEED_TABLES = [
+    ('users', 'user_count', generate_users),
+    ('recipes', 'recipe_count', generate_recipes),
+    ('comments', 'recipe_count', generate_comments),
+    ('ratings', 'user_count', generate_ratings),
+    ('follows', 'user_count', generate_follows),
+]
+SEED_GENERATORS = {table: generate for table, _, generate in SEED_TABLES}
+
+
+class BulkWriter:
+    """
+    Collects generated rows per model and writes them with bulk_create once enough have built up.
+
+    Rows come either as model instances or, from worker processes, as a
+    model label with tuples of column values. Counts of rows written are
+    kept by label.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = {}
+        self.pending_count = 0
+        self.written = {}
+
+    def add(self, generated):
+        for model, rows in generated:
+            if isinstance(model, str):
+                model = apps.get_model(model)
+                rows = [model(*values) for values in rows]
+            self.pending.setdefault(model, []).extend(rows)
+            self.pending_count += len(rows)
+        if self.pending_count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with transaction.atomic():
+            for model, rows in self.pending.items():
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+                self.count({model._meta.label: len(rows)})
+        self.pending = {}
+        self.pending_count = 0
+
+    def count(self, written):
+        """Add counts of rows written elsewhere, keyed by model label."""
+        for label, rows in written.items():
+            self.written[label] = self.written.get(label, 0) + rows
+
+
+def supports_concurrent_writers():
+    """Return True if worker processes can write to the database at the same time."""
+    return connection.vendor == 'postgresql'
+
+
+def generate_block(plan, table, block):
+    """
+    Generate one block of a table in a worker process, ready to be sent back.
+
+    Each model is given by its label and each row as a tuple of its column
+    values, which are far cheaper to pass between processes than model
+    instances.
+    """
+    generated = []
+    for model, rows in SEED_GENERATORS[table](plan, block):
+        attnames = [field.attname for field in model._meta.concrete_fields]
+        generated.append((model._meta.label, [tuple(getattr(row, name) for name in attnames) for row in rows]))
+    return generated
+
+
+def write_block(plan, table, block, batch_size):
+    """Generate and write one block of a table in a worker process, and return the counts written."""
+    writer = BulkWriter(batch_size)
+    writer.add(SEED_GENERATORS[table](plan, block))
+    writer.flush()
+    return writer.written
+
+
+def map_in_order(pool, function, argument_lists, window):
+    """
+    Like ``pool.map``, but with at most window calls in flight.
+
+    Results are yielded in order as soon as they are ready, without the
+    results of the whole table piling up in memory behind a slow writer.
+    """
+    pending = deque()
+    for arguments in argument_lists:
+        pending.append(pool.submit(function, *arguments))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def start_worker_pool(workers, direct_writes):
+    """
+    Start a pool of worker processes that can use the ORM.
+
+    When the workers write to the database, this process's connections are
+    closed first so that no worker inherits an open one; each opens its own.
+    Workers that only generate rows never touch the database.
+    """
+    if direct_writes:
+        connections.close_all()
+    return ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+
+
+def reset_sequences(models):
+    """Move the id sequences of the given models past the ids that were written explicitly."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def finish_seeding(plan):
+    """Rebuild what bulk inserts skipped: sequences, rating aggregates and the search index."""
+    reset_sequences(seeded_models())
+    first_recipe_id, last_recipe_id = plan.recipe_id(0), plan.recipe_id(plan.recipe_count - 1)
+    rebuild_rating_aggregates(Recipe.objects.filter(pk__range=(first_recipe_id, last_recipe_id)))
+    index_recipe_range(first_recipe_id, last_recipe_id)
+
+
+def seed_at_scale(scale, password, seed=DEFAULT_SEED, batch_size=DEFAULT_BATCH_SIZE, workers=1, report=None):
+    """
+    Generate a synthetic dataset of ``scale`` users, all with the given password, and write it in bulk.
+
+    The recipes use the units and ingredients that already exist, so those
+    must be created first. With more than one worker the rows are generated
+    in a process pool. ``report`` is called with a progress message after
+    each table. Returns a dict of the number of rows written per model label.
+    """
+    plan = SeedPlan(scale, password, seed=seed)
+    writer = BulkWriter(batch_size)
+    direct_writes = workers > 1 and supports_concurrent_writers()
+    pool = start_worker_pool(workers, direct_writes) if workers > 1 else None
+    try:
+        for table, count_attribute, generate in SEED_TABLES:
+            blocks = range(plan.block_count(getattr(plan, count_attribute)))
+            if pool is None:
+                for block in blocks:
+                    writer.add(generate(plan, block))
+            elif direct_writes:
+                arguments = ((plan, table, block, batch_size) for block in blocks)
+                for written in map_in_order(pool, write_block, arguments, workers * BLOCKS_IN_FLIGHT_PER_WORKER):
+                    writer.count(written)
+            else:
+                arguments = ((plan, table, block) for block in blocks)
+                for generated in map_in_order(pool, generate_block, arguments, workers * BLOCKS_IN_FLIGHT_PER_WORKER):
+                    writer.add(generated)
+            writer.flush()
+            if report:
+                report(f"Seeded {table}.")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    finish_seeding(plan)
+    return writer.written
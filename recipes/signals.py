@@ -0,0 +1,128 @@
+"""
+Signal handlers that keep the recipe search index in step with the models it
+is built from, the in-process vocabularies in step with their tables, the
+cached cupboards in step with their rows, and the stored rating aggregates in
+step with the ratings of deleted users.
+"""
+
+from django.core.signals import request_started, request_finished
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from .cupboard import invalidate_cupboard
+from .models import Rating, Recipe, User, RecipeIngredient, MethodStep, Tag, Unit, Ingredient, UserIngredient
+from .search import index_recipe, remove_recipe
+from . import vocabulary
+from .vocabulary import tag_vocabulary, unit_vocabulary, ingredient_vocabulary
+
+
+@receiver(post_save, sender=Recipe)
+def index_saved_recipe(sender, instance, **kwargs):
+    """Reindex a recipe whenever it is saved."""
+    index_recipe(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_deleted_recipe(sender, instance, **kwargs):
+    """Drop a deleted recipe from the search index."""
+    remove_recipe(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def remove_ratings_of_deleted_user(sender, instance, **kwargs):
+    """
+    Take a deleted user's ratings out of the rating aggregates of other users' recipes.
+
+    The ratings themselves are deleted along with the user without being
+    loaded, and the user's own recipes go with them, so only the recipes
+    that stay behind are updated, once each.
+    """
+    Rating.objects.filter(user=instance).exclude(recipe__user=instance).remove_from_aggregates()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def index_recipe_of_ingredient(sender, instance, **kwargs):
+    """Reindex the recipe whose ingredients changed."""
+    recipe = Recipe.objects.filter(pk=instance.recipe_id).first()
+    if recipe is not None:
+        index_recipe(recipe)
+
+
+@receiver(m2m_changed, sender=Recipe.method_steps.through)
+def index_recipe_of_method_steps(sender, instance, action, reverse, pk_set, **kwargs):
+    """Reindex the recipes whose method steps were added, removed or cleared."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        index_recipe(instance)
+    elif pk_set:
+        for recipe in Recipe.objects.filter(pk__in=pk_set):
+            index_recipe(recipe)
+
+
+@receiver(post_save, sender=MethodStep)
+def index_recipes_of_method_step(sender, instance, created, **kwargs):
+    """Reindex the recipes using a method step when its text is edited."""
+    if not created:
+        for recipe in instance.recipe_method_steps.all():
+            index_recipe(recipe)
+
+
+@receiver(request_started)
+def begin_vocabulary_checks(sender, **kwargs):
+    """Have the vocabularies check their versions once during each request."""
+    vocabulary.begin_request()
+
+
+@receiver(request_finished)
+def end_vocabulary_checks(sender, **kwargs):
+    """Go back to checking vocabulary versions on every lookup once a request has finished."""
+    vocabulary.end_request()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_vocabulary(sender, **kwargs):
+    """Reload the tag vocabulary after a tag is saved or deleted."""
+    tag_vocabulary.invalidate()
+
+
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+def invalidate_unit_vocabulary(sender, **kwargs):
+    """Reload the unit vocabulary after a unit is saved or deleted."""
+    unit_vocabulary.invalidate()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_vocabulary(sender, **kwargs):
+    """Reload the ingredient vocabulary after an ingredient is saved or deleted."""
+    ingredient_vocabulary.invalidate()
+
+
+@receiver(post_save, sender=Ingredient)
+def link_cupboard_entries(sender, instance, created, **kwargs):
+    """Link cupboard ingredients with the same name to a newly created ingredient."""
+    if not created:
+        return
+    entries = UserIngredient.objects.filter(ingredient=None, normalised_name=instance.normalised_name)
+    user_ids = set(entries.values_list('user_id', flat=True))
+    if user_ids:
+        entries.update(ingredient=instance)
+        invalidate_cupboard(*user_ids)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def unlink_cupboard_entries(sender, instance, **kwargs):
+    """Drop the cached cupboards whose ingredients are about to be unlinked from a deleted ingredient."""
+    user_ids = set(instance.cupboard_entries.values_list('user_id', flat=True))
+    if user_ids:
+        invalidate_cupboard(*user_ids)
+
+
+@receiver(post_save, sender=UserIngredient)
+@receiver(post_delete, sender=UserIngredient)
+def invalidate_user_cupboard(sender, instance, **kwargs):
+    """Drop a user's cached cupboard after one of their ingredients is added, changed or deleted."""
+    invalidate_cupboard(instance.user_id)
@@ -1,5 +1,6 @@
 from django.urls import reverse
 from django.test import TestCase
+from recipes.query_budget import get_query_budget
 
 def reverse_with_next(url_name, next_url):
     """Extended version of reverse to generate URLs with redirects"""
@@ -35,4 +36,18 @@ class MenuTesterMixin(TestCase):
         html = response.content.decode("utf-8")
 
         for url in self.menu_urls:
-            self.assertNotIn(f'<a href="{url}">', html)
\ No newline at end of file
+            self.assertNotIn(f'<a href="{url}">', html)
+
+class QueryBudgetTester:
+    """Class support checking the queries a view runs, as recorded by QueryBudgetMiddleware."""
+
+    def assert_within_query_budget(self, response, budget=None):
+        """Check that the view ran no more queries than the given budget, or its budget from settings."""
+        if budget is None:
+            budget = get_query_budget(response.resolver_match.url_name)
+        self.assertIsNotNone(budget, "The view has no query budget.")
+        self.assertLessEqual(response.query_metrics.query_count, budget)
+
+    def assert_no_duplicate_queries(self, response):
+        """Check that the view did not run any query more than once."""
+        self.assertEqual(response.query_metrics.duplicate_queries(), [])
@@ -0,0 +1,87 @@
+import datetime
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import make_aware
+from recipes.management.commands.collect_orphans import collect_method_steps
+from recipes.models import Recipe, Comment, MethodStep, User
+
+class CollectOrphansCommandTestCase(TestCase):
+    """Tests of the collect_orphans management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+        'recipes/tests/fixtures/default_recipe.json'
+    ]
+
+    def setUp(self):
+        self.recipe = Recipe.objects.get(pk=1)
+        self.user = User.objects.get(pk=2)
+
+        self.step = MethodStep.objects.create(step_number=1, method_text="Kept step")
+        self.recipe.method_steps.add(self.step)
+        self.comment = self.create_comment("kept comment")
+        self.recipe.comments.add(self.comment)
+        self.reply = self.create_comment("kept reply")
+        self.comment.replies.add(self.reply)
+
+        self.orphan_steps = [MethodStep.objects.create(step_number=i + 1, method_text="Orphan") for i in range(3)]
+        self.orphan_comment = self.create_comment("orphan comment")
+        self.orphan_reply = self.create_comment("orphan reply")
+        self.orphan_comment.replies.add(self.orphan_reply)
+        self.lone_reply = self.create_comment("reply whose parent was deleted")
+
+    def create_comment(self, text):
+        return Comment.objects.create(user=self.user, comment=text, date_published=make_aware(datetime.datetime(2025, 4, 1)))
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('collect_orphans', *args, stdout=out)
+        return out.getvalue()
+
+    def test_collect_deletes_only_orphans(self):
+        self.call()
+
+        self.assertEqual(list(MethodStep.objects.all()), [self.step])
+        self.assertEqual(set(Comment.objects.all()), {self.comment, self.reply})
+
+    def test_collect_reports_what_was_reclaimed(self):
+        output = self.call()
+        self.assertIn("Deleted 3 orphaned method steps, 2 orphaned comments and 1 replies.", output)
+
+    def test_dry_run_deletes_nothing(self):
+        output = self.call('--dry-run')
+
+        self.assertIn("Would delete 3 orphaned method steps, 2 orphaned comments and 1 replies.", output)
+        self.assertEqual(MethodStep.objects.count(), 4)
+        self.assertEqual(Comment.objects.count(), 5)
+
+    def test_collect_in_small_batches(self):
+        output = self.call('--batch-size', '1')
+
+        self.assertIn("Deleted 3 orphaned method steps, 2 orphaned comments and 1 replies.", output)
+        self.assertEqual(MethodStep.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_method_step_batches_take_a_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as few:
+            collect_method_steps(batch_size=100)
+
+        MethodStep.objects.bulk_create([MethodStep(step_number=1, method_text="Orphan") for _ in range(30)])
+        with self.assertNumQueries(len(few)):
+            self.assertEqual(collect_method_steps(batch_size=100), 30)
+
+    def test_collect_after_deleting_a_user(self):
+        User.objects.get(pk=1).delete()
+        self.call()
+
+        self.assertFalse(MethodStep.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_invalid_batch_size_is_rejected(self):
+        with self.assertRaises(CommandError):
+            self.call('--batch-size', '0')
@@ -0,0 +1,42 @@
+import datetime
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import make_aware
+from recipes.models import Recipe, Comment, User
+
+class RebuildCommentCountsCommandTestCase(TestCase):
+    """Tests of the rebuild_comment_counts management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+        'recipes/tests/fixtures/default_recipe.json'
+    ]
+
+    def setUp(self):
+        self.recipe = Recipe.objects.get(pk=1)
+        self.other_recipe = Recipe.objects.get(pk=2)
+        self.user = User.objects.get(pk=2)
+
+    def create_comment(self, text):
+        return Comment.objects.create(user=self.user, comment=text, date_published=make_aware(datetime.datetime(2025, 4, 1)))
+
+    def test_rebuild_counts_comments_and_replies(self):
+        first = self.create_comment("first")
+        second = self.create_comment("second")
+        self.recipe.comments.add(first, second)
+        first.replies.add(self.create_comment("reply"), self.create_comment("another reply"))
+        Recipe.objects.filter(pk=self.other_recipe.pk).update(comment_count=5)
+
+        call_command('rebuild_comment_counts', stdout=StringIO())
+
+        self.recipe.refresh_from_db()
+        self.other_recipe.refresh_from_db()
+        self.assertEqual(self.recipe.comment_count, 4)
+        self.assertEqual(self.other_recipe.comment_count, 0)
+
+    def test_rebuild_reports_updated_recipes(self):
+        out = StringIO()
+        call_command('rebuild_comment_counts', stdout=out)
+        self.assertIn(f"{Recipe.objects.count()} recipes", out.getvalue())
@@ -0,0 +1,42 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Recipe, Rating, User
+
+class RebuildRatingAggregatesCommandTestCase(TestCase):
+    """Tests of the rebuild_rating_aggregates management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+        'recipes/tests/fixtures/default_recipe.json'
+    ]
+
+    def setUp(self):
+        self.recipe = Recipe.objects.get(pk=1)
+        self.other_recipe = Recipe.objects.get(pk=2)
+        self.user = User.objects.get(pk=2)
+        self.user2 = User.objects.get(pk=3)
+
+    def test_rebuild_corrects_stale_aggregates(self):
+        Rating.objects.bulk_create([
+            Rating(user=self.user, recipe=self.recipe, rating=5),
+            Rating(user=self.user2, recipe=self.recipe, rating=2),
+        ])
+        Recipe.objects.filter(pk=self.other_recipe.pk).update(rating_sum=9, rating_count=3, average_rating=3.0)
+
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+
+        self.recipe.refresh_from_db()
+        self.other_recipe.refresh_from_db()
+        self.assertEqual(self.recipe.rating_sum, 7)
+        self.assertEqual(self.recipe.rating_count, 2)
+        self.assertAlmostEqual(self.recipe.average_rating, 3.5)
+        self.assertEqual(self.other_recipe.rating_sum, 0)
+        self.assertEqual(self.other_recipe.rating_count, 0)
+        self.assertEqual(self.other_recipe.average_rating, 0)
+
+    def test_rebuild_reports_updated_recipes(self):
+        out = StringIO()
+        call_command('rebuild_rating_aggregates', stdout=out)
+        self.assertIn(f"{Recipe.objects.count()} recipes", out.getvalue())
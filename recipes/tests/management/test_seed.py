@@ -0,0 +1,130 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test import TestCase
+from recipes.models import User, Recipe, RecipeIngredient, Rating, Comment, ALLERGEN_TAGS
+from recipes.search import search_recipes
+from recipes.seeding import (SeedPlan, generate_users, generate_recipes, create_units, create_ingredients,
+                             RATINGS_PER_USER, FOLLOWS_PER_USER, COMMENTS_PER_RECIPE, INGREDIENTS_PER_RECIPE)
+
+class SeedAtScaleCommandTestCase(TestCase):
+    """Tests of the seed management command's --scale option."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+        'recipes/tests/fixtures/default_recipe.json'
+    ]
+
+    SCALE = 40
+
+    def seed(self, **options):
+        out = StringIO()
+        call_command('seed', scale=self.SCALE, batch_size=100, stdout=out, **options)
+        return out.getvalue()
+
+    def test_scale_creates_rows_in_proportion(self):
+        users_before = User.objects.count()
+        recipes_before = Recipe.objects.count()
+        recipe_ingredients_before = RecipeIngredient.objects.count()
+        output = self.seed()
+
+        recipe_count = self.SCALE // 2
+        self.assertEqual(User.objects.count(), users_before + self.SCALE)
+        self.assertEqual(Recipe.objects.count(), recipes_before + recipe_count)
+        self.assertEqual(Rating.objects.count(), self.SCALE * RATINGS_PER_USER)
+        self.assertEqual(User.following.through.objects.count(), self.SCALE * FOLLOWS_PER_USER)
+        self.assertEqual(Comment.objects.count(), recipe_count * COMMENTS_PER_RECIPE)
+        self.assertEqual(RecipeIngredient.objects.count(), recipe_ingredients_before + recipe_count * INGREDIENTS_PER_RECIPE)
+        self.assertIn(f"for {self.SCALE} users", output)
+
+    def test_users_share_the_default_password(self):
+        self.seed()
+        user = User.objects.order_by('-pk').first()
+        self.assertTrue(user.check_password('Password123'))
+        self.assertEqual(User.objects.filter(password=user.password).count(), self.SCALE)
+
+    def test_nobody_follows_themselves(self):
+        self.seed()
+        follows = User.following.through.objects.all()
+        self.assertFalse([follow for follow in follows if follow.from_user_id == follow.to_user_id])
+
+    def test_rating_aggregates_and_comment_counts_match_the_rows(self):
+        self.seed()
+        for recipe in Recipe.objects.filter(rating_count__gt=0).annotate(
+            ratings_total=Count('rating', distinct=True), comments_total=Count('comments', distinct=True)
+        ):
+            ratings = list(recipe.rating_set.values_list('rating', flat=True))
+            self.assertEqual(recipe.rating_count, recipe.ratings_total)
+            self.assertAlmostEqual(recipe.average_rating, sum(ratings) / len(ratings))
+            self.assertEqual(recipe.comment_count, recipe.comments_total)
+
+    def test_allergen_tags_match_the_ingredients(self):
+        self.seed()
+        recipe = Recipe.objects.order_by('-pk').first()
+        categories = set(recipe.recipeingredient_set.values_list('ingredient__category', flat=True))
+        expected = {name for category, name in ALLERGEN_TAGS.items() if category not in categories}
+        self.assertEqual(set(recipe.tags.values_list('name', flat=True)), expected)
+
+    def test_seeded_recipes_are_searchable(self):
+        self.seed()
+        recipe = Recipe.objects.order_by('-pk').first()
+        result = search_recipes(Recipe.objects.all(), recipe.title)
+        if result is not None:
+            self.assertIn(recipe, result)
+
+    def test_rows_can_be_created_normally_afterwards(self):
+        self.seed()
+        user = User.objects.create(username='@afterseed', email='after.seed@example.org')
+        self.assertGreater(user.pk, User.objects.exclude(pk=user.pk).order_by('-pk').first().pk)
+
+    def test_same_seed_generates_the_same_rows(self):
+        owner = User.objects.get(pk=1)
+        create_units(owner)
+        create_ingredients(owner)
+        first = SeedPlan(self.SCALE, 'Password123', seed=3)
+        second = SeedPlan(self.SCALE, 'Password123', seed=3)
+        other = SeedPlan(self.SCALE, 'Password123', seed=4)
+        users = lambda plan: [user.username for _, rows in generate_users(plan, 0) for user in rows]
+        recipes = lambda plan: [(row.title, row.user_id) for row in generate_recipes(plan, 0)[0][1]]
+        self.assertEqual(users(first), users(second))
+        self.assertEqual(recipes(first), recipes(second))
+        self.assertNotEqual(users(first), users(other))
+
+    def test_data_is_the_same_whatever_the_number_of_workers(self):
+        single = self.seeded_rows(workers=1)
+        pooled = self.seeded_rows(workers=3)
+        self.assertEqual(single, pooled)
+
+    def test_every_row_has_the_id_of_its_position(self):
+        self.seed(workers=2)
+        ratings = Rating.objects.order_by('pk')
+        self.assertEqual(ratings.last().pk - ratings.first().pk + 1, ratings.count())
+
+    def seeded_rows(self, **options):
+        """Seed inside a transaction that is rolled back, and return the rows written."""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.seed(**options)
+                rows = [
+                    list(model.objects.order_by('pk').values_list())
+                    for model in (User, RecipeIngredient, Recipe.tags.through, Comment, Rating, User.following.through)
+                ]
+                # created_at is stamped on insert, so it is the only column left out.
+                rows.append(list(Recipe.objects.order_by('pk').values_list('id', 'user_id', 'title', 'public', 'average_rating')))
+                raise RuntimeError
+        return rows
+
+    def test_scale_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command('seed', scale=0, stdout=StringIO())
+
+    def test_batch_size_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command('seed', scale=10, batch_size=0, stdout=StringIO())
+
+    def test_workers_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command('seed', scale=10, workers=0, stdout=StringIO())
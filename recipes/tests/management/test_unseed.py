@@ -0,0 +1,90 @@
+from io import StringIO
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.management.commands.unseed import deletion_order
+from recipes.models import User, Recipe, RecipeIngredient, Rating, Ingredient, UserIngredient, Unit, Tag, Comment, MethodStep
+from recipes.search import SEARCH_TABLE, is_search_available
+from recipes.vocabulary import tag_vocabulary, unit_vocabulary
+
+class UnseedCommandTestCase(TestCase):
+    """Tests of the unseed management command."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+        'recipes/tests/fixtures/default_tags.json',
+        'recipes/tests/fixtures/default_units.json',
+        'recipes/tests/fixtures/default_ingredients.json',
+        'recipes/tests/fixtures/default_recipe.json'
+    ]
+
+    def setUp(self):
+        self.staff = User.objects.get(pk=1)
+        self.staff.is_staff = True
+        self.staff.save()
+        self.staff.user_permissions.add(Permission.objects.first())
+        self.user = User.objects.get(pk=2)
+        self.recipe = Recipe.objects.get(pk=1)
+        Rating.objects.create(user=self.user, recipe=self.recipe, rating=4)
+        UserIngredient.objects.create(user=self.user, name="Flour", category='VG', quantity=500, unit=Unit.objects.first())
+        self.user.following.add(self.staff)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('unseed', *args, stdout=out)
+        return out.getvalue()
+
+    def assert_data_removed(self):
+        for model in (Recipe, RecipeIngredient, Rating, Ingredient, UserIngredient, Unit, Tag, Comment, MethodStep,
+                      Recipe.tags.through, User.following.through):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+    def test_unseed_removes_every_row(self):
+        output = self.call()
+        self.assert_data_removed()
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(User.user_permissions.through.objects.exists())
+        self.assertIn("Emptied", output)
+
+    def test_keep_staff_keeps_staff_users_and_their_permissions(self):
+        self.user.user_permissions.add(Permission.objects.first())
+        output = self.call('--keep-staff')
+        self.assert_data_removed()
+        self.assertEqual(list(User.objects.all()), [self.staff])
+        self.assertEqual(self.staff.user_permissions.count(), 1)
+        self.assertEqual(User.user_permissions.through.objects.count(), 1)
+        self.assertIn("Kept 1 staff users", output)
+
+    def test_removed_recipes_are_dropped_from_the_search_index(self):
+        self.call()
+        if is_search_available():
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+                self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_vocabularies_forget_the_removed_rows(self):
+        self.assertTrue(tag_vocabulary.all())
+        self.assertTrue(unit_vocabulary.all())
+        self.call()
+        self.assertEqual(tag_vocabulary.all(), [])
+        self.assertEqual(unit_vocabulary.all(), [])
+
+    def test_rows_are_not_loaded_before_deleting(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.call()
+        self.assertFalse([query['sql'] for query in queries if query['sql'].startswith('SELECT')])
+
+    def test_ids_restart_after_unseeding(self):
+        self.call()
+        user = User.objects.create(username='@fresh', email='fresh@example.org')
+        self.assertEqual(user.pk, 1)
+
+    def test_tables_are_ordered_children_first(self):
+        order = deletion_order([User, Recipe, RecipeIngredient, Ingredient])
+        self.assertLess(order.index(RecipeIngredient), order.index(Recipe))
+        self.assertLess(order.index(RecipeIngredient), order.index(Ingredient))
+        self.assertLess(order.index(Recipe), order.index(User))
+        self.assertLess(order.index(Ingredient), order.index(User))
@@ -42,6 +42,27 @@ class CommentModelTestCase(TestCase):
 		self.comment.user = None
 		self._assert_comment_is_invalid()
 
+	def test_delete_with_replies_deletes_comments_replies_and_links(self):
+		reply = Comment.objects.create(user=self.user, comment="reply", date_published=self.date_published)
+		self.comment.replies.add(reply)
+		other = Comment.objects.create(user=self.user, comment="other", date_published=self.date_published)
+		other_reply = Comment.objects.create(user=self.user, comment="other reply", date_published=self.date_published)
+		other.replies.add(other_reply)
+
+		deleted = Comment.objects.filter(pk=self.comment.pk).delete_with_replies()
+
+		self.assertEqual(deleted, 2)
+		self.assertEqual(list(Comment.objects.all()), [other, other_reply])
+		self.assertEqual(Comment.replies.through.objects.count(), 1)
+
+	def test_delete_with_replies_uses_fixed_number_of_queries(self):
+		for i in range(30):
+			reply = Comment.objects.create(user=self.user, comment=f"reply {i}", date_published=self.date_published)
+			self.comment.replies.add(reply)
+		with self.assertNumQueries(8):
+			Comment.objects.filter(pk=self.comment.pk).delete_with_replies()
+		self.assertFalse(Comment.objects.exists())
+
 	def _assert_comment_is_valid(self):
 		try:
 			self.comment.full_clean()
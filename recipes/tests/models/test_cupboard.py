@@ -0,0 +1,99 @@
+"""Unit tests of the per-user cupboard cache and ingredient name matching."""
+from django.core.cache import cache
+from django.test import TestCase
+from recipes.cupboard import get_cupboard, invalidate_all_cupboards
+from recipes.models import User, Unit, Ingredient, UserIngredient, normalise_ingredient_name
+
+class CupboardTestCase(TestCase):
+    """Unit tests of recipes.cupboard and the links between cupboard and shared ingredients."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+        'recipes/tests/fixtures/default_units.json',
+        'recipes/tests/fixtures/default_ingredients.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(pk=1)
+        self.other_user = User.objects.get(pk=2)
+        self.unit = Unit.objects.get(pk=1)
+
+    def add(self, name, user=None):
+        return UserIngredient.objects.create(user=user or self.user, name=name, quantity=1, unit=self.unit)
+
+    def cached_cupboard(self, user=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return get_cupboard(user or self.user)
+
+    def test_names_are_normalised(self):
+        self.assertEqual(normalise_ingredient_name('  Cherry   TOMATOES '), 'cherry tomato')
+        self.assertEqual(normalise_ingredient_name('Peaches'), 'peach')
+        self.assertEqual(normalise_ingredient_name('Berries'), 'berry')
+        self.assertEqual(normalise_ingredient_name('Asparagus'), 'asparagus')
+        self.assertEqual(normalise_ingredient_name('Peas'), 'pea')
+
+    def test_irregular_plurals_are_normalised(self):
+        self.assertEqual(normalise_ingredient_name('Apple Pies'), 'apple pie')
+        self.assertEqual(normalise_ingredient_name('pie'), 'pie')
+        self.assertEqual(normalise_ingredient_name('Cookies'), 'cookie')
+        self.assertEqual(normalise_ingredient_name('cookie'), 'cookie')
+        self.assertEqual(normalise_ingredient_name('Molasses'), 'molasses')
+        self.assertEqual(normalise_ingredient_name('Bay Leaves'), 'bay leaf')
+        self.assertEqual(normalise_ingredient_name('Glasses'), 'glass')
+
+    def test_cupboard_ingredient_is_linked_to_the_shared_ingredient(self):
+        entry = self.add('tomatoes')
+        self.assertEqual(entry.ingredient, Ingredient.objects.get(name='Tomato'))
+
+    def test_cupboard_ingredient_with_an_irregular_plural_is_linked(self):
+        cookie = Ingredient.objects.create(user=self.other_user, name='Cookie')
+        self.assertEqual(self.add('cookies').ingredient, cookie)
+        self.assertIsNone(self.add('Cooky').ingredient)
+
+    def test_new_ingredient_links_existing_cupboard_ingredients(self):
+        entry = self.add('Carrots')
+        self.assertIsNone(entry.ingredient)
+        carrot = Ingredient.objects.create(user=self.user, name='Carrot')
+        entry.refresh_from_db()
+        self.assertEqual(entry.ingredient, carrot)
+
+    def test_cupboard_only_has_the_users_ingredients(self):
+        self.add('Tomato')
+        self.add('Beef', user=self.other_user)
+        self.assertEqual([entry.name for entry in self.cached_cupboard()], ['Tomato'])
+
+    def test_cupboard_is_served_from_the_cache(self):
+        self.add('Tomato')
+        self.cached_cupboard()
+        with self.assertNumQueries(0):
+            cupboard = get_cupboard(self.user)
+            self.assertEqual(cupboard[0].unit, self.unit)
+
+    def test_cache_is_invalidated_on_add_and_delete(self):
+        entry = self.add('Tomato')
+        self.cached_cupboard()
+        self.add('Beef')
+        self.assertEqual(len(self.cached_cupboard()), 2)
+        entry.delete()
+        self.assertEqual([entry.name for entry in self.cached_cupboard()], ['Beef'])
+
+    def test_other_users_caches_are_kept(self):
+        self.add('Tomato', user=self.other_user)
+        self.cached_cupboard(self.other_user)
+        self.add('Beef')
+        with self.assertNumQueries(0):
+            get_cupboard(self.other_user)
+
+    def test_invalidate_all_cupboards(self):
+        self.add('Tomato')
+        self.cached_cupboard()
+        invalidate_all_cupboards()
+        with self.assertNumQueries(1):
+            get_cupboard(self.user)
+
+    def test_nothing_is_cached_from_a_rolled_back_transaction(self):
+        get_cupboard(self.user)
+        with self.assertNumQueries(1):
+            get_cupboard(self.user)
@@ -1,4 +1,5 @@
-from recipes.models import MethodStep, User
+from recipes.models import MethodStep, Recipe, User
+from recipes.search import search_recipes
 from django.test import TestCase
 from django.core.exceptions import ValidationError
 
@@ -48,6 +49,18 @@ class MethodStepModelTestCase(TestCase):
 		self.method_step.step_number = 'x' * 300
 		self._assert_method_step_is_invalid()
 
+	def test_deleting_method_steps_reindexes_their_recipes(self):
+		recipe = Recipe.objects.create(user=self.user, title="Stew", description="desc")
+		recipe.method_steps.add(MethodStep.objects.create(step_number=1, method_text="Add the saffron"))
+		recipe.method_steps.add(self.method_step)
+		self.assertEqual(list(search_recipes(Recipe.objects.all(), "saffron")), [recipe])
+
+		MethodStep.objects.filter(method_text="Add the saffron").delete()
+		self.assertEqual(list(search_recipes(Recipe.objects.all(), "saffron")), [])
+
+		self.method_step.delete()
+		self.assertEqual(list(search_recipes(Recipe.objects.all(), "testing")), [])
+
 
 	def _assert_method_step_is_valid(self):
 		try:
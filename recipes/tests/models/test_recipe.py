@@ -1,7 +1,11 @@
 """Unit tests for the Recipe model."""
 
-from recipes.models import Recipe, User, Rating, Tag, Ingredient, RecipeIngredient, Unit
+from recipes.models import (Recipe, User, Rating, Tag, Ingredient, RecipeIngredient, Unit,
+                            deferred_tag_updates, get_allergen_tags)
+from recipes.caching import get_ratings_version
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 
 class RecipeModelTestCase(TestCase):
@@ -119,6 +123,168 @@ class RecipeModelTestCase(TestCase):
         self.assertEqual(count-1,len(recipe.recipeingredient_set.all()))
         self.assertIn(dairy_free_tag, recipe.tags.all())    
 
+    def test_tag_updates_deferred_until_end_of_block(self):
+        recipe = Recipe.objects.create(title="new", user=self.user, description="desc")
+        dairy_free_tag = Tag.objects.get(name="Dairy-free")
+        gluten_free_tag = Tag.objects.get(name="Gluten-free")
+        unit = Unit.objects.create(user=self.user, name="grams", symbol="g")
+        with deferred_tag_updates():
+            for name, category in [("milk", "DR"), ("cheese", "DR"), ("bread", "GL")]:
+                ingredient = Ingredient.objects.create(user=self.user, name=name, category=category)
+                RecipeIngredient.objects.create(user=self.user, recipe=recipe, quantity=1, unit=unit, ingredient=ingredient)
+            self.assertIn(dairy_free_tag, recipe.tags.all())
+        self.assertNotIn(dairy_free_tag, recipe.tags.all())
+        self.assertNotIn(gluten_free_tag, recipe.tags.all())
+        self.assertIn(Tag.objects.get(name="Nut-free"), recipe.tags.all())
+
+    def test_tag_updates_run_once_per_recipe(self):
+        recipe = Recipe.objects.create(title="new", user=self.user, description="desc")
+        unit = Unit.objects.create(user=self.user, name="grams", symbol="g")
+        ingredient = Ingredient.objects.create(user=self.user, name="milk", category="DR")
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_tag_updates():
+                for quantity in range(1, 4):
+                    RecipeIngredient.objects.create(user=self.user, recipe=recipe, quantity=quantity, unit=unit, ingredient=ingredient)
+        category_queries = [query for query in queries if '"recipes_ingredient"."category" IN' in query['sql']]
+        self.assertEqual(len(category_queries), 1)
+
+    def test_tag_updates_dropped_when_block_raises(self):
+        recipe = Recipe.objects.create(title="new", user=self.user, description="desc")
+        dairy_free_tag = Tag.objects.get(name="Dairy-free")
+        unit = Unit.objects.create(user=self.user, name="grams", symbol="g")
+        ingredient = Ingredient.objects.create(user=self.user, name="milk", category="DR")
+        with self.assertRaises(ValueError):
+            with deferred_tag_updates():
+                RecipeIngredient.objects.create(user=self.user, recipe=recipe, quantity=1, unit=unit, ingredient=ingredient)
+                raise ValueError
+        self.assertIn(dairy_free_tag, recipe.tags.all())
+
+    def test_allergen_tags_looked_up_without_queries_once_created(self):
+        get_allergen_tags()
+        tags = get_allergen_tags()
+        self.assertEqual(tags["DR"], Tag.objects.get(name="Dairy-free"))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_allergen_tags(), tags)
+
+    def test_rating_aggregates_updated_on_rating_created(self):
+        user1 = User.objects.create(username="@Happy", email="happy@example.com")
+        Rating.objects.create(user=self.user, recipe=self.recipe, rating=4)
+        Rating.objects.create(user=user1, recipe=self.recipe, rating=1)
+
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.rating_sum, 5)
+        self.assertEqual(recipe.rating_count, 2)
+        self.assertAlmostEqual(recipe.average_rating, 2.5)
+
+    def test_rating_aggregates_updated_on_rating_changed(self):
+        Rating.objects.create(user=self.user, recipe=self.recipe, rating=2)
+        Rating.objects.update_or_create(user=self.user, recipe=self.recipe, defaults={'rating': 5})
+
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.rating_sum, 5)
+        self.assertEqual(recipe.rating_count, 1)
+        self.assertAlmostEqual(recipe.average_rating, 5.0)
+
+    def test_rating_aggregates_updated_on_rating_deleted(self):
+        rating = Rating.objects.create(user=self.user, recipe=self.recipe, rating=3)
+        Rating.objects.get(pk=rating.pk).delete()
+
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.rating_sum, 0)
+        self.assertEqual(recipe.rating_count, 0)
+        self.assertEqual(recipe.average_rating, 0)
+
+    def test_rating_aggregates_updated_when_ratings_deleted_in_bulk(self):
+        user1 = User.objects.create(username="@Happy", email="happy@example.com")
+        Rating.objects.create(user=self.user, recipe=self.recipe, rating=4)
+        Rating.objects.create(user=user1, recipe=self.recipe, rating=1)
+        Rating.objects.filter(rating=4).delete()
+
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.rating_sum, 1)
+        self.assertEqual(recipe.rating_count, 1)
+        self.assertAlmostEqual(recipe.average_rating, 1.0)
+
+    def test_rating_aggregates_updated_when_rater_deleted(self):
+        user1 = User.objects.create(username="@Happy", email="happy@example.com")
+        Rating.objects.create(user=self.user, recipe=self.recipe, rating=4)
+        Rating.objects.create(user=user1, recipe=self.recipe, rating=1)
+        user1.delete()
+
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        self.assertEqual(recipe.rating_sum, 4)
+        self.assertEqual(recipe.rating_count, 1)
+        self.assertAlmostEqual(recipe.average_rating, 4.0)
+
+    def test_deleting_a_recipe_does_not_update_it_once_per_rating(self):
+        def rated_recipe(number_of_ratings):
+            recipe = Recipe.objects.create(title="rated", user=self.user, description="desc")
+            for i in range(number_of_ratings):
+                rater = User.objects.create(username=f"@Rater{number_of_ratings}x{i}", email=f"rater{number_of_ratings}x{i}@example.com")
+                Rating.objects.create(user=rater, recipe=recipe, rating=3)
+            return recipe
+
+        few, many = rated_recipe(1), rated_recipe(10)
+        with CaptureQueriesContext(connection) as few_queries:
+            few.delete()
+        with CaptureQueriesContext(connection) as many_queries:
+            many.delete()
+
+        self.assertEqual(len(many_queries), len(few_queries))
+        self.assertFalse([query for query in many_queries if query['sql'].startswith('UPDATE "recipes_recipe"')])
+
+    def test_deleting_a_rater_updates_each_recipe_once(self):
+        other_recipe = Recipe.objects.create(title="other", user=User.objects.get(pk=1), description="desc")
+        rater = User.objects.create(username="@Happy", email="happy@example.com")
+        Rating.objects.create(user=rater, recipe=self.recipe, rating=2)
+        Rating.objects.create(user=rater, recipe=other_recipe, rating=5)
+        Rating.objects.create(user=self.user, recipe=other_recipe, rating=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            rater.delete()
+
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "recipes_recipe"')]
+        self.assertEqual(len(updates), 2)
+        other_recipe.refresh_from_db()
+        self.assertEqual((other_recipe.rating_sum, other_recipe.rating_count), (3, 1))
+
+    def test_saving_an_unchanged_rating_keeps_the_ratings_version(self):
+        rating = Rating.objects.create(user=self.user, recipe=self.recipe, rating=4)
+        version = get_ratings_version()
+        rating.save()
+        Rating.objects.update_or_create(user=self.user, recipe=self.recipe, defaults={'rating': 4})
+        self.assertEqual(get_ratings_version(), version)
+        rating.rating = 2
+        rating.save()
+        self.assertGreater(get_ratings_version(), version)
+
+    def test_visible_to_includes_public_own_and_followed_recipes(self):
+        follower = User.objects.create(username="@Follower", email="follower@example.com")
+        stranger = User.objects.create(username="@Stranger", email="stranger@example.com")
+        follower.following.add(self.user)
+        public_recipe = Recipe.objects.create(title="public", user=stranger, description="desc")
+        private_recipe = Recipe.objects.create(title="private", user=stranger, description="desc", public=False)
+        followed_recipe = Recipe.objects.create(title="followed", user=self.user, description="desc", public=False)
+        own_recipe = Recipe.objects.create(title="own", user=follower, description="desc", public=False)
+
+        visible = Recipe.objects.visible_to(follower)
+
+        self.assertIn(public_recipe, visible)
+        self.assertIn(followed_recipe, visible)
+        self.assertIn(own_recipe, visible)
+        self.assertNotIn(private_recipe, visible)
+
+    def test_visible_to_does_not_duplicate_recipes(self):
+        follower = User.objects.create(username="@Follower", email="follower@example.com")
+        other_follower = User.objects.create(username="@Other", email="other@example.com")
+        follower.following.add(self.user)
+        other_follower.following.add(self.user)
+
+        visible = Recipe.objects.visible_to(follower)
+
+        self.assertEqual(visible.count(), Recipe.objects.count())
+        self.assertNotIn('DISTINCT', str(visible.query))
+
     def _assert_recipe_is_valid(self):
         try:
             self.recipe.full_clean()
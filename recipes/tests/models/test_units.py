@@ -0,0 +1,42 @@
+"""Unit tests of the unit conversion table."""
+from decimal import Decimal
+from django.test import TestCase
+from recipes.models import Unit, User
+from recipes.units import MASS, VOLUME, COUNT, get_conversion, to_base, missing_quantities
+
+class UnitConversionTestCase(TestCase):
+    """Unit tests of recipes.units."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        user = User.objects.get(username='@johndoe')
+        self.grams = Unit(user=user, name='grams', symbol='gs')
+        self.kilograms = Unit(user=user, name='kilogram', symbol='kg')
+        self.pounds = Unit(user=user, name='pounds', symbol='lbs')
+        self.tablespoons = Unit(user=user, name='tablespoon', symbol='tbsp')
+        self.cups = Unit(user=user, name='Cups', symbol='C')
+        self.dozen = Unit(user=user, name='dozen', symbol='doz')
+        self.pinch = Unit(user=user, name='pinch', symbol='pinch')
+
+    def test_units_are_recognised_by_symbol_or_name(self):
+        self.assertEqual(get_conversion(self.kilograms), (MASS, Decimal(1000)))
+        self.assertEqual(get_conversion(self.tablespoons), (VOLUME, Decimal(15)))
+        self.assertEqual(get_conversion(self.cups), (VOLUME, Decimal(240)))
+        self.assertEqual(get_conversion(self.dozen), (COUNT, Decimal(12)))
+
+    def test_unknown_units_only_match_their_own_symbol(self):
+        other_pinch = Unit(user=self.pinch.user, name='a pinch', symbol='Pinch')
+        self.assertEqual(get_conversion(self.pinch), get_conversion(other_pinch))
+        self.assertNotEqual(get_conversion(self.pinch)[0], get_conversion(self.grams)[0])
+
+    def test_to_base_uses_decimal_factors(self):
+        self.assertEqual(to_base(2, self.pounds), (Decimal('907.184'), MASS))
+
+    def test_missing_quantities(self):
+        needed = [(2, self.kilograms), (1, self.kilograms), (3, self.tablespoons), (1, self.dozen), (2, self.pinch)]
+        available = [(500, self.grams), (3, self.pounds), (1, self.grams), (6, self.dozen), None]
+        self.assertEqual(
+            missing_quantities(needed, available),
+            [Decimal('1.5'), Decimal(0), Decimal(3), Decimal(0), Decimal(2)]
+        )
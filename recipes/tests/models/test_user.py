@@ -1,6 +1,9 @@
 """Unit tests for the User model."""
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from recipes.avatars import gravatar_hash
 from recipes.models import User
 
 class UserModelTestCase(TestCase):
@@ -143,6 +146,30 @@ class UserModelTestCase(TestCase):
         expected_gravatar_url = self._gravatar_url(size=60)
         self.assertEqual(actual_gravatar_url, expected_gravatar_url)
 
+    def test_gravatar_hash_is_stored_on_save(self):
+        self.user.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).gravatar_hash, self.GRAVATAR_URL.rsplit('/', 1)[1])
+
+    def test_gravatar_hash_is_recomputed_when_the_email_changes(self):
+        self.user.save()
+        self.user.email = 'JohnDoe@Example.com'
+        self.user.save(update_fields=['email'])
+        self.assertEqual(User.objects.get(pk=self.user.pk).gravatar_hash, gravatar_hash('johndoe@example.com'))
+
+    def test_gravatar_hash_is_kept_when_the_email_is_unchanged(self):
+        self.user.save()
+        user = User.objects.get(pk=self.user.pk)
+        with patch('recipes.models.user.gravatar_hash') as hash_email:
+            user.bio = 'New bio'
+            user.save()
+        hash_email.assert_not_called()
+
+    @override_settings(AVATAR_PROXY=True, AVATAR_SIZES=(60, 120))
+    def test_gravatar_uses_the_avatar_proxy_when_enabled(self):
+        self.user.save()
+        self.assertEqual(self.user.gravatar(), reverse('avatar', args=[self.user.gravatar_hash, 120]))
+        self.assertEqual(self.user.gravatar(size=100), self._gravatar_url(size=100))
+
     def test_bio_can_be_blank(self):
         self.user.bio = ""
         self._assert_user_is_valid()
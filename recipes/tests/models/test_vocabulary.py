@@ -0,0 +1,119 @@
+"""Unit tests for the in-process tag, unit and ingredient vocabularies."""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from recipes.forms import SearchRecipesForm
+from recipes.models import Tag, Unit, Ingredient, User, UserIngredient
+from recipes.vocabulary import (tag_vocabulary, unit_vocabulary, ingredient_vocabulary,
+                                attach_vocabulary, begin_request, end_request, Vocabulary)
+
+
+class VocabularyTestCase(TestCase):
+    """Unit tests for the in-process vocabularies."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/default_tags.json',
+        'recipes/tests/fixtures/default_units.json',
+        'recipes/tests/fixtures/default_ingredients.json',
+    ]
+
+    def test_lookups_cost_no_queries_once_loaded(self):
+        vegan = Tag.objects.get(pk=1)
+        tag_count = Tag.objects.count()
+        tag_vocabulary.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(tag_vocabulary.get(1), vegan)
+            self.assertEqual(tag_vocabulary.get_by_name("Vegan"), vegan)
+            self.assertEqual(len(tag_vocabulary.all()), tag_count)
+
+    def test_missing_rows_return_none(self):
+        self.assertIsNone(tag_vocabulary.get(999))
+        self.assertIsNone(tag_vocabulary.get_by_name("Missing"))
+
+    def test_saving_a_row_reloads_the_vocabulary(self):
+        tag_vocabulary.load()
+        tag = Tag.objects.create(name="Spicy")
+        self.assertEqual(tag_vocabulary.get_by_name("Spicy"), tag)
+
+    def test_deleting_a_row_reloads_the_vocabulary(self):
+        unit_vocabulary.load()
+        Unit.objects.get(pk=1).delete()
+        self.assertIsNone(unit_vocabulary.get(1))
+
+    def test_version_bump_from_another_process_reloads_the_vocabulary(self):
+        ingredient_vocabulary.load()
+        user = User.objects.get(pk=1)
+        Ingredient.objects.bulk_create([Ingredient(user=user, name="Saffron", category="SP")])
+        self.assertIsNone(ingredient_vocabulary.get_by_name("Saffron"))
+        ingredient_vocabulary.bump_version()
+        self.assertIsNotNone(ingredient_vocabulary.get_by_name("Saffron"))
+
+    def test_version_is_checked_once_per_request(self):
+        user = User.objects.get(pk=1)
+        begin_request()
+        try:
+            ingredient_vocabulary.load()
+            Ingredient.objects.bulk_create([Ingredient(user=user, name="Saffron", category="SP")])
+            ingredient_vocabulary.bump_version()
+            self.assertIsNone(ingredient_vocabulary.get_by_name("Saffron"))
+        finally:
+            end_request()
+        begin_request()
+        try:
+            self.assertIsNotNone(ingredient_vocabulary.get_by_name("Saffron"))
+        finally:
+            end_request()
+
+    def test_rows_beyond_the_limit_are_looked_up_in_the_database(self):
+        vocabulary = Vocabulary('recipes.Ingredient', max_rows=2)
+        ingredients = list(Ingredient.objects.order_by('pk'))
+        self.assertEqual(len(ingredients), 3)
+        vocabulary.load()
+        self.assertEqual(len(vocabulary.load().by_id), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(vocabulary.get(ingredients[0].pk), ingredients[0])
+        with self.assertNumQueries(1):
+            rows = vocabulary.get_many([ingredients[0].pk, ingredients[2].pk, 999])
+        self.assertEqual(rows, {ingredients[0].pk: ingredients[0], ingredients[2].pk: ingredients[2]})
+        self.assertEqual(vocabulary.get_by_name(ingredients[2].name), ingredients[2])
+        self.assertEqual(vocabulary.all(), ingredients)
+
+    def test_rows_rolled_back_are_forgotten(self):
+        vocabulary = Vocabulary('recipes.Tag')
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Tag.objects.create(name="Temporary")
+                self.assertIsNotNone(vocabulary.get_by_name("Temporary"))
+                raise RuntimeError
+        self.assertIsNone(vocabulary.get_by_name("Temporary"))
+
+    def test_version_is_shared_through_the_cache(self):
+        vocabulary = Vocabulary('recipes.Tag')
+        version = vocabulary.get_version()
+        vocabulary.bump_version()
+        self.assertEqual(cache.get(vocabulary.version_key), version + 1)
+
+    def test_attach_vocabulary_sets_foreign_keys_without_queries(self):
+        unit_vocabulary.load()
+        cupboard = [UserIngredient(unit_id=1, name="a"), UserIngredient(unit_id=999, name="b")]
+        with self.assertNumQueries(0):
+            attach_vocabulary(cupboard, 'unit', unit_vocabulary)
+            self.assertEqual(cupboard[0].unit, unit_vocabulary.get(1))
+        self.assertFalse(UserIngredient.unit.is_cached(cupboard[1]))
+
+    def test_search_form_validates_choices_from_the_vocabulary(self):
+        tag_vocabulary.load()
+        ingredient_vocabulary.load()
+        form = SearchRecipesForm(data={'tags': ['1', '2'], 'ingredients': ['3']})
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
+        self.assertEqual([tag.pk for tag in form.cleaned_data['tags']], [1, 2])
+        self.assertEqual(form.cleaned_data['ingredients'], [Ingredient.objects.get(pk=3)])
+
+    def test_search_form_rejects_unknown_choices(self):
+        form = SearchRecipesForm(data={'tags': ['999']})
+        self.assertFalse(form.is_valid())
+        form = SearchRecipesForm(data={'tags': ['x']})
+        self.assertFalse(form.is_valid())
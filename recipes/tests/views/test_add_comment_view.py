@@ -45,6 +45,17 @@ class AddCommentViewTestCase(TestCase):
 		expected_redirect_url = reverse("get_recipe",  kwargs={"recipe_id": f"{self.recipe1.pk}"})
 		self.assertRedirects(response, expected_redirect_url, status_code=302, target_status_code=200)
 	
+
+	def test_create_comment_increments_recipe_comment_count(self):
+		self.client.post(self.url, self.form_input)
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 1)
+
+	def test_create_comment_with_blank_text_keeps_recipe_comment_count(self):
+		self.client.post(self.url, {'comment': ''})
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 0)
+
 	def test_create_comment_with_blank_text(self):
 		self.form_input['comment'] = ''
 		before_comment_objects_count = Comment.objects.count()
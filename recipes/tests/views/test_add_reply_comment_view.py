@@ -53,6 +53,14 @@ class AddReplyCommentViewTestCase(TestCase):
 		self.assertRedirects(response, expected_redirect_url, status_code=302, target_status_code=200)
 
 	
+
+	def test_create_reply_comment_increments_recipe_comment_count(self):
+		self.recipe1.comments.add(self.parent_comment)
+		Recipe.objects.filter(pk=self.recipe1.pk).update(comment_count=1)
+		self.client.post(self.url, self.form_input)
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 2)
+
 	def test_create_reply_comment_with_blank_text(self):
 		self.form_input['comment'] = ''
 		self.assert_invalid_reply_comment_cannot_be_created()
@@ -0,0 +1,83 @@
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+from urllib.error import URLError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from recipes.avatars import avatar_path
+from recipes.models import User
+from recipes.tests.helpers import reverse_with_next
+
+def png_response(size=120):
+    image = BytesIO()
+    Image.new('RGB', (size, size), 'red').save(image, format='PNG')
+    image.seek(0)
+    return image
+
+class AvatarViewTestCase(TestCase):
+    """Tests of the avatar proxy view"""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings_override = override_settings(AVATAR_PROXY=True, AVATAR_SIZES=(60, 120), AVATAR_CACHE_DIR=self.cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.get(pk=1)
+        self.user.save()
+        self.client.login(username=self.user.username, password='Password123')
+        self.url = reverse('avatar', args=[self.user.gravatar_hash, 60])
+
+    def test_avatar_url(self):
+        self.assertEqual(self.url, f'/avatars/{self.user.gravatar_hash}/60.png')
+
+    def test_avatar_is_fetched_once_and_cached_at_every_size(self):
+        with patch('recipes.avatars.urlopen', return_value=png_response()) as fetch:
+            response = self.client.get(self.url)
+            self.client.get(reverse('avatar', args=[self.user.gravatar_hash, 120])).close()
+            self.client.get(self.url).close()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(Image.open(BytesIO(b''.join(response.streaming_content))).size, (60, 60))
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(avatar_path(self.user.gravatar_hash, 120).exists())
+
+    def test_avatar_has_long_lived_cache_headers(self):
+        with patch('recipes.avatars.urlopen', return_value=png_response()):
+            response = self.client.get(self.url)
+        response.close()
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_avatar_redirects_when_not_logged_in(self):
+        self.client.logout()
+        with patch('recipes.avatars.urlopen') as fetch:
+            response = self.client.get(self.url)
+        self.assertRedirects(response, reverse_with_next('log_in', self.url), status_code=302, target_status_code=200)
+        fetch.assert_not_called()
+
+    def test_unknown_hash_is_not_fetched(self):
+        with patch('recipes.avatars.urlopen') as fetch:
+            response = self.client.get(reverse('avatar', args=['0' * 32, 60]))
+        self.assertEqual(response.status_code, 404)
+        fetch.assert_not_called()
+
+    def test_size_must_be_proxied(self):
+        response = self.client.get(reverse('avatar', args=[self.user.gravatar_hash, 100]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_falls_back_to_gravatar_when_it_cannot_be_reached(self):
+        with patch('recipes.avatars.urlopen', side_effect=URLError('offline')):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, f'https://www.gravatar.com/avatar/{self.user.gravatar_hash}?size=60&default=mp')
+        self.assertFalse(avatar_path(self.user.gravatar_hash, 60).exists())
+
+    def test_not_found_when_proxy_is_disabled(self):
+        with override_settings(AVATAR_PROXY=False):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
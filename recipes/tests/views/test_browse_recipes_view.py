@@ -1,13 +1,18 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from recipes.forms import SearchRecipesForm
 from recipes.models import Recipe, User, Ingredient, Tag, RecipeIngredient, Unit
 
 from recipes.models import Recipe
-from recipes.models import User, Ingredient, Unit, RecipeIngredient, Tag
+from recipes.models import User, Ingredient, Unit, RecipeIngredient, Tag, UserIngredient
 
-from recipes.views import build_query_params
+from recipes.models import MethodStep
+from recipes.search import index_recipe_range, search_recipes
+from recipes.views import build_query_params, apply_filters, count_cache_key
 
 
 class BrowseRecipesTestCase(TestCase):
@@ -19,6 +24,7 @@ class BrowseRecipesTestCase(TestCase):
 		]
 
 	def setUp(self):
+		cache.clear()
 		self.user = User.objects.get(username='@johndoe')
 		self.client.login(username=self.user.username, password='Password123')
 		self.url = reverse("all_recipes")
@@ -271,4 +277,256 @@ class BrowseRecipesTestCase(TestCase):
 
 	def test_empty_params(self):
 		result=build_query_params(None,None,None,None)
-		self.assertEqual(result,"")
\ No newline at end of file
+		self.assertEqual(result,"")
+
+	def test_search_matches_description_ingredients_and_method(self):
+		by_description = Recipe.objects.create(user=self.user, title="Soup", description="Creamy pumpkin soup")
+		by_ingredient = Recipe.objects.create(user=self.user, title="Pie", description="desc")
+		pumpkin = Ingredient.objects.create(user=self.user, name="pumpkin")
+		RecipeIngredient.objects.create(user=self.user, recipe=by_ingredient, quantity=1, unit=self.unit, ingredient=pumpkin)
+		by_method = Recipe.objects.create(user=self.user, title="Bread", description="desc")
+		by_method.method_steps.add(MethodStep.objects.create(step_number=1, method_text="Roast the pumpkin seeds"))
+
+		response = self.client.get(self.url + "?search_val=pumpkin")
+
+		recipe_list = list(response.context['recipe_list'])
+		self.assertCountEqual(recipe_list, [by_description, by_ingredient, by_method])
+
+	def test_search_ranks_title_matches_first(self):
+		by_description = Recipe.objects.create(user=self.user, title="Soup", description="Served with lemon")
+		by_title = Recipe.objects.create(user=self.user, title="Lemon tart", description="desc")
+
+		response = self.client.get(self.url + "?search_val=lemon")
+
+		self.assertEqual(list(response.context['recipe_list']), [by_title, by_description])
+
+	def test_search_rank_follows_the_query_set_into_a_subquery(self):
+		by_description = Recipe.objects.create(user=self.user, title="Soup", description="Served with lemon")
+		by_title = Recipe.objects.create(user=self.user, title="Lemon tart", description="desc")
+
+		ranked = search_recipes(Recipe.objects.all(), "lemon").order_by('-search_rank', 'id')
+		best = Recipe.objects.filter(pk__in=ranked.values('pk')[:1])
+
+		self.assertEqual(list(best), [by_title])
+		self.assertNotIn(by_description, best)
+
+	def test_search_matches_word_prefixes(self):
+		recipe = Recipe.objects.create(user=self.user, title="Tomato soup", description="desc")
+
+		response = self.client.get(self.url + "?search_val=tom")
+
+		self.assertEqual(list(response.context['recipe_list']), [recipe])
+
+	def test_search_is_not_cut_short_by_recipes_the_user_cannot_see(self):
+		stranger = User.objects.create(username="@stranger", email="stranger@example.org")
+		hidden = Recipe.objects.bulk_create([
+			Recipe(user=stranger, title="Hidden curry", description="desc", public=False) for _ in range(600)
+		])
+		index_recipe_range(hidden[0].pk, hidden[-1].pk)
+		visible = Recipe.objects.create(user=self.user, title="Quick curry", description="desc")
+
+		response = self.client.get(self.url + "?search_val=curry")
+
+		self.assertEqual(list(response.context['recipe_list']), [visible])
+
+	def test_search_index_follows_edits_and_deletes(self):
+		recipe = Recipe.objects.create(user=self.user, title="Lasagne", description="desc")
+		recipe.title = "Moussaka"
+		recipe.save()
+
+		response = self.client.get(self.url + "?search_val=lasagne")
+		self.assertEqual(list(response.context['recipe_list']), [])
+
+		recipe.delete()
+		response = self.client.get(self.url + "?search_val=moussaka")
+		self.assertEqual(list(response.context['recipe_list']), [])
+
+	def test_tag_search_requires_every_selected_tag(self):
+		tag2 = Tag.objects.create(name="second_tag", colour='')
+		tag3 = Tag.objects.create(name="third_tag", colour='')
+		both_tags = Recipe.objects.create(user=self.user, title="Both", description="desc")
+		both_tags.tags.add(self.tag1, tag2)
+		one_tag = Recipe.objects.create(user=self.user, title="One", description="desc")
+		one_tag.tags.add(tag2, tag3)
+
+		response = self.client.get(self.url + f"?tags={self.tag1.id},{tag2.id}")
+
+		self.assertEqual(list(response.context['recipe_list']), [both_tags])
+
+	def test_tag_search_joins_tag_table_once(self):
+		tag_ids = [Tag.objects.create(name=f"tag_{i}", colour='').id for i in range(6)]
+
+		qs = apply_filters(Recipe.objects.all(), '', tag_ids, [], '')
+
+		sql = str(qs.query)
+		self.assertEqual(sql.count('"recipes_recipe_tags"'), 1)
+		self.assertIn('HAVING', sql)
+
+	def _walk_cursor_pages(self, order_by):
+		url = self.url + f"?pagination=cursor&order_by={order_by}"
+		pages = []
+		while url:
+			response = self.client.get(url)
+			page_obj = response.context['page_obj']
+			pages.append(list(page_obj))
+			url = self.url + "?" + page_obj.next_query if page_obj.has_next() else None
+		return pages
+
+	def test_cursor_pagination_walks_every_recipe_once(self):
+		for i in range(25):
+			recipe = Recipe.objects.create(user=self.user, title=f"Recipe {i}", description="desc")
+			Recipe.objects.filter(pk=recipe.pk).update(average_rating=i % 3)
+
+		for order_by in ['', '-created_at', 'created_at', 'rating', '-rating', 'favourites', '-favourites']:
+			pages = self._walk_cursor_pages(order_by)
+			recipes = [recipe for page in pages for recipe in page]
+			self.assertEqual(len(pages), 3)
+			self.assertCountEqual(recipes, Recipe.objects.all())
+
+	def test_cursor_pagination_matches_offset_ordering(self):
+		for i in range(15):
+			Recipe.objects.create(user=self.user, title=f"Recipe {i}", description="desc")
+
+		pages = self._walk_cursor_pages('-created_at')
+
+		response = self.client.get(self.url + "?order_by=-created_at")
+		self.assertEqual(pages[0], list(response.context['page_obj']))
+
+	def test_cursor_pagination_previous_page(self):
+		for i in range(15):
+			Recipe.objects.create(user=self.user, title=f"Recipe {i}", description="desc")
+		first_page = self.client.get(self.url + "?pagination=cursor").context['page_obj']
+		second_page = self.client.get(self.url + "?" + first_page.next_query).context['page_obj']
+
+		response = self.client.get(self.url + "?" + second_page.previous_query)
+
+		page_obj = response.context['page_obj']
+		self.assertEqual(list(page_obj), list(first_page))
+		self.assertFalse(page_obj.has_previous())
+		self.assertTrue(page_obj.has_next())
+
+	def test_invalid_cursor_starts_from_first_page(self):
+		response = self.client.get(self.url + "?pagination=cursor&cursor=not-a-cursor")
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(list(response.context['page_obj']), [self.recipe1, self.recipe2])
+
+	def test_cursor_pagination_count_estimate_is_cached(self):
+		response = self.client.get(self.url + "?pagination=cursor")
+		self.assertEqual(response.context['page_obj'].estimated_count, 2)
+
+		Recipe.objects.create(user=self.user, title="Another", description="desc")
+		response = self.client.get(self.url + "?pagination=cursor")
+		self.assertEqual(response.context['page_obj'].estimated_count, 2)
+
+	def test_expired_count_estimate_is_counted_again(self):
+		self.client.get(self.url + "?pagination=cursor")
+		Recipe.objects.create(user=self.user, title="Another", description="desc")
+		cache.delete(count_cache_key(self.user, '', [], []))
+
+		response = self.client.get(self.url + "?pagination=cursor")
+
+		self.assertEqual(response.context['page_obj'].estimated_count, 3)
+
+	def test_recipe_count_does_not_load_every_recipe(self):
+		for i in range(20):
+			Recipe.objects.create(user=self.user, title=f"Recipe {i}", description="desc")
+
+		response = self.client.get(self.url)
+
+		self.assertIsNone(response.context['recipe_list']._result_cache)
+		self.assertContains(response, f"{Recipe.objects.count()} recipes")
+
+	def test_recipe_cards_use_fixed_number_of_queries(self):
+		with CaptureQueriesContext(connection) as few_cards:
+			self.client.get(self.url)
+
+		other_user = User.objects.get(username='@janedoe')
+		for i in range(10):
+			recipe = Recipe.objects.create(user=other_user, title=f"Recipe {i}", description="desc")
+			recipe.tags.add(self.tag1)
+			recipe.favourites.add(self.user)
+		with CaptureQueriesContext(connection) as many_cards:
+			self.client.get(self.url)
+
+		self.assertEqual(len(many_cards), len(few_cards))
+
+	def test_recipe_cards_mark_favourited_recipes(self):
+		other_user = User.objects.get(username='@janedoe')
+		favourited = Recipe.objects.create(user=other_user, title="Liked", description="desc")
+		favourited.favourites.add(self.user)
+		not_favourited = Recipe.objects.create(user=other_user, title="Not liked", description="desc")
+
+		response = self.client.get(self.url)
+
+		cards = {recipe.id: recipe for recipe in response.context['page_obj']}
+		self.assertTrue(cards[favourited.id].is_favourited)
+		self.assertFalse(cards[not_favourited.id].is_favourited)
+		self.assertEqual(cards[self.recipe1.id].card_tags, list(self.recipe1.tags.all()))
+		self.assertContains(response, "Unfavourite", count=1)
+
+	def add_ingredients(self, recipe, *quantities):
+		for ingredient_id, quantity in quantities:
+			RecipeIngredient.objects.create(user=recipe.user, recipe=recipe, quantity=quantity, unit=self.unit, ingredient_id=ingredient_id)
+
+	def test_cook_with_what_i_have_ranks_recipes_by_cupboard_coverage(self):
+		kilograms = Unit.objects.create(user=self.user, name="kilograms", symbol="kg")
+		UserIngredient.objects.create(user=self.user, name="Tomatoes", quantity=1, unit=kilograms)
+		UserIngredient.objects.create(user=self.user, name="beef", quantity=200, unit=self.unit)
+		half_covered = Recipe.objects.create(user=self.user, title="Half", description="desc")
+		self.add_ingredients(half_covered, (1, 100), (3, 5))
+		covered_short = Recipe.objects.create(user=self.user, title="Short", description="desc")
+		self.add_ingredients(covered_short, (1, 100), (2, 500))
+		covered_stocked = Recipe.objects.create(user=self.user, title="Stocked", description="desc")
+		self.add_ingredients(covered_stocked, (1, 900), (2, 150))
+		hidden = Recipe.objects.create(user=User.objects.get(username='@janedoe'), title="Hidden", description="desc", public=False)
+		self.add_ingredients(hidden, (1, 100))
+
+		response = self.client.get(self.url + "?order_by=cupboard")
+
+		recipes = list(response.context['page_obj'])
+		self.assertEqual([recipe.id for recipe in recipes], [covered_stocked.id, covered_short.id, half_covered.id])
+		self.assertEqual([recipe.ingredients_stocked for recipe in recipes], [2, 1, 1])
+		self.assertContains(response, "You have 1 of 2 ingredients")
+
+	def test_cook_with_what_i_have_with_a_large_cupboard(self):
+		ingredients = Ingredient.objects.bulk_create([
+			Ingredient(user=self.user, name=f"Ingredient {i}", normalised_name=f"ingredient {i}") for i in range(1500)
+		])
+		UserIngredient.objects.bulk_create([
+			UserIngredient(user=self.user, name=ingredient.name, normalised_name=ingredient.normalised_name,
+				ingredient=ingredient, quantity=10, unit=self.unit) for ingredient in ingredients
+		])
+		recipe = Recipe.objects.create(user=self.user, title="Last", description="desc")
+		self.add_ingredients(recipe, (ingredients[-1].id, 5))
+
+		response = self.client.get(self.url + "?order_by=cupboard")
+
+		recipes = list(response.context['page_obj'])
+		self.assertEqual([recipe.id for recipe in recipes], [recipe.id])
+		self.assertEqual(recipes[0].ingredients_stocked, 1)
+
+	def test_cook_with_what_i_have_matches_ingredients_of_other_users_by_name(self):
+		other_user = User.objects.get(username='@janedoe')
+		own_flour = Ingredient.objects.create(user=self.user, name="Flour")
+		other_flour = Ingredient.objects.create(user=other_user, name="flour")
+		entry = UserIngredient.objects.create(user=self.user, name="Flour", quantity=500, unit=self.unit)
+		self.assertEqual(entry.ingredient, own_flour)
+		recipe = Recipe.objects.create(user=other_user, title="Bread", description="desc")
+		self.add_ingredients(recipe, (other_flour.id, 300))
+
+		response = self.client.get(self.url + "?order_by=cupboard")
+
+		recipes = list(response.context['page_obj'])
+		self.assertEqual([recipe.id for recipe in recipes], [recipe.id])
+		self.assertEqual(recipes[0].ingredients_covered, 1)
+		self.assertEqual(recipes[0].ingredients_stocked, 1)
+
+	def test_cook_with_what_i_have_with_an_empty_cupboard(self):
+		response = self.client.get(self.url + "?order_by=cupboard")
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(list(response.context['page_obj']), [])
+
+	def test_cook_with_what_i_have_is_an_ordering_option(self):
+		form = SearchRecipesForm(data={'order_by': 'cupboard'})
+		self.assertTrue(form.is_valid())
@@ -1,7 +1,9 @@
-from django.test import TestCase
+import tempfile
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from recipes.models import User, Recipe, Rating
-from recipes.views.dashboard_view import star_rating
+from recipes.views.dashboard_view import star_rating, get_top_rated_recipes
 
 class DashBoardViewTestCase(TestCase):
     """Tests of the dashboard view."""
@@ -9,6 +11,7 @@ class DashBoardViewTestCase(TestCase):
     fixtures = ['recipes/tests/fixtures/default_user.json', 'recipes/tests/fixtures/other_users.json']
 
     def setUp(self):
+        cache.clear()
         self.url = reverse('dashboard')
         self.user = User.objects.get(username='@johndoe')
         self.user2 = User.objects.get(username='@janedoe')
@@ -161,4 +164,66 @@ class DashBoardViewTestCase(TestCase):
 
         self.assertLessEqual(len(rated_recipes),4)
 
-    
\ No newline at end of file
+    
+    def test_top_rated_recipes_ordered_by_average_then_count(self):
+        rated_recipes = get_top_rated_recipes(self.user)
+
+        self.assertEqual(rated_recipes, [self.recipe4, self.recipe1, self.recipe2, self.recipe3])
+
+    def test_top_rated_recipes_uses_fixed_number_of_queries(self):
+        for i in range(20):
+            recipe = Recipe.objects.create(title=f"Extra {i}", description="desc", user=self.user2)
+            Rating.objects.create(user=self.user3, recipe=recipe, rating=(i % 5) + 1)
+
+        with self.assertNumQueries(1):
+            get_top_rated_recipes(self.user)
+
+    def test_trending_block_served_from_cache(self):
+        first_response = self.client.get(self.url)
+        second_response = self.client.get(self.url)
+
+        self.assertIsNotNone(first_response.context["rated_recipes"])
+        self.assertIsNone(second_response.context["rated_recipes"])
+        self.assertEqual(first_response.content, second_response.content)
+
+    def test_trending_block_invalidated_on_rating_saved(self):
+        self.client.get(self.url)
+        Rating.objects.create(user=self.user3, recipe=self.recipe5, rating=5)
+
+        response = self.client.get(self.url)
+
+        self.assertIn(self.recipe5, response.context["rated_recipes"])
+
+    def test_trending_block_invalidated_on_follow(self):
+        private_recipe = Recipe.objects.create(title="Private", description="desc", user=self.user3, public=False)
+        Rating.objects.create(user=self.user2, recipe=private_recipe, rating=5)
+        self.client.get(self.url)
+
+        self.client.post(reverse('follow_user', args=[self.user3.id]))
+        response = self.client.get(self.url)
+
+        self.assertIn(private_recipe, response.context["rated_recipes"])
+
+    def test_trending_block_invalidated_on_visibility_change(self):
+        recipe = Recipe.objects.create(title="Shared", description="desc", user=self.user3)
+        Rating.objects.create(user=self.user2, recipe=recipe, rating=5)
+        self.client.get(self.url)
+
+        recipe.public = False
+        recipe.save()
+        response = self.client.get(self.url)
+
+        self.assertNotIn(recipe, response.context["rated_recipes"])
+
+    def test_trending_block_cached_with_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            file_cache = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir,
+            }}
+            with override_settings(CACHES=file_cache):
+                first_response = self.client.get(self.url)
+                second_response = self.client.get(self.url)
+
+        self.assertIsNone(second_response.context["rated_recipes"])
+        self.assertEqual(first_response.content, second_response.content)
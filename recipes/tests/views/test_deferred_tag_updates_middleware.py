@@ -0,0 +1,47 @@
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.middleware import DeferredTagUpdatesMiddleware
+from recipes.models import User, Recipe, RecipeIngredient, Ingredient, Unit, Tag
+
+class DeferredTagUpdatesMiddlewareTestCase(TestCase):
+    """Tests of the deferred tag updates middleware."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.recipe = Recipe.objects.create(user=self.user, title="new", description="desc")
+        self.unit = Unit.objects.create(user=self.user, name="grams", symbol="g")
+
+    def add_ingredients(self, request):
+        for name, category in [("milk", "DR"), ("cheese", "DR"), ("bread", "GL")]:
+            ingredient = Ingredient.objects.create(user=self.user, name=name, category=category)
+            RecipeIngredient.objects.create(user=self.user, recipe=self.recipe, quantity=1, unit=self.unit, ingredient=ingredient)
+        self.tags_during_request = set(self.recipe.tags.values_list('name', flat=True))
+        return HttpResponse()
+
+    def test_tags_are_updated_once_after_the_view_returns(self):
+        middleware = DeferredTagUpdatesMiddleware(self.add_ingredients)
+        with CaptureQueriesContext(connection) as queries:
+            middleware(RequestFactory().post('/'))
+
+        self.assertIn("Dairy-free", self.tags_during_request)
+        tags = set(self.recipe.tags.values_list('name', flat=True))
+        self.assertNotIn("Dairy-free", tags)
+        self.assertNotIn("Gluten-free", tags)
+        self.assertIn(Tag.objects.get(name="Nut-free").name, tags)
+        category_queries = [query for query in queries if '"recipes_ingredient"."category" IN' in query['sql']]
+        self.assertEqual(len(category_queries), 1)
+
+    def test_recipes_deleted_during_the_request_are_skipped(self):
+        def add_ingredients_and_delete(request):
+            response = self.add_ingredients(request)
+            Recipe.objects.filter(pk=self.recipe.pk).delete()
+            return response
+
+        DeferredTagUpdatesMiddleware(add_ingredients_and_delete)(RequestFactory().post('/'))
+
+        self.assertFalse(Recipe.objects.filter(pk=self.recipe.pk).exists())
+        self.assertFalse(Recipe.tags.through.objects.filter(recipe_id=self.recipe.pk).exists())
@@ -61,6 +61,41 @@ class DeleteCommentViewTestCase(TestCase):
 		else:
 			self.fail("Comment should've been removed after deletion")
 
+
+	def test_delete_comment_removes_it_and_its_replies_from_recipe_comment_count(self):
+		for text in ["first reply", "second reply"]:
+			reply = Comment.objects.create(user=self.user, comment=text, date_published=make_aware(datetime.datetime(2025,4,2)))
+			self.test_comment.replies.add(reply)
+		Recipe.objects.filter(pk=self.recipe1.pk).update(comment_count=4)
+		self.client.post(self.url)
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 1)
+
+	def test_delete_comment_decrements_the_recipe_it_belongs_to(self):
+		recipe2 = Recipe.objects.create(user=self.user, title="456", description="456")
+		Recipe.objects.filter(pk__in=[self.recipe1.pk, recipe2.pk]).update(comment_count=1)
+		url = reverse("delete_comment", kwargs={'recipe_id': recipe2.pk, 'comment_id': self.test_comment.pk})
+		self.client.post(url)
+		self.recipe1.refresh_from_db()
+		recipe2.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 0)
+		self.assertEqual(recipe2.comment_count, 1)
+
+	def test_delete_comment_decrements_the_recipe_a_reply_is_on(self):
+		reply = Comment.objects.create(user=self.user, comment="reply", date_published=make_aware(datetime.datetime(2025,4,2)))
+		self.test_comment.replies.add(reply)
+		Recipe.objects.filter(pk=self.recipe1.pk).update(comment_count=2)
+		url = reverse("delete_comment", kwargs={'recipe_id': self.recipe1.pk, 'comment_id': reply.pk})
+		self.client.post(url)
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 1)
+		self.assertFalse(Comment.objects.filter(pk=reply.pk).exists())
+
+	def test_delete_comment_with_stale_count_does_not_go_below_zero(self):
+		self.client.post(self.url)
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 0)
+
 	def test_delete_comment_with_invalid_comment_pk(self):
 
 		invalid_url = reverse('delete_comment', kwargs= {'recipe_id' : self.recipe1.pk, 'comment_id': 5})
@@ -101,4 +101,15 @@ class DeleteMethodStepViewTestCase(TestCase):
         self.assertEqual(after_recipe_method_steps_count, before_recipe_method_steps_count)
         self.assertEqual(response.status_code, 404)
 
+    def test_renumbering_later_steps_uses_fixed_number_of_queries(self):
+        self.recipe1.method_steps.add(MethodStep.objects.create(step_number=2, method_text="test method 2"))
+        few_steps = self.client.post(self.url).query_metrics.query_count
 
+        recipe2 = Recipe.objects.create(user=self.user, title="456", description="456")
+        steps = [MethodStep.objects.create(step_number=number, method_text=f"step {number}") for number in range(1, 16)]
+        recipe2.method_steps.add(*steps)
+        url = reverse("delete_method_step", kwargs={'recipe_id': recipe2.pk, 'step_id': steps[0].pk})
+        many_steps = self.client.post(url).query_metrics.query_count
+
+        self.assertEqual(many_steps, few_steps)
+        self.assertEqual(list(recipe2.method_steps.values_list('step_number', flat=True)), list(range(1, 15)))
@@ -1,7 +1,10 @@
 from django.test import TestCase
 from django.urls import reverse
 from recipes.tests.helpers import reverse_with_next
-from recipes.models import User, Recipe, MethodStep
+from recipes.models import User, Recipe, MethodStep, Comment
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 class DeleteRecipeViewTestCase(TestCase):
     def setUp(self):
@@ -77,4 +80,51 @@ class DeleteRecipeViewTestCase(TestCase):
         except MethodStep.DoesNotExist:
             pass
         else:
-            self.fail("Method step should've been removed after deletion")
\ No newline at end of file
+            self.fail("Method step should've been removed after deletion")
+
+    def add_comment_thread(self, recipe, replies):
+        comment = Comment.objects.create(user=self.user, comment="comment", date_published=timezone.now())
+        recipe.comments.add(comment)
+        for i in range(replies):
+            reply = Comment.objects.create(user=self.user, comment=f"reply {i}", date_published=timezone.now())
+            comment.replies.add(reply)
+
+    def test_recipe_deletes_comments_and_replies(self):
+        self.add_comment_thread(self.recipe, replies=2)
+        other_recipe = Recipe.objects.create(user=self.user, title="Other", description="desc")
+        self.add_comment_thread(other_recipe, replies=1)
+
+        self.client.post(self.url)
+
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(other_recipe.comments.count(), 1)
+
+    def test_recipe_delete_queries_do_not_grow_with_comments(self):
+        recipe = Recipe.objects.create(user=self.user, title="Small", description="desc")
+        self.add_comment_thread(recipe, replies=1)
+        recipe.method_steps.add(MethodStep.objects.create(step_number=1, method_text="step"))
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(reverse('delete_recipe', args=[recipe.id]))
+
+        for i in range(5):
+            self.add_comment_thread(self.recipe, replies=5)
+        self.recipe.method_steps.add(MethodStep.objects.create(step_number=1, method_text="step"))
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(self.url)
+
+        self.assertEqual(len(many), len(few))
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(MethodStep.objects.exists())
+
+    def test_recipe_delete_queries_do_not_grow_with_method_steps(self):
+        recipe = Recipe.objects.create(user=self.user, title="Small", description="desc")
+        recipe.method_steps.add(MethodStep.objects.create(step_number=1, method_text="step"))
+        with CaptureQueriesContext(connection) as one_step:
+            Recipe.objects.filter(pk=recipe.pk).delete_with_related()
+
+        self.recipe.method_steps.add(*[
+            MethodStep.objects.create(step_number=number, method_text="step") for number in range(1, 21)
+        ])
+        with self.assertNumQueries(len(one_step)):
+            Recipe.objects.filter(pk=self.recipe.pk).delete_with_related()
+        self.assertFalse(MethodStep.objects.exists())
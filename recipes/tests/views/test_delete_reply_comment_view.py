@@ -61,6 +61,30 @@ class DeleteReplyCommentViewTestCase(TestCase):
 		else:
 			self.fail("Reply should've been removed after deletion")
 
+
+	def test_delete_reply_comment_decrements_recipe_comment_count(self):
+		Recipe.objects.filter(pk=self.recipe1.pk).update(comment_count=2)
+		self.client.post(self.url)
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 1)
+
+	def test_delete_reply_comment_decrements_the_recipe_it_belongs_to(self):
+		recipe2 = Recipe.objects.create(user=self.user, title="456", description="456")
+		Recipe.objects.filter(pk__in=[self.recipe1.pk, recipe2.pk]).update(comment_count=2)
+		url = reverse("delete_reply_comment", kwargs={'recipe_id': recipe2.pk, 'parent_comment_id' : self.parent_comment.pk, 'reply_comment_id': self.reply_comment.pk})
+		self.client.post(url)
+		self.recipe1.refresh_from_db()
+		recipe2.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 1)
+		self.assertEqual(recipe2.comment_count, 2)
+
+	def test_delete_unlinked_reply_leaves_recipe_comment_count(self):
+		self.parent_comment.replies.remove(self.reply_comment)
+		Recipe.objects.filter(pk=self.recipe1.pk).update(comment_count=1)
+		self.client.post(self.url)
+		self.recipe1.refresh_from_db()
+		self.assertEqual(self.recipe1.comment_count, 1)
+
 	def test_delete_reply_comment_with_invalid_pk(self):
 		invalid_url = reverse('delete_reply_comment', kwargs= {'recipe_id' : self.recipe1.pk, 'parent_comment_id' : self.parent_comment.pk, 'reply_comment_id': 7})
 		before_comment_objects_count = Comment.objects.count()
@@ -2,7 +2,7 @@ from django.forms.formsets import ManagementForm
 from django.test import TestCase
 from django.urls import reverse
 
-from recipes.models import Recipe, User, RecipeIngredient, Unit, Ingredient
+from recipes.models import Recipe, User, RecipeIngredient, Unit, Ingredient, Tag
 
 class ManageRecipeIngredientFormTestCase(TestCase):
 
@@ -113,6 +113,17 @@ class ManageRecipeIngredientFormTestCase(TestCase):
         self.assertRedirects(response, expected_url)
         self.assertRedirects(response, expected_url, status_code=302, target_status_code=200)
 
+    def test_allergen_tags_updated_after_formset_saved(self):
+        forms = [
+            {"id": self.recipe_ingredient1.pk, "quantity": "4", "unit": self.unit1.id, "ingredient": self.ingredient1.id},
+            {"id": "", "ingredient": 2, "quantity": 1, "unit": 1},
+        ]
+        payload = self.build_formset_data(forms=forms)
+        self.client.post(self.url, payload)
+        tags = self.recipe.tags.all()
+        self.assertNotIn(Tag.objects.get(name="Vegetarian"), tags)
+        self.assertIn(Tag.objects.get(name="Dairy-free"), tags)
+
     # code to prepare formset with data as shown in Django documentation for Formset
     # function layout from stackoverflow forum, post from user 'pymen' on 5th July 2020
     # pymen. (2022). Stackoverflow - Django formset unit test. Retrieved December 5, 2025, from https://stackoverflow.com/questions/1630754/django-formset-unit-test 
@@ -0,0 +1,138 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from recipes.meal_plan import MAX_MEAL_PLAN_RECIPES, MAX_MULTIPLIER, get_meal_plan
+from recipes.models import User, Recipe, RecipeIngredient, Ingredient, Unit, UserIngredient
+from recipes.tests.helpers import QueryBudgetTester, reverse_with_next
+
+class MealPlanViewTestCase(TestCase, QueryBudgetTester):
+    """Tests of the meal plan views."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+        'recipes/tests/fixtures/default_ingredients.json',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.client.login(username=self.user.username, password='Password123')
+        self.url = reverse('meal_plan')
+
+        self.grams = Unit.objects.create(user=self.user, name='grams', symbol='g')
+        self.kilograms = Unit.objects.create(user=self.user, name='kilograms', symbol='kg')
+        self.tomato = Ingredient.objects.get(name='Tomato')
+        self.tomatoes = Ingredient.objects.create(user=self.other_user, name='Tomatoes')
+        self.beef = Ingredient.objects.get(name='Beef')
+
+        self.soup = self.create_recipe("Soup", (self.tomato, 500, self.grams))
+        self.stew = self.create_recipe("Stew", (self.tomatoes, 1, self.kilograms), (self.beef, 300, self.grams))
+
+    def create_recipe(self, title, *ingredients, user=None, public=True):
+        recipe = Recipe.objects.create(user=user or self.user, title=title, description="desc", public=public)
+        for ingredient, quantity, unit in ingredients:
+            RecipeIngredient.objects.create(user=recipe.user, recipe=recipe, ingredient=ingredient, unit=unit, quantity=quantity)
+        return recipe
+
+    def plan(self, recipe, multiplier=1):
+        return self.client.post(reverse('add_meal_plan_recipe', args=[recipe.id]), {'multiplier': multiplier})
+
+    def test_meal_plan_url(self):
+        self.assertEqual(self.url, '/meal_plan/')
+
+    def test_meal_plan_redirects_when_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse_with_next('log_in', self.url), status_code=302, target_status_code=200)
+
+    def test_add_recipe_to_meal_plan(self):
+        response = self.plan(self.soup, multiplier=2)
+        self.assertRedirects(response, reverse('get_recipe', args=[self.soup.id]) + '?multiplier=2', target_status_code=200)
+        self.assertEqual(get_meal_plan(self.client.session), {self.soup.id: 2})
+
+    def test_redirect_shows_the_multiplier_the_plan_holds(self):
+        response = self.plan(self.soup, multiplier=9999)
+        self.assertRedirects(response, reverse('get_recipe', args=[self.soup.id]) + f'?multiplier={MAX_MULTIPLIER}', target_status_code=200)
+        response = self.plan(self.soup, multiplier=-5)
+        self.assertRedirects(response, reverse('get_recipe', args=[self.soup.id]) + '?multiplier=1', target_status_code=200)
+        self.assertEqual(get_meal_plan(self.client.session), {self.soup.id: 1})
+
+    def test_cannot_plan_a_recipe_the_user_cannot_see(self):
+        hidden = self.create_recipe("Hidden", user=self.other_user, public=False)
+        response = self.plan(hidden)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(get_meal_plan(self.client.session), {})
+
+    def test_meal_plan_holds_a_limited_number_of_recipes(self):
+        recipes = [self.create_recipe(f"Recipe {i}") for i in range(MAX_MEAL_PLAN_RECIPES + 1)]
+        for recipe in recipes:
+            self.plan(recipe)
+        self.assertEqual(len(get_meal_plan(self.client.session)), MAX_MEAL_PLAN_RECIPES)
+
+    def test_remove_recipe_from_meal_plan(self):
+        self.plan(self.soup)
+        self.plan(self.stew)
+        response = self.client.post(reverse('remove_meal_plan_recipe', args=[self.soup.id]))
+        self.assertRedirects(response, self.url, target_status_code=200)
+        self.assertEqual(get_meal_plan(self.client.session), {self.stew.id: 1})
+
+    def test_shopping_list_merges_recipes_and_subtracts_the_cupboard(self):
+        UserIngredient.objects.create(user=self.user, name='tomato', quantity=500, unit=self.grams)
+        self.plan(self.soup, multiplier=2)
+        self.plan(self.stew)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual([recipe.title for recipe in response.context['recipes']], ["Soup", "Stew"])
+        shopping_list = [(item.name, item.quantity, item.unit) for item in response.context['shopping_list']]
+        self.assertEqual(shopping_list, [
+            ("Beef", Decimal('300.00'), self.grams),
+            ("Tomato", Decimal('1.50'), self.kilograms),
+        ])
+
+    def test_shopping_list_leaves_out_what_the_cupboard_covers(self):
+        UserIngredient.objects.create(user=self.user, name='Beef', quantity=1, unit=self.kilograms)
+        UserIngredient.objects.create(user=self.user, name='Tomatoes', quantity=2, unit=self.kilograms)
+        self.plan(self.stew)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['shopping_list'], [])
+        self.assertContains(response, "You have all the ingredients!")
+
+    def test_meal_plan_uses_a_fixed_number_of_queries(self):
+        self.plan(self.soup)
+        self.client.get(self.url)  # load the unit and ingredient vocabularies
+        few_recipes = self.client.get(self.url).query_metrics.query_count
+
+        for i in range(20):
+            self.plan(self.create_recipe(f"Recipe {i}", (self.tomato, 100, self.grams), (self.beef, 1, self.kilograms)))
+        self.client.get(self.url)
+        many_recipes = self.client.get(self.url).query_metrics.query_count
+
+        self.assertEqual(many_recipes, few_recipes)
+
+    def test_meal_plan_stays_within_its_query_budget(self):
+        for recipe in (self.soup, self.stew):
+            self.plan(recipe)
+        response = self.client.get(self.url)
+        self.assert_within_query_budget(response)
+
+    def test_download_shopping_list_as_csv(self):
+        self.plan(self.stew)
+        response = self.client.get(reverse('download_meal_plan_shopping_list', args=['csv']))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('shopping_list.csv', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content, "Ingredient,Quantity,Unit\r\nBeef,300,g\r\nTomatoes,1,kg\r\n")
+
+    def test_download_shopping_list_as_text(self):
+        self.plan(self.stew, multiplier=3)
+        response = self.client.get(reverse('download_meal_plan_shopping_list', args=['txt']))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content, "900 g of Beef\n3 kg of Tomatoes\n")
+
+    def test_download_in_an_unknown_format(self):
+        response = self.client.get(reverse('download_meal_plan_shopping_list', args=['pdf']))
+        self.assertEqual(response.status_code, 404)
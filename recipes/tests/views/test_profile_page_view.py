@@ -216,4 +216,14 @@ class ProfilePageViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "profile_page.html")
 
-        self.assertTrue(response.context['is_following'])
\ No newline at end of file
+        self.assertTrue(response.context['is_following'])
+
+    def test_private_recipes_hidden_from_non_followers(self):
+        self.client.login(username=self.user.username, password="Password123")
+        public_recipe = Recipe.objects.create(user=self.user3, title="public", description="smth")
+        private_recipe = Recipe.objects.create(user=self.user3, title="private", description="smth", public=False)
+
+        response = self.client.get(reverse("profile_page", args=[self.user3.username]))
+
+        self.assertIn(public_recipe, response.context['recipes'])
+        self.assertNotIn(private_recipe, response.context['recipes'])
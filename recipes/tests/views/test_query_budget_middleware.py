@@ -0,0 +1,89 @@
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from recipes.models import User, Recipe
+from recipes.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, fingerprint
+from recipes.tests.helpers import QueryBudgetTester
+
+class QueryBudgetMiddlewareTestCase(TestCase, QueryBudgetTester):
+    """Tests of the query budget middleware."""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json', 'recipes/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.url = reverse('all_recipes')
+        self.user = User.objects.get(username='@johndoe')
+        self.client.login(username=self.user.username, password='Password123')
+        for i in range(3):
+            Recipe.objects.create(user=self.user, title=f"Recipe {i}", description="desc")
+
+    @override_settings(QUERY_BUDGET_SERVER_TIMING=True)
+    def test_response_has_server_timing_header(self):
+        response = self.client.get(self.url)
+        metrics = response.query_metrics
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn(f'desc="{metrics.query_count} queries"', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    @override_settings(DEBUG=False)
+    def test_server_timing_header_not_sent_by_default_outside_debug(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_metrics_record_queries_and_template_time(self):
+        response = self.client.get(self.url)
+        metrics = response.query_metrics
+        self.assertGreater(metrics.query_count, 0)
+        self.assertGreater(metrics.db_time, 0)
+        self.assertGreater(metrics.template_time, 0)
+        self.assertEqual(sum(metrics.fingerprints.values()), metrics.query_count)
+
+    def test_listing_pages_are_within_budget(self):
+        for url in [reverse('dashboard'), self.url, reverse('profile_page')]:
+            response = self.client.get(url)
+            self.assert_within_query_budget(response)
+
+    def test_browse_page_has_no_duplicate_queries(self):
+        response = self.client.get(self.url)
+        self.assert_no_duplicate_queries(response)
+
+    @override_settings(QUERY_BUDGETS={'all_recipes': 1}, QUERY_BUDGET_ENFORCE=True)
+    def test_enforced_budget_fails_view_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.url)
+
+    @override_settings(QUERY_BUDGETS={'all_recipes': 1}, QUERY_BUDGET_ENFORCE=False)
+    def test_unenforced_budget_logs_warning(self):
+        with self.assertLogs('recipes.query_budget', level='WARNING') as logs:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("over its budget of 1", logs.output[-1])
+
+    def test_queries_run_while_streaming_are_counted(self):
+        def lines():
+            yield str(Recipe.objects.count())
+        middleware = QueryBudgetMiddleware(lambda request: StreamingHttpResponse(lines()))
+        response = middleware(RequestFactory().get(self.url))
+        queries_before_streaming = response.query_metrics.query_count
+
+        self.assertEqual(b''.join(response.streaming_content), b'3')
+        self.assertEqual(response.query_metrics.query_count, queries_before_streaming + 1)
+
+    @override_settings(QUERY_BUDGETS={'download_meal_plan_shopping_list': 0}, QUERY_BUDGET_ENFORCE=True)
+    def test_enforced_budget_is_checked_once_streaming_ends(self):
+        response = self.client.get(reverse('download_meal_plan_shopping_list', args=['csv']))
+        with self.assertRaises(QueryBudgetExceeded):
+            b''.join(response.streaming_content)
+
+    def test_duplicate_queries_are_reported(self):
+        response = self.client.get(self.url)
+        metrics = response.query_metrics
+        metrics.fingerprints[fingerprint('SELECT * FROM recipes_recipe WHERE id = %s')] += 2
+        self.assertEqual(metrics.duplicate_queries(), [('SELECT * FROM recipes_recipe WHERE id = %s', 2)])
+
+    def test_fingerprint_collapses_in_lists_and_numbers(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s) LIMIT 12')
+        )
@@ -0,0 +1,89 @@
+from django.test import TestCase
+from django.urls import reverse
+from recipes.tests.helpers import reverse_with_next
+from recipes.models import Recipe, User, MethodStep
+
+class ReorderMethodStepsViewTestCase(TestCase):
+    '''Tests for the reorder_method_steps view '''
+
+    fixtures = ['recipes/tests/fixtures/default_user.json','recipes/tests/fixtures/other_users.json',]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.client.login(username=self.user.username, password='Password123')
+        self.recipe = Recipe.objects.create(user=self.user, title="123", description="123")
+        self.steps = [MethodStep.objects.create(step_number=number, method_text=f"step {number}") for number in range(1, 5)]
+        self.recipe.method_steps.add(*self.steps)
+        self.url = reverse("reorder_method_steps", kwargs={'recipe_id': self.recipe.pk})
+
+    def order_of(self, steps):
+        return ','.join(str(step.pk) for step in steps)
+
+    def assert_order(self, steps):
+        self.assertEqual(list(self.recipe.method_steps.order_by('step_number')), steps)
+        self.assertEqual(list(self.recipe.method_steps.values_list('step_number', flat=True)), list(range(1, len(steps) + 1)))
+
+    def test_reorder_method_steps_url(self):
+        self.assertEqual(self.url, f"/create_recipe/{self.recipe.pk}/add_method/reorder")
+
+    def test_reorder_applies_new_order(self):
+        new_order = [self.steps[2], self.steps[0], self.steps[3], self.steps[1]]
+        response = self.client.post(self.url, {'order': self.order_of(new_order)})
+        self.assertRedirects(response, reverse('add_method', kwargs={'recipe_id': self.recipe.pk}), status_code=302, target_status_code=200)
+        self.assert_order(new_order)
+
+    def test_reorder_uses_fixed_number_of_queries(self):
+        few_steps = self.client.post(self.url, {'order': self.order_of(reversed(self.steps))}).query_metrics.query_count
+
+        more_steps = [MethodStep.objects.create(step_number=number, method_text=f"step {number}") for number in range(5, 16)]
+        self.recipe.method_steps.add(*more_steps)
+        all_steps = list(self.recipe.method_steps.order_by('step_number'))
+        many_steps = self.client.post(self.url, {'order': self.order_of(reversed(all_steps))}).query_metrics.query_count
+
+        self.assertEqual(many_steps, few_steps)
+        self.assert_order(list(reversed(all_steps)))
+
+    def test_reorder_with_missing_step_is_rejected(self):
+        response = self.client.post(self.url, {'order': self.order_of(self.steps[1:])})
+        self.assertEqual(response.status_code, 400)
+        self.assert_order(self.steps)
+
+    def test_reorder_with_repeated_step_is_rejected(self):
+        response = self.client.post(self.url, {'order': self.order_of(self.steps + [self.steps[0]])})
+        self.assertEqual(response.status_code, 400)
+        self.assert_order(self.steps)
+
+    def test_reorder_with_step_of_another_recipe_is_rejected(self):
+        other_step = MethodStep.objects.create(step_number=1, method_text="other")
+        Recipe.objects.create(user=self.user, title="456", description="456").method_steps.add(other_step)
+        response = self.client.post(self.url, {'order': self.order_of(self.steps[:3] + [other_step])})
+        self.assertEqual(response.status_code, 400)
+        self.assert_order(self.steps)
+
+    def test_reorder_with_non_numeric_ids_is_rejected(self):
+        response = self.client.post(self.url, {'order': 'a,b,c,d'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reorder_by_another_user_is_forbidden(self):
+        self.client.logout()
+        self.client.login(username='@janedoe', password='Password123')
+        response = self.client.post(self.url, {'order': self.order_of(reversed(self.steps))})
+        self.assertEqual(response.status_code, 403)
+        self.assert_order(self.steps)
+
+    def test_get_reorder_is_not_allowed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_reorder_when_logged_out_redirects_user(self):
+        self.client.logout()
+        response = self.client.post(self.url, {'order': self.order_of(self.steps)})
+        self.assertRedirects(response, reverse_with_next('log_in', self.url), status_code=302, target_status_code=200)
+
+    def test_add_method_page_offers_moves(self):
+        response = self.client.get(reverse('add_method', kwargs={'recipe_id': self.recipe.pk}))
+        steps = response.context['steps']
+        self.assertIsNone(steps[0].move_up_order)
+        self.assertEqual(steps[0].move_down_order, self.order_of([self.steps[1], self.steps[0]] + self.steps[2:]))
+        self.assertEqual(steps[3].move_up_order, self.order_of(self.steps[:2] + [self.steps[3], self.steps[2]]))
+        self.assertIsNone(steps[3].move_down_order)
@@ -6,6 +6,7 @@ from django.utils.timezone import make_aware
 import datetime
 from recipes.models import User, Recipe, Rating, RecipeIngredient, Unit, Ingredient, Comment, UserIngredient
 from recipes.views import getIngredients
+from recipes.views.specific_recipe_view import COMMENT_THREADS_PER_PAGE
 
 class SpecificRecipeViewTestCase(TestCase):
     """Tests of the specific recipe view."""
@@ -116,10 +117,9 @@ class SpecificRecipeViewTestCase(TestCase):
         self.assertEqual(rating.rating, 4)
 
     def test_counting_recipe_comments(self):
-        parent_comment = Comment.objects.create(user=self.user, comment="test comment", date_published=make_aware(datetime.datetime(2025,4,1)))
-        self.recipe.comments.add(parent_comment)
-        reply = Comment.objects.create(user=self.user, comment="test reply", date_published=make_aware(datetime.datetime(2025,1,1)))
-        parent_comment.replies.add(reply)
+        self.client.post(reverse("add_comment", args=[self.recipe.id]), {'comment': "test comment"})
+        parent_comment = self.recipe.comments.get()
+        self.client.post(reverse("add_reply_comment", args=[self.recipe.id, parent_comment.id]), {'comment': "test reply"})
 
         response = self.client.get(self.url)
         self.assertIn('recipe_comments_count', response.context)
@@ -278,4 +278,90 @@ class SpecificRecipeViewTestCase(TestCase):
         flour = shopping_list[0]
         self.assertEqual(float(flour.difference_quantity), 2)
     
-    
\ No newline at end of file
+    
+
+    def test_shopping_list_converts_pounds(self):
+        pounds_unit,_ = Unit.objects.get_or_create(name='pounds', symbol='lbs', user=self.user)
+        UserIngredient.objects.create(name=self.ingredient.name, quantity=2, unit=pounds_unit, user=self.user, category="GR")
+        response = self.client.get(self.url)
+        flour = response.context['shopping_list'][0]
+        self.assertAlmostEqual(float(flour.difference_quantity), 2 - 2 * 0.453592)
+
+    def test_shopping_list_matches_cupboard_ingredients_ignoring_case_and_plurals(self):
+        UserIngredient.objects.create(name="FLOURS", quantity=3, unit=self.unit, user=self.user, category="GR")
+        UserIngredient.objects.create(name=self.ingredient.name, quantity=3, unit=self.unit, user=self.user2, category="GR")
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['shopping_list'], [])
+
+    def test_shopping_list_uses_a_fixed_number_of_queries(self):
+        self.client.get(self.url)  # load the unit and ingredient vocabularies
+        few_ingredients = self.client.get(self.url).query_metrics.query_count
+
+        grams_unit,_ = Unit.objects.get_or_create(name='grams', symbol='gs', user=self.user)
+        for i in range(20):
+            ingredient = Ingredient.objects.create(name=f"Ingredient {i}", user=self.user)
+            RecipeIngredient.objects.create(user=self.user, recipe=self.recipe, ingredient=ingredient, unit=self.unit, quantity=1)
+            UserIngredient.objects.create(name=ingredient.name, quantity=i * 100, unit=grams_unit, user=self.user, category="GR")
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.query_metrics.query_count, few_ingredients)
+        self.assertEqual(len(response.context['shopping_list']), 11)
+
+    def add_comment(self, text, minutes_ago, user=None, parent=None):
+        comment = Comment.objects.create(
+            user=user or self.user2,
+            comment=text,
+            date_published=make_aware(datetime.datetime.now() - datetime.timedelta(minutes=minutes_ago))
+        )
+        if parent is None:
+            self.recipe.comments.add(comment)
+        else:
+            parent.replies.add(comment)
+        return comment
+
+    def test_comment_threads_are_newest_first_with_replies_oldest_first(self):
+        older = self.add_comment("older", minutes_ago=10)
+        newer = self.add_comment("newer", minutes_ago=5)
+        late_reply = self.add_comment("late reply", minutes_ago=1, parent=older)
+        early_reply = self.add_comment("early reply", minutes_ago=8, user=self.user, parent=older)
+
+        response = self.client.get(self.url)
+
+        threads = list(response.context['comment_threads'])
+        self.assertEqual(threads, [newer, older])
+        self.assertEqual(threads[1].thread_replies, [early_reply, late_reply])
+
+    def test_comment_threads_use_fixed_number_of_queries(self):
+        parent = self.add_comment("first", minutes_ago=30)
+        self.add_comment("reply", minutes_ago=29, parent=parent)
+        self.client.get(self.url)  # load the unit and ingredient vocabularies
+        few_comments = self.client.get(self.url).query_metrics.query_count
+
+        for i in range(10):
+            parent = self.add_comment(f"comment {i}", minutes_ago=i, user=self.user if i % 2 else self.user2)
+            self.add_comment(f"reply {i}", minutes_ago=i, parent=parent)
+            self.add_comment(f"other reply {i}", minutes_ago=i, user=self.user, parent=parent)
+        many_comments = self.client.get(self.url).query_metrics.query_count
+
+        self.assertEqual(many_comments, few_comments)
+
+    def test_comment_threads_are_paged(self):
+        for i in range(COMMENT_THREADS_PER_PAGE + 1):
+            self.add_comment(f"comment {i}", minutes_ago=i)
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['comment_threads']), COMMENT_THREADS_PER_PAGE)
+        self.assertContains(response, "Load more comments")
+
+        response = self.client.get(self.url + "?comments_page=2")
+        threads = list(response.context['comment_threads'])
+        self.assertEqual([comment.comment for comment in threads], [f"comment {COMMENT_THREADS_PER_PAGE}"])
+        self.assertContains(response, "Newer comments")
+        self.assertNotContains(response, "Load more comments")
+
+    def test_recipe_comments_count_uses_stored_count(self):
+        Recipe.objects.filter(pk=self.recipe.pk).update(comment_count=7)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['recipe_comments_count'], 7)
+        self.assertContains(response, "Show Comments (7)")
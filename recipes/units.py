@@ -0,0 +1,93 @@
+"""
+Conversion between the units recipes and cupboards are measured in.
+
+Units are free-form rows that users create, so they are recognised by their
+symbol or name. ``UNIT_CONVERSIONS`` lists every recognised unit with the
+family it measures and its size in the family's base unit: grams for mass,
+millilitres for volume and single items for counts. Quantities in the same
+family can be compared after scaling them to the base unit. Units that are
+not in the table can only be compared with themselves.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+MASS = 'mass'
+VOLUME = 'volume'
+COUNT = 'count'
+
+# (family, size in the family's base unit, symbols and names)
+UNIT_CONVERSIONS = (
+    (MASS, '1', ('g', 'gs', 'gram', 'grams')),
+    (MASS, '0.001', ('mg', 'mgs', 'milligram', 'milligrams')),
+    (MASS, '1000', ('kg', 'kgs', 'kilogram', 'kilograms')),
+    (MASS, '28.3495', ('oz', 'ozs', 'ounce', 'ounces')),
+    (MASS, '453.592', ('lb', 'lbs', 'pound', 'pounds')),
+    (VOLUME, '1', ('ml', 'mls', 'millilitre', 'millilitres', 'milliliter', 'milliliters')),
+    (VOLUME, '1000', ('l', 'ltr', 'ltrs', 'litre', 'litres', 'liter', 'liters')),
+    (VOLUME, '5', ('tsp', 'tsps', 'teaspoon', 'teaspoons')),
+    (VOLUME, '15', ('tbsp', 'tbsps', 'tablespoon', 'tablespoons')),
+    (VOLUME, '240', ('cup', 'cups')),
+    (VOLUME, '29.5735', ('fl oz', 'fl ozs', 'fluid ounce', 'fluid ounces')),
+    (COUNT, '1', ('unit', 'units', 'pc', 'pcs', 'piece', 'pieces', 'item', 'items', 'whole')),
+    (COUNT, '12', ('dozen', 'dozens', 'doz')),
+)
+
+Conversion = namedtuple('Conversion', ['family', 'factor'])
+
+CONVERSIONS = {
+    alias: Conversion(family, Decimal(factor))
+    for family, factor, aliases in UNIT_CONVERSIONS
+    for alias in aliases
+}
+
+
+def normalise_unit_name(name):
+    return ' '.join(name.lower().replace('.', '').split())
+
+
+def get_conversion(unit):
+    """
+    Return the family and base-unit factor of a unit, looked up by its symbol and then its name.
+
+    Units that are not in the table are a family of their own with a factor
+    of one, so they only match units with the same symbol.
+    """
+    for name in (unit.symbol, unit.name):
+        conversion = CONVERSIONS.get(normalise_unit_name(name))
+        if conversion is not None:
+            return conversion
+    return Conversion(('unit', normalise_unit_name(unit.symbol)), Decimal(1))
+
+
+def to_base(quantity, unit):
+    """Return a quantity in the base unit of its family, along with the family."""
+    family, factor = get_conversion(unit)
+    return Decimal(quantity) * factor, family
+
+
+def missing_quantities(needed, available):
+    """
+    Return how much of each needed quantity is not covered by the available one.
+
+    ``needed`` and ``available`` are parallel sequences of (quantity, unit)
+    pairs. An available pair may be None, or have no quantity, for an
+    ingredient that is not available at all. Each result is in the unit of
+    the needed quantity, and is the whole needed quantity when the available
+    one is measured in a different family.
+    """
+    missing = []
+    for (needed_quantity, needed_unit), have in zip(needed, available):
+        needed_quantity = Decimal(needed_quantity)
+        if have is None or have[0] is None or have[1] is None:
+            missing.append(needed_quantity)
+            continue
+        needed_base, needed_family = to_base(needed_quantity, needed_unit)
+        available_base, available_family = to_base(*have)
+        if needed_family != available_family:
+            missing.append(needed_quantity)
+        elif needed_base <= available_base:
+            missing.append(Decimal(0))
+        else:
+            missing.append((needed_base - available_base) / get_conversion(needed_unit).factor)
+    return missing
@@ -21,3 +21,6 @@ from .edit_method_step_view import *
 from .manage_recipe_ingredient_view import *
 from .create_ingredient_view import *
 from .delete_method_step_view import *
+from .reorder_method_steps_view import *
+from .avatar_view import *
+from .meal_plan_view import *
@@ -6,6 +6,7 @@ from django.http import HttpResponseRedirect, Http404, HttpResponseForbidden
 from django.http import HttpResponseRedirect, HttpResponseForbidden
 from django.urls import reverse
 from django.core.exceptions import ValidationError 
+from django.db.models import Max
 
 
 @login_required
@@ -22,7 +23,8 @@ def add_method(request, recipe_id):
 	form = MethodStepForm()
 	context = {
 		'recipe': recipe, 
-		'form': form
+		'form': form,
+		'steps': get_steps_with_moves(recipe)
 	}
 
 	return render(request, 'add_method.html', context)
@@ -48,15 +50,16 @@ def check_valid_form(request, form, recipe):
 	if not form.is_valid():
 		return render(request, 'add_method.html', {
 			'recipe': recipe,
-			'form': form
+			'form': form,
+			'steps': get_steps_with_moves(recipe)
 		})
 	
 	return None
 	
-def update_last_number(last_step):
+def update_last_number(last_number):
 	"""Calculate the next step number after the last existing number."""
-	if last_step != None:
-		return last_step.step_number + 1
+	if last_number != None:
+		return last_number + 1
 	
 	return 1
 
@@ -65,11 +68,31 @@ def create_step_from_form(request, form, recipe):
 	"""Save a new method step and attach it to the recipe."""
 	try: 
 		method_step = form.save(commit=False)
-		last_step = recipe.method_steps.order_by('-step_number').first()
-		next_number = update_last_number(last_step)	
+		last_number = recipe.method_steps.aggregate(last=Max('step_number'))['last']
+		next_number = update_last_number(last_number)	
 		method_step.step_number = next_number
 		method_step.full_clean()
 		method_step.save()
 		recipe.method_steps.add(method_step)
 	except ValidationError:
 		return HttpResponseForbidden("Maximum number of steps exceeded. Methods can only have up to 20 steps.")
+
+
+def get_steps_with_moves(recipe):
+	"""
+	Get the recipe's steps in order, each with the orderings that move it up or down one place.
+
+	The orderings are comma separated step ids, ready to post to the reorder_method_steps view.
+	"""
+	steps = list(recipe.method_steps.all())
+	ids = [str(step.pk) for step in steps]
+	for index, step in enumerate(steps):
+		step.move_up_order = swap_positions(ids, index, index - 1) if index > 0 else None
+		step.move_down_order = swap_positions(ids, index, index + 1) if index < len(ids) - 1 else None
+	return steps
+
+
+def swap_positions(ids, first, second):
+	ids = list(ids)
+	ids[first], ids[second] = ids[second], ids[first]
+	return ','.join(ids)
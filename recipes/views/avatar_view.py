@@ -0,0 +1,38 @@
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from recipes.avatars import (
+    AVATAR_MAX_AGE, GRAVATAR_HASH_PATTERN, avatar_path, cache_avatar, get_avatar_sizes, gravatar_url, is_proxy_enabled
+)
+from recipes.models import User
+
+
+@login_required
+@require_GET
+def avatar(request, gravatar_hash, size):
+    """
+    Serves a user's avatar from the local avatar cache.
+
+    Avatars that are not cached yet are fetched from Gravatar first. Only the
+    hashes of existing users are fetched, so the cache cannot be filled with
+    arbitrary images. If Gravatar cannot be reached the browser is sent there
+    instead, without caching the redirect. Avatars are only shown on pages for
+    logged in users, and the view requires a login too, so that it cannot be
+    used to find out whether an email address has an account.
+    """
+    if not is_proxy_enabled() or size not in get_avatar_sizes() or not GRAVATAR_HASH_PATTERN.match(gravatar_hash):
+        raise Http404
+    path = avatar_path(gravatar_hash, size)
+    if not path.exists():
+        if not User.objects.filter(gravatar_hash=gravatar_hash).exists():
+            raise Http404
+        try:
+            cache_avatar(gravatar_hash)
+        except OSError:
+            return HttpResponseRedirect(gravatar_url(gravatar_hash, size))
+
+    response = FileResponse(path.open('rb'), content_type='image/png')
+    patch_cache_control(response, public=True, max_age=AVATAR_MAX_AGE, immutable=True)
+    return response
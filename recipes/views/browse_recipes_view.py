@@ -1,12 +1,17 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
-from django.db.models import Count, Avg, Q
+from django.db.models import Count
 from django.core.paginator import Paginator
 from django.http import HttpResponseRedirect
 from django.urls import reverse
+from hashlib import md5
 
+from recipes.cupboard import annotate_cupboard_coverage
 from recipes.forms import SearchRecipesForm
 from recipes.models import Recipe, RecipeIngredient
+from recipes.search import search_recipes
+from recipes.pagination import paginate_by_cursor, supports_cursor_pagination, get_count_estimate
+from recipes.recipe_cards import prepare_recipe_cards
 
 
 @login_required
@@ -17,13 +22,24 @@ def browse_recipes(request):
     recipe_list = get_base_queryset(request)
     form, search_val, tag_ids, ingredient_ids, order_by = get_params(request)
 
-    recipe_list = apply_filters(recipe_list, search_val, tag_ids, ingredient_ids, order_by)
+    recipe_list = apply_filters(recipe_list, search_val, tag_ids, ingredient_ids, order_by, request.user)
 
-    page_obj = paginate_queryset(recipe_list, request.GET.get('page'))
+    cursor_pagination = use_cursor_pagination(request, search_val, order_by)
+    if cursor_pagination:
+        page_obj = paginate_by_cursor(recipe_list, order_by, request.GET.get('cursor'))
+        page_obj.estimated_count = get_count_estimate(
+            recipe_list, count_cache_key(request.user, search_val, tag_ids, ingredient_ids)
+        )
+        page_obj.next_query = build_cursor_query(request.GET, page_obj.next_cursor)
+        page_obj.previous_query = build_cursor_query(request.GET, page_obj.previous_cursor)
+    else:
+        page_obj = paginate_queryset(recipe_list, request.GET.get('page'))
+    page_obj.object_list = prepare_recipe_cards(page_obj.object_list, request.user)
 
     return render(request, 'all_recipes.html', {
         'recipe_list': recipe_list,
         'page_obj': page_obj,
+        'cursor_pagination': cursor_pagination,
         'search_val': search_val,
         'form': form
     })
@@ -70,23 +86,37 @@ def build_query_params(search_val, tags, order_by, ingredients):
     return "?" + "&".join(params) if params else ""
 
 def get_base_queryset(request):
-    return Recipe.objects.filter(
-        Q(public=True) |
-        Q(user__followers=request.user) |
-        Q(user=request.user)
-    ).distinct()
+    return Recipe.objects.visible_to(request.user)
 
 
-def apply_filters(qs, search_val, tag_ids, ingredient_ids, order_by):
+def apply_filters(qs, search_val, tag_ids, ingredient_ids, order_by, user=None):
+    ranked = False
     if search_val:
-        qs = qs.filter(title__icontains=search_val)
+        qs, ranked = apply_search(qs, search_val)
     if tag_ids:
-        for tag_id in tag_ids:
-            qs = qs.filter(tags__id=tag_id)
+        qs = qs.filter(id__in=get_recipes_by_all_tags(tag_ids))
     if ingredient_ids:
         recipe_ids = get_recipes_by_ingredients(ingredient_ids)
         qs = qs.filter(id__in=recipe_ids)
-    return apply_ordering(qs, order_by)
+    if ranked and not order_by:
+        return qs.order_by('-search_rank', 'id')
+    return apply_ordering(qs, order_by, user)
+
+
+def apply_search(qs, search_val):
+    results = search_recipes(qs, search_val)
+    if results is None:
+        return qs.filter(title__icontains=search_val), False
+    return results, True
+
+
+def get_recipes_by_all_tags(tag_ids):
+    tag_ids = set(tag_ids)
+    return Recipe.tags.through.objects.filter(
+        tag_id__in=tag_ids
+    ).values('recipe_id').annotate(
+        matched_tags=Count('tag_id')
+    ).filter(matched_tags=len(tag_ids)).values('recipe_id')
 
 
 def get_recipes_by_ingredients(ingredient_ids):
@@ -95,9 +125,11 @@ def get_recipes_by_ingredients(ingredient_ids):
     ).values_list('recipe_id', flat=True).distinct()
 
 
-def apply_ordering(qs, order_by):
+def apply_ordering(qs, order_by, user=None):
     if not order_by:
         return qs.order_by('id')
+    if order_by == 'cupboard':
+        return order_by_cupboard(qs, user)
     if order_by in ('favourites', '-favourites'):
         return order_by_favourites(qs, order_by)
     if order_by in ('rating', '-rating'):
@@ -110,10 +142,38 @@ def order_by_favourites(qs, order_by):
     return qs.order_by('-fav_count' if order_by == 'favourites' else 'fav_count')
 
 
+def order_by_cupboard(qs, user):
+    """Recipes the user's cupboard covers best first, then those it has enough of, then the shortest."""
+    if user is None or not user.is_authenticated:
+        return qs.none()
+    qs = annotate_cupboard_coverage(qs, user)
+    return qs.order_by('-coverage', '-ingredients_stocked', 'ingredient_total', 'id')
+
+
 def order_by_rating(qs, order_by):
-    qs = qs.annotate(avg_rating=Avg('rating__rating'))
-    return qs.order_by('-avg_rating' if order_by == 'rating' else 'avg_rating')
+    return qs.order_by('-average_rating' if order_by == 'rating' else 'average_rating')
 
 
 def paginate_queryset(qs, page_number):
     return Paginator(qs, 12).get_page(page_number)
+
+
+def use_cursor_pagination(request, search_val, order_by):
+    """Cursor pagination is opt-in, and unavailable for searches ordered by relevance."""
+    if request.GET.get('pagination') != 'cursor' and 'cursor' not in request.GET:
+        return False
+    return supports_cursor_pagination(order_by) and not (search_val and not order_by)
+
+
+def build_cursor_query(params, cursor):
+    if cursor is None:
+        return None
+    params = params.copy()
+    params['pagination'] = 'cursor'
+    params['cursor'] = cursor
+    return params.urlencode()
+
+
+def count_cache_key(user, search_val, tag_ids, ingredient_ids):
+    filters = f"{user.pk}|{search_val}|{sorted(tag_ids)}|{sorted(ingredient_ids)}"
+    return 'recipes:browse_count:' + md5(filters.encode()).hexdigest()
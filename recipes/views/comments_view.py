@@ -1,5 +1,6 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
+from django.db.models import Q
 from ..models import Recipe, Comment
 from ..forms import CommentForm
 from django.http import HttpResponseRedirect, Http404
@@ -28,6 +29,7 @@ def create_comment(request, recipe_id, form):
 		comment = Comment(user=request.user, comment=form.cleaned_data['comment'], date_published=make_aware(datetime.datetime.now()))
 		comment.save()
 		recipe.comments.add(comment)
+		Recipe.objects.filter(pk=recipe.pk).adjust_comment_count(1)
 	except:
 		raise Http404("Could not create comment")
 
@@ -40,22 +42,20 @@ def handle_delete_comment(request, recipe_id, comment_id):
 	return redirect_to_specific_recipe_page(recipe_id)
 
 def delete_comment(request, recipe_id, comment_id):
-	'''Delete an individual comment object '''
+	'''Delete an individual comment object along with its replies'''
 	try:
-		recipe = Recipe.objects.get(pk=recipe_id)
+		Recipe.objects.get(pk=recipe_id)
 		comment = Comment.objects.get(pk=comment_id)
 	except:
 		raise Http404(f"Could not delete comment")
 	else: 
-		recipe.comments.remove(comment)
-		delete_comment_replies(comment)
-		comment.delete()
-
-
-def delete_comment_replies(comment):
-	'''Delete all of the specified comment's replies'''
-	for reply in comment.replies.all():
-		reply.delete()
+		# The count belongs to the recipes the comment is actually on, directly or as a reply,
+		# which are gone once it is deleted.
+		recipe_ids = list(Recipe.objects.filter(
+			Q(comments=comment) | Q(comments__replies=comment)
+		).values_list('pk', flat=True).distinct())
+		deleted = Comment.objects.filter(pk=comment.pk).delete_with_replies()
+		Recipe.objects.filter(pk__in=recipe_ids).adjust_comment_count(-deleted)
 
 
 
@@ -81,6 +81,7 @@ def create_reply_comment(request, parent_comment_id, form):
 		reply = Comment(user=request.user, comment=form.cleaned_data['comment'], date_published=make_aware(datetime.datetime.now()))
 		reply.save()
 		parent_comment.replies.add(reply)
+		Recipe.objects.filter(comments=parent_comment).adjust_comment_count(1)
 	except:
 		raise Http404(f"Could not create reply comment")
 
@@ -97,15 +98,19 @@ def handle_delete_reply_comment(request, recipe_id, parent_comment_id, reply_com
 
 def delete_reply_comment(request, recipe_id, parent_comment_id, reply_comment_id):
 	'''Delete a reply comment object'''
+	if not Recipe.objects.filter(pk=recipe_id).exists():
+		raise Http404(f"Could not delete reply comment")
 	try:
-		recipe = Recipe.objects.get(pk=recipe_id)
 		parent_comment = Comment.objects.get(pk=parent_comment_id)
 		reply = Comment.objects.get(pk=reply_comment_id)
+		# The count belongs to the recipes the reply is actually on, whichever parent the URL names.
+		recipe_ids = list(Recipe.objects.filter(comments__replies=reply).values_list('pk', flat=True))
 		parent_comment.replies.remove(reply)
 	except:
 		raise Http404(f"Could not delete reply comment")
 	else:
 		reply.delete()
+		Recipe.objects.filter(pk__in=recipe_ids).adjust_comment_count(-1)
 
 
 def redirect_to_specific_recipe_page(recipe_id):
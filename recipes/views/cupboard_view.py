@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from recipes.forms.user_ingredient_form import UserIngredientForm
-from ..models import UserIngredient
+from ..cupboard import get_cupboard
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
@@ -19,7 +19,7 @@ def cupboard(request):
             path = reverse('cupboard') 
             return HttpResponseRedirect(path)
     else:
-        user_ingredients = UserIngredient.objects.all()
+        user_ingredients = get_cupboard(current_user)
         ingredients_list = []
         for ingredient in user_ingredients:
             ingredient_line = str(ingredient)
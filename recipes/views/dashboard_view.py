@@ -1,8 +1,11 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
-from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.core.cache import cache
 
 from ..models import Recipe
+from ..caching import trending_cache_key, TRENDING_CACHE_TIMEOUT
 
 from math import floor
 
@@ -18,13 +21,37 @@ def dashboard(request):
     page.
 
     Displays the top 4 highest rated recipes along with the website's features.
+    The rendered top rated block is cached per user until ratings, follows or
+    recipe visibility change.
     """
     
-    rated_recipes = get_top_rated_recipes(current_user)
+    trending_block, rated_recipes = get_trending_block(current_user)
     features = get_features()
 
     current_user = request.user
-    return render(request, 'dashboard.html', {'user': current_user, 'rated_recipes': rated_recipes, 'features':features})
+    return render(request, 'dashboard.html', {
+        'user': current_user,
+        'trending_block': trending_block,
+        'rated_recipes': rated_recipes,
+        'features':features
+    })
+
+def get_trending_block(current_user):
+    """
+    Return the rendered top rated block and the recipes it was rendered from.
+
+    On a cache hit the recipes are not loaded at all, so None is returned
+    in their place.
+    """
+    key = trending_cache_key(current_user)
+    trending_block = cache.get(key)
+    if trending_block is not None:
+        return mark_safe(trending_block), None
+
+    rated_recipes = get_top_rated_recipes(current_user)
+    trending_block = render_to_string('partials/trending_recipes.html', {'rated_recipes': rated_recipes})
+    cache.set(key, str(trending_block), TRENDING_CACHE_TIMEOUT)
+    return trending_block, rated_recipes
 
 def star_rating(recipe):
     avg = recipe.average_rating or 0
@@ -36,16 +63,10 @@ def star_rating(recipe):
     recipe.half_stars = half_star
     recipe.empty_stars = range(empty)
 
-def get_top_rated_recipes(current_user):
-    following_user = current_user.following.all()
-    recipes = Recipe.objects.filter( Q(public=True) | Q(user__in=following_user) | Q(user=current_user)).distinct()
+def get_top_rated_recipes(current_user, limit=4):
+    recipes = Recipe.objects.visible_to(current_user).filter(rating_count__gt=0)
 
-    recipes = recipes.filter(rating__isnull=False).distinct()
-    rated_recipes = sorted(
-        recipes,
-        key=lambda r: (r.average_rating, r.rating_count, -r.id),
-        reverse=True
-    )[:4]
+    rated_recipes = list(recipes.order_by('-average_rating', '-rating_count', 'id')[:limit])
 
     for recipe in rated_recipes:
         star_rating(recipe)
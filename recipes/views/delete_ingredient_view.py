@@ -12,7 +12,7 @@ from recipes.models import UserIngredient
 def delete_ingredient(request, ingredient_pk):
     current_user = request.user
     ingredient = get_object_or_404(UserIngredient, id=ingredient_pk)
-    if current_user == ingredient.user:
+    if current_user.pk == ingredient.user_id:
         ingredient.delete()
         return HttpResponseRedirect(reverse('cupboard'))
     return HttpResponseForbidden("You are not allowed to delete this ingredient.")
\ No newline at end of file
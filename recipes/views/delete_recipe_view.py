@@ -13,12 +13,7 @@ def delete_recipe(request, recipe_id):
     current_user = request.user
     recipe = get_object_or_404(Recipe, id=recipe_id)
     if current_user == recipe.user:
-        delete_method_steps(recipe)
-        recipe.delete()
+        Recipe.objects.filter(pk=recipe.pk).delete_with_related()
         return HttpResponseRedirect(reverse('dashboard'))
     return HttpResponseForbidden("You are not allowed to delete this recipe.")
 
-def delete_method_steps(recipe):
-    for method_step in recipe.method_steps.all():
-        method_step.delete()
-
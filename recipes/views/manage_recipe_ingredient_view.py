@@ -1,8 +1,9 @@
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from recipes.forms.recipe_ingredient_form import RecipeIngredientFormSet
-from recipes.models import Recipe, RecipeIngredient
+from recipes.models import Recipe, RecipeIngredient, deferred_tag_updates
 
 
 @login_required
@@ -13,14 +14,16 @@ def manage_recipe_ingredient(request, recipe_id):
         recipe_ingredient_formset = RecipeIngredientFormSet(request.POST, request.FILES, prefix='recipe_ingredient')
         if recipe_ingredient_formset.is_valid():
             
-            recipe_ingredient_forms = recipe_ingredient_formset.save(commit=False)
-            for to_delete in recipe_ingredient_formset.deleted_objects:
-                to_delete.delete()
+            # The recipe's allergen tags are worked out once, after every row is saved.
+            with transaction.atomic(), deferred_tag_updates():
+                recipe_ingredient_forms = recipe_ingredient_formset.save(commit=False)
+                for to_delete in recipe_ingredient_formset.deleted_objects:
+                    to_delete.delete()
 
-            for recipe_ingredient in recipe_ingredient_forms:
-                recipe_ingredient.recipe = recipe
-                recipe_ingredient.user = request.user
-                recipe_ingredient.save()
+                for recipe_ingredient in recipe_ingredient_forms:
+                    recipe_ingredient.recipe = recipe
+                    recipe_ingredient.user = request.user
+                    recipe_ingredient.save()
             path = reverse('manage_recipe_ingredient', kwargs={"recipe_id": f"{recipe.id}"}) 
             return redirect(path)
 
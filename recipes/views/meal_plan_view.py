@@ -0,0 +1,72 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+
+from recipes.meal_plan import (
+    MAX_MEAL_PLAN_RECIPES, add_to_meal_plan, get_meal_plan, get_planned_recipes, plan_shopping_list,
+    remove_from_meal_plan, shopping_list_csv_rows, shopping_list_text_lines
+)
+from recipes.models import Recipe
+
+SHOPPING_LIST_FORMATS = {
+    'csv': ('text/csv', 'csv', shopping_list_csv_rows),
+    'txt': ('text/plain; charset=utf-8', 'txt', shopping_list_text_lines),
+}
+
+
+@login_required
+def meal_plan(request):
+    """Shows the recipes in the user's meal plan and the shopping list for all of them together."""
+    plan = get_meal_plan(request.session)
+    return render(request, 'meal_plan.html', {
+        'recipes': get_planned_recipes(request.user, plan),
+        'shopping_list': plan_shopping_list(request.user, plan),
+    })
+
+
+@login_required
+@require_POST
+def add_meal_plan_recipe(request, recipe_id):
+    """Adds a recipe to the user's meal plan at the multiplier given, or changes its multiplier."""
+    recipe = get_object_or_404(Recipe.objects.visible_to(request.user), id=recipe_id)
+    try:
+        multiplier = int(request.POST.get('multiplier', 1))
+    except ValueError:
+        multiplier = 1
+    if add_to_meal_plan(request.session, recipe.id, multiplier):
+        messages.add_message(request, messages.SUCCESS, f"{recipe.title} added to your meal plan.")
+    else:
+        messages.add_message(request, messages.ERROR, f"A meal plan can hold at most {MAX_MEAL_PLAN_RECIPES} recipes.")
+    # The recipe page shows the multiplier the plan holds, which may have been clamped.
+    url = reverse('get_recipe', args=[recipe.id])
+    planned_multiplier = get_meal_plan(request.session).get(recipe.id)
+    if planned_multiplier is not None:
+        url += f'?multiplier={planned_multiplier}'
+    return HttpResponseRedirect(url)
+
+
+@login_required
+@require_POST
+def remove_meal_plan_recipe(request, recipe_id):
+    remove_from_meal_plan(request.session, recipe_id)
+    return HttpResponseRedirect(reverse('meal_plan'))
+
+
+@login_required
+def download_meal_plan_shopping_list(request, file_format):
+    """
+    Downloads the meal plan's shopping list as CSV or plain text.
+
+    The list is worked out before the response starts, and its lines are
+    then streamed to the browser as they are formatted.
+    """
+    if file_format not in SHOPPING_LIST_FORMATS:
+        raise Http404
+    content_type, extension, format_lines = SHOPPING_LIST_FORMATS[file_format]
+    shopping_list = plan_shopping_list(request.user, get_meal_plan(request.session))
+    response = StreamingHttpResponse(format_lines(shopping_list), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="shopping_list.{extension}"'
+    return response
@@ -1,10 +1,11 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
 from math import floor
-from django.db.models import Count
+from django.db.models import Count, Sum
 
 
-from recipes.models import Recipe, Rating, User
+from recipes.models import Recipe, User
+from recipes.recipe_cards import prepare_recipe_cards
 
 
 @login_required
@@ -27,7 +28,7 @@ def profile_page(request, username=None):
     full_stars,half_star, empty_stars = star_rating(profile_user.rating)
 
     favourite_recipe_ids = get_favourite_recipes_id(current_user)
-    favourite_recipes = Recipe.objects.filter(pk__in=favourite_recipe_ids)
+    favourite_recipes = Recipe.objects.visible_to(current_user).filter(pk__in=favourite_recipe_ids)
 
     most_popular_id = get_most_popular(recipes)
     most_favourited_recipe_id = get_most_favourite(recipes)
@@ -39,7 +40,7 @@ def profile_page(request, username=None):
 
     return render(request, 'profile_page.html', {
         'user': profile_user,
-        'recipes':recipes,
+        'recipes': prepare_recipe_cards(recipes.visible_to(current_user), current_user),
         'rating_count': rating_count,
         'full_stars': range(full_stars),
         'half_star': half_star,
@@ -47,7 +48,7 @@ def profile_page(request, username=None):
         'following_count': following_count,
         'follower_count': follower_count,
         'is_following': is_following,
-        'favourite_recipes':  favourite_recipes,
+        'favourite_recipes': prepare_recipe_cards(favourite_recipes, current_user),
         'user_favourited_recipe_ids': favourite_recipe_ids,
         'most_popular': most_popular_id,
         'most_favourite': most_favourited_recipe_id
@@ -84,11 +85,9 @@ def followers_list(request, username):
     })
 
 def calculate_user_rating(user,recipes):
-    all_ratings = Rating.objects.filter(recipe__in=recipes)
-    rating_count = all_ratings.count()
-    ratings_sum = sum(rating.rating for rating in all_ratings)
-    total_ratings = all_ratings.count()
-    user_rating = ratings_sum / total_ratings if total_ratings > 0 else 0
+    totals = recipes.aggregate(ratings_sum=Sum('rating_sum'), rating_count=Sum('rating_count'))
+    rating_count = totals['rating_count'] or 0
+    user_rating = totals['ratings_sum'] / rating_count if rating_count > 0 else 0
     user.rating = user_rating
     return rating_count
 
@@ -108,7 +107,7 @@ def following(current_user, profile_user):
     return  current_user != profile_user and current_user.following.filter(id=profile_user.id).exists()
 
 def get_most_popular(recipes):
-    recipe = recipes.order_by('-rating').first()
+    recipe = recipes.order_by('-average_rating', '-rating_count').first()
     return recipe.id if recipe else None
 
 def get_most_favourite(recipes):
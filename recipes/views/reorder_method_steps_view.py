@@ -0,0 +1,47 @@
+from django.shortcuts import get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+from django.db import transaction
+from django.db.models import Case, Value, When
+from recipes.models import Recipe
+from django.http import HttpResponseRedirect, HttpResponseBadRequest, HttpResponseForbidden
+from django.urls import reverse
+
+
+@login_required
+@require_POST
+def reorder_method_steps(request, recipe_id):
+	"""Renumber all of a recipe's method steps to follow the posted order."""
+	recipe = get_object_or_404(Recipe, id=recipe_id)
+	if request.user != recipe.user:
+		return HttpResponseForbidden("You are not authorised to reorder this method.")
+
+	step_ids = parse_step_order(request.POST.get('order', ''))
+	if step_ids is None or not apply_step_order(recipe, step_ids):
+		return HttpResponseBadRequest("The new order must list each of the recipe's method steps exactly once.")
+
+	return HttpResponseRedirect(reverse('add_method', kwargs={'recipe_id': recipe.pk}))
+
+
+def parse_step_order(order):
+	"""Turn comma separated step ids into a list of ints, or None if any of them is not a number."""
+	try:
+		return [int(step_id) for step_id in order.split(',') if step_id.strip()]
+	except ValueError:
+		return None
+
+
+def apply_step_order(recipe, step_ids):
+	"""
+	Number the recipe's steps 1, 2, 3... in the given order with a single UPDATE.
+
+	Returns False, changing nothing, unless the ids are exactly the recipe's steps.
+	"""
+	with transaction.atomic():
+		current_ids = set(recipe.method_steps.select_for_update().values_list('id', flat=True))
+		if len(step_ids) != len(current_ids) or set(step_ids) != current_ids:
+			return False
+		if step_ids:
+			new_numbers = Case(*[When(pk=step_id, then=Value(number)) for number, step_id in enumerate(step_ids, start=1)])
+			recipe.method_steps.update(step_number=new_numbers)
+	return True
@@ -1,12 +1,17 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
-from django.db.models import F
-from ..models import Recipe, Rating, RecipeIngredient, UserIngredient
+from django.core.paginator import Paginator
+from django.db.models import F, OuterRef, Prefetch, Subquery
+from ..models import Recipe, Rating, RecipeIngredient, UserIngredient, Comment
 from django.http import HttpResponseRedirect
 from math import floor
 
 from ..models import Recipe, Rating
 from ..forms import CommentForm 
+from ..units import missing_quantities
+from ..vocabulary import attach_vocabulary, unit_vocabulary, ingredient_vocabulary
+
+COMMENT_THREADS_PER_PAGE = 20
 
 @login_required
 def get_recipe(request, recipe_id):
@@ -21,16 +26,43 @@ def get_recipe(request, recipe_id):
         return HttpResponseRedirect(request.path_info)
 
 
-    ingredients = getIngredients(recipe_id=recipe_id, multiplier=multiplier)
+    ingredients = getIngredients(recipe_id=recipe_id, multiplier=multiplier, user=request.user)
     context = create_recipe_context(request.user, recipe, ingredients, multiplier, CommentForm())
+    context["comment_threads"] = paginate_comment_threads(recipe, request.GET.get('comments_page'))
     return render(request, "specific_recipe.html", context)
 
-def getIngredients(recipe_id, multiplier):
-    """Get ingredients for specified recipe, including the amount required, units, and ingredient name"""
+def getIngredients(recipe_id, multiplier, user=None):
+    """
+    Get ingredients for specified recipe, including the amount required, units, and ingredient name.
+
+    If a user is given, the quantity and unit of the matching ingredient in
+    their cupboard are fetched in the same query, as cupboard_quantity and
+    cupboard_unit_id, ready for create_shopping_list.
+    """
 
     recipe_ingredient_instances = RecipeIngredient.objects.filter(recipe__id = recipe_id)
-    recipe_ingredients = recipe_ingredient_instances.annotate(scaled_quantity=F('quantity')*multiplier)
-    return recipe_ingredients
+    recipe_ingredient_instances = recipe_ingredient_instances.annotate(scaled_quantity=F('quantity')*multiplier)
+    if user is not None:
+        recipe_ingredient_instances = annotate_cupboard(recipe_ingredient_instances, user)
+    recipe_ingredients = list(recipe_ingredient_instances)
+    attach_vocabulary(recipe_ingredients, 'unit', unit_vocabulary)
+    return attach_vocabulary(recipe_ingredients, 'ingredient', ingredient_vocabulary)
+
+def annotate_cupboard(recipe_ingredients, user):
+    """
+    Annotate recipe ingredients with the quantity and unit of the user's matching cupboard ingredient.
+
+    Ingredients match on their normalised names, so case and plurals do not
+    matter, and are looked up in the index of the user's cupboard.
+    """
+
+    cupboard = UserIngredient.objects.filter(
+        user=user, normalised_name=OuterRef('ingredient__normalised_name')
+    ).order_by('-pk')
+    return recipe_ingredients.annotate(
+        cupboard_quantity=Subquery(cupboard.values('quantity')[:1]),
+        cupboard_unit_id=Subquery(cupboard.values('unit_id')[:1]),
+    )
 
 def handle_rating_post(request, recipe):
     """Checks if rating is valid, if so creates new rating entry for specified recipe"""
@@ -69,7 +101,7 @@ def create_recipe_context(user, recipe, ingredients, multiplier, form):
     average_rating = recipe.average_rating or 0
     rating_count = recipe.rating_count or 0
     full_stars, half_star, empty_stars = calculate_star_distribution(average_rating)
-    shopping_list = create_shopping_list(user, ingredients)
+    shopping_list = create_shopping_list(ingredients)
     recipe_comments_count = count_recipe_comments(recipe)
     
     return {
@@ -88,54 +120,42 @@ def create_recipe_context(user, recipe, ingredients, multiplier, form):
      }
 
 def count_recipe_comments(recipe):
-    counter = 0
-    parent_comments = recipe.comments.all()
-    for parent_comment in parent_comments:
-        counter = counter + parent_comment.replies.count()
-
-    counter = counter + recipe.comments.count()
-    return counter
-
-def convert_to_base(quantity, unit):
-    unit_to_grams = {'gs': 1, 'lbs': 453.592, 'kgs':1000}
-    unit_to_mls = {'tsps': 5, 'tbsps': 15, 'mls': 1, 'ltrs': 1000}
-
-    if unit in unit_to_grams:
-        return quantity * unit_to_grams[unit], 'mass'
-    if unit in unit_to_mls:
-        return quantity * unit_to_mls[unit], 'volume'
-    return quantity, 'other'
-
-
-def calculate_difference(recipe_ingredient, cupboard_ingredient):
-    recipe_qty, recipe_type = convert_to_base(recipe_ingredient.scaled_quantity, recipe_ingredient.unit.symbol)
-    cupboard_qty, cupboard_type =  convert_to_base(cupboard_ingredient.quantity, cupboard_ingredient.unit.symbol)
-    
-    if recipe_type != cupboard_type:
-        return recipe_ingredient.scaled_quantity
-    
-    if recipe_qty <= cupboard_qty:
-        return 0
-    
-    diff = recipe_qty - cupboard_qty
-
-    return diff / (recipe_qty / recipe_ingredient.scaled_quantity)
-
-
-def create_shopping_list(user, ingredients):
-    cupboard = {ingredient.name: ingredient for ingredient in UserIngredient.objects.filter(user = user)}
+    """Get the number of comments and replies on the recipe, as kept up to date by the comment views"""
+    return recipe.comment_count
+
+def get_comment_threads(recipe):
+    """
+    Get the recipe's comments, newest first, each with its replies oldest first.
+
+    Comment authors are joined in and the replies of every comment are fetched,
+    with their authors, in a single extra query, and stored on each comment as
+    thread_replies.
+    """
+    replies = Comment.objects.select_related('user').order_by('date_published', 'id')
+    return recipe.comments.select_related('user').prefetch_related(
+        Prefetch('replies', queryset=replies, to_attr='thread_replies')
+    ).order_by('-date_published', '-id')
+
+def paginate_comment_threads(recipe, page_number, per_page=COMMENT_THREADS_PER_PAGE):
+    """Get one page of the recipe's comment threads, so long discussions are loaded a page at a time"""
+    return Paginator(get_comment_threads(recipe), per_page).get_page(page_number)
+
+def create_shopping_list(ingredients):
+    """
+    Get the ingredients that the user still has to buy, each with the quantity missing from their cupboard.
+
+    The ingredients must come from getIngredients with the user given. The
+    missing quantity is stored on each ingredient as difference_quantity, in
+    the recipe's unit.
+    """
+    needed = [(ingredient.scaled_quantity, ingredient.unit) for ingredient in ingredients]
+    available = [
+        (ingredient.cupboard_quantity, unit_vocabulary.get(ingredient.cupboard_unit_id))
+        for ingredient in ingredients
+    ]
 
     shopping_list = []
-    for ingredient in ingredients:
-        name = ingredient.ingredient.name
-
-        if name not in cupboard:
-            ingredient.difference_quantity = ingredient.scaled_quantity
-            shopping_list.append(ingredient)
-            continue
-
-        difference_qty = calculate_difference(ingredient, cupboard[name])
-
+    for ingredient, difference_qty in zip(ingredients, missing_quantities(needed, available)):
         if difference_qty > 0:
             ingredient.difference_quantity = difference_qty
             shopping_list.append(ingredient)
@@ -3,6 +3,7 @@ from recipes.models import User
 from django.db.models import Q, Count
 from django.shortcuts import render
 from django.shortcuts import get_object_or_404, redirect
+from recipes.caching import bump_ratings_version
 
 @login_required
 def user_search(request):
@@ -59,6 +60,7 @@ def follow_user(request, user_id):
 
     if target != request.user:
         request.user.following.add(target) 
+        bump_ratings_version()
         
     return redirect('user_profile', username=target.username)
 
@@ -72,6 +74,7 @@ def unfollow_user(request, user_id):
     
     if target != request.user:
         request.user.following.remove(target)
+        bump_ratings_version()
 
     return redirect('user_profile', username=target.username)
 
@@ -0,0 +1,186 @@
+"""
+In-process copies of the tag, unit and ingredient tables.
+
+Tags, units and ingredients are small tables that rarely change but are
+looked up on almost every request. Each ``Vocabulary`` loads its whole table
+once and then answers lookups by id or name from memory, without querying
+the database.
+
+Every process keeps its own copy, so each vocabulary also has a version
+number in Django's cache. The version is checked the first time a vocabulary
+is used in each request, rather than on every lookup, and on every lookup
+outside of requests. The signal handlers in ``recipes.signals`` drop this
+process's copy as soon as a row is saved or deleted, and bump the version
+once the change is committed so that other processes reload theirs at their
+next request. Code that changes the tables without sending signals, such as
+``bulk_create``, calls ``invalidate()`` itself.
+
+Ingredients are created by users, so their table can grow without bound. A
+vocabulary given ``max_rows`` keeps at most that many rows in memory, and
+looks up the rest in the database, a batch at a time with ``get_many()``.
+
+The instances handed out are shared between requests and must not be
+modified.
+"""
+
+import weakref
+from contextvars import ContextVar
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection, transaction
+
+INGREDIENT_VOCABULARY_MAX_ROWS = 5000
+
+# The labels of the vocabularies whose version has been checked in the current
+# request, or None outside of a request.
+_checked_in_request = ContextVar('recipes_vocabulary_checks', default=None)
+
+
+def begin_request():
+    """Have each vocabulary check its version once during the request that is starting."""
+    _checked_in_request.set(set())
+
+
+def end_request():
+    _checked_in_request.set(None)
+
+
+class PendingCommit:
+    """The on_commit callback of a snapshot loaded in a transaction."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __call__(self):
+        self.snapshot.mark_committed()
+
+
+class Snapshot:
+    """The rows of a table as loaded at one version of its vocabulary."""
+
+    def __init__(self, version, rows, complete=True):
+        self.version = version
+        self.complete = complete
+        self.by_id = {row.pk: row for row in rows}
+        self.by_name = {}
+        for row in self.by_id.values():
+            self.by_name.setdefault(row.name, row)
+        self.pending_commit = connection.in_atomic_block
+        self._callback = None
+        if self.pending_commit:
+            # Only a weak reference is kept, so the callback is freed as soon as
+            # Django discards it because its transaction or savepoint rolled back.
+            callback = PendingCommit(self)
+            self._callback = weakref.ref(callback)
+            transaction.on_commit(callback)
+
+    def mark_committed(self):
+        self.pending_commit = False
+
+    def is_usable(self):
+        """Return False if the snapshot was loaded in a transaction or savepoint that has since been rolled back."""
+        return not self.pending_commit or self._callback() is not None
+
+
+class Vocabulary:
+    """An in-process copy of a small table, looked up by id or name."""
+
+    def __init__(self, model_label, max_rows=None):
+        self.model_label = model_label
+        self.max_rows = max_rows
+        self.version_key = f'recipes:vocabulary:{model_label}'
+        self._snapshot = None
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def get_version(self):
+        """Return the current version of the vocabulary, initialising it if needed."""
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 1, timeout=None)
+            version = cache.get(self.version_key, 1)
+        return version
+
+    def bump_version(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, 2, timeout=None)
+
+    def invalidate(self):
+        """Drop this process's copy now, and every other process's once the current transaction commits."""
+        self._snapshot = None
+        transaction.on_commit(self.bump_version)
+
+    def load(self):
+        """Return the current snapshot, reloading the table if it is missing or out of date."""
+        checked = _checked_in_request.get()
+        snapshot = self._snapshot
+        if checked is not None and self.model_label in checked and snapshot is not None and snapshot.is_usable():
+            return snapshot
+
+        version = self.get_version()
+        if snapshot is None or snapshot.version != version or not snapshot.is_usable():
+            snapshot = self.load_snapshot(version)
+            self._snapshot = snapshot
+        if checked is not None:
+            checked.add(self.model_label)
+        return snapshot
+
+    def load_snapshot(self, version):
+        rows = self.model.objects.order_by('pk')
+        if self.max_rows is None:
+            return Snapshot(version, rows)
+        rows = list(rows[:self.max_rows + 1])
+        return Snapshot(version, rows[:self.max_rows], complete=len(rows) <= self.max_rows)
+
+    def all(self):
+        """Return every row, in id order."""
+        snapshot = self.load()
+        if not snapshot.complete:
+            return list(self.model.objects.order_by('pk'))
+        return list(snapshot.by_id.values())
+
+    def get(self, pk):
+        """Return the row with the given id, or None if there is none."""
+        return self.get_many([pk]).get(pk)
+
+    def get_many(self, pks):
+        """Return the rows with the given ids, keyed by id, looking up any not held in memory in one query."""
+        snapshot = self.load()
+        rows = {pk: snapshot.by_id[pk] for pk in pks if pk in snapshot.by_id}
+        missing = set(pks) - rows.keys() - {None}
+        if missing and not snapshot.complete:
+            rows.update(self.model.objects.in_bulk(missing))
+        return rows
+
+    def get_by_name(self, name):
+        """Return the row with the given name, or None if there is none. Shared names resolve to the oldest row."""
+        snapshot = self.load()
+        row = snapshot.by_name.get(name)
+        if row is None and not snapshot.complete:
+            row = self.model.objects.filter(name=name).order_by('pk').first()
+        return row
+
+
+tag_vocabulary = Vocabulary('recipes.Tag')
+unit_vocabulary = Vocabulary('recipes.Unit')
+ingredient_vocabulary = Vocabulary('recipes.Ingredient', max_rows=INGREDIENT_VOCABULARY_MAX_ROWS)
+
+
+def attach_vocabulary(instances, field_name, vocabulary):
+    """
+    Set a foreign key of each instance to the matching row of a vocabulary.
+
+    Saves the query per instance that reading the foreign key would otherwise
+    cost. Rows missing from the vocabulary are left to load as usual.
+    """
+    id_attname = f'{field_name}_id'
+    rows = vocabulary.get_many({getattr(instance, id_attname) for instance in instances})
+    for instance in instances:
+        row = rows.get(getattr(instance, id_attname))
+        if row is not None:
+            setattr(instance, field_name, row)
+    return instances
@@ -70,6 +70,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recipes.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,13 +78,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'recipes.middleware.DeferredTagUpdatesMiddleware',
 ]
 
 ROOT_URLCONF = 'recipify.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'recipes.query_budget.DjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -110,6 +112,94 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Production runs several worker processes, so the file-based cache is used
+# there to share cached fragments between them.
+
+if ENVIRONMENT == 'production':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Query budgets
+# Every request's query count, database time and template render time is
+# logged by recipes.query_budget.QueryBudgetMiddleware, and the test suite
+# fails when a view goes over its budget. QUERY_BUDGETS gives the most
+# queries each view may run, keyed by URL name; views not listed have no
+# budget. The numbers are only sent to the browser in a Server-Timing header
+# when QUERY_BUDGET_SERVER_TIMING is set, which it is during development.
+
+QUERY_BUDGETS = {
+    'dashboard': 10,
+    'all_recipes': 10,
+    'get_recipe': 20,
+    'profile_page': 15,
+    'user_profile': 15,
+    'following_list': 8,
+    'followers_list': 8,
+    'user_search': 12,
+    'cupboard': 10,
+    'meal_plan': 10,
+}
+
+QUERY_BUDGET_SERVER_TIMING = DEBUG
+QUERY_BUDGET_ENFORCE = ENVIRONMENT == 'test'
+
+
+# Avatars
+# With AVATAR_PROXY on, avatars are fetched from Gravatar once, stored on disk
+# at each of AVATAR_SIZES and served by recipes.views.avatar with long-lived
+# cache headers, so pages no longer load images from Gravatar.
+
+AVATAR_PROXY = False
+AVATAR_SIZES = (60, 120)
+AVATAR_CACHE_DIR = BASE_DIR / 'avatars'
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# Request metrics go to a rotating log file outside of tests.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timestamped': {
+            'format': '{asctime} {levelname} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'query_budget_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'query_budget.log',
+            'maxBytes': 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'timestamped',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'recipes.query_budget': {
+            'handlers': [] if ENVIRONMENT == 'test' else ['query_budget_file'],
+            'level': 'DEBUG' if DEBUG else 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
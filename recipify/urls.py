@@ -54,7 +54,13 @@ urlpatterns = [
     path('create_recipe/<int:recipe_id>/add_method/<int:step_id>/edit_method_step', views.edit_method_step, name='edit_method_step'),
     path('manage_recipe_ingredient/specify_ingredient/', views.create_ingredient, name='specify_ingredient'),
     path('create_recipe/<int:recipe_id>/add_method/<int:step_id>/delete_method_step', views.handle_delete_method_step, name='delete_method_step'),
+    path('create_recipe/<int:recipe_id>/add_method/reorder', views.reorder_method_steps, name='reorder_method_steps'),
     path('manage_recipe_ingredient/<int:recipe_id>/', views.manage_recipe_ingredient, name='manage_recipe_ingredient'),
+    path('avatars/<str:gravatar_hash>/<int:size>.png', views.avatar, name='avatar'),
+    path('meal_plan/', views.meal_plan, name='meal_plan'),
+    path('meal_plan/<int:recipe_id>/add', views.add_meal_plan_recipe, name='add_meal_plan_recipe'),
+    path('meal_plan/<int:recipe_id>/remove', views.remove_meal_plan_recipe, name='remove_meal_plan_recipe'),
+    path('meal_plan/shopping_list.<str:file_format>', views.download_meal_plan_shopping_list, name='download_meal_plan_shopping_list'),
 ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)